@@ -717,7 +717,7 @@ class GeminiAnalyzer:
         4. 返回结构化结果
 
         Args:
-            context: 从 storage.get_analysis_context() 获取的上下文数据
+            context: 从 storage.get_history_window() 获取的上下文数据（可含增强数据）
             news_context: 预先搜索的新闻内容（可选）
 
         Returns:
@@ -12,7 +12,7 @@ A股自选股智能分析系统 - 配置管理模块
 
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv, dotenv_values
 from dataclasses import dataclass, field
 
@@ -94,6 +94,11 @@ class Config:
 
     # === 数据库配置 ===
     database_path: str = "./data/stock_analysis.db"
+    database_wal: bool = True  # SQLite 启用 WAL、synchronous=NORMAL 等连接参数
+    database_busy_timeout: float = 30.0  # 等待写锁的最长时间（秒）
+    database_write_queue: bool = False  # 写入经由单个后台写线程组提交（提交次数更少，但写入总耗时更长，默认关闭）
+    history_store: bool = False  # 启用本地列式历史文件（history_store.py），分析读取历史时不再查询数据库
+    history_store_dir: str = "./data/history"  # 列式历史文件目录
 
     # === 日志配置 ===
     log_dir: str = "./logs"  # 日志文件目录
@@ -106,6 +111,7 @@ class Config:
     # === 定时任务配置 ===
     schedule_enabled: bool = False  # 是否启用定时任务
     schedule_time: str = "18:00"  # 每日推送时间（HH:MM 格式）
+    schedule_trading_days_only: bool = True  # 定时任务仅在交易日执行
     market_review_enabled: bool = True  # 是否启用大盘复盘
 
     # === 流控配置（防封禁关键参数）===
@@ -116,6 +122,23 @@ class Config:
     # Tushare 每分钟最大请求数（免费配额）
     tushare_rate_limit_per_minute: int = 80
 
+    # Tushare 批量模式：一次请求的股票数超过该阈值时，按交易日拉取全市场日线（每个交易日 1 次调用）
+    tushare_bulk_threshold: int = 30
+
+    # 各数据源令牌桶限速：数据源名 -> (速率 次/秒, 突发容量)，未配置的使用内置默认值
+    rate_limits: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+    # 对冲请求：主数据源超过耗时预算（其 p95 耗时，无样本时用 hedge_delay）仍未返回时，
+    # 并行请求下一个健康数据源，先返回有效数据者胜出
+    hedge_enabled: bool = False
+    hedge_delay: float = 3.0
+
+    # 行情快照有效期（秒）：全市场批量行情刷新后，在此时间内从内存提供单只股票行情
+    quote_snapshot_ttl: float = 30.0
+
+    # 增量拉取：数据库缺少的交易日超过该天数（或检测到断档）时，回退为完整窗口拉取
+    delta_max_gap_days: int = 10
+
     # 重试配置
     max_retries: int = 3
     retry_base_delay: float = 1.0
@@ -163,6 +186,29 @@ class Config:
         except (ValueError, TypeError):
             return default
 
+    @classmethod
+    def _parse_rate_limits(cls, value: Optional[str]) -> Dict[str, Tuple[float, float]]:
+        """
+        解析数据源限速配置
+
+        格式：sina=8:5,akshare=0.3:1（速率:突发容量，突发容量可省略，默认 1）
+        非法条目会被忽略
+        """
+        limits: Dict[str, Tuple[float, float]] = {}
+        if not value:
+            return limits
+
+        for item in value.split(','):
+            if '=' not in item:
+                continue
+            source, spec = item.split('=', 1)
+            rate_str, _, burst_str = spec.partition(':')
+            rate = cls._safe_float(rate_str, 0.0)
+            burst = cls._safe_float(burst_str, 1.0)
+            if source.strip() and rate > 0 and burst >= 1:
+                limits[source.strip()] = (rate, burst)
+        return limits
+
     @classmethod
     def _load_from_env(cls) -> 'Config':
         """
@@ -201,6 +247,7 @@ class Config:
             feishu_app_secret=os.getenv('FEISHU_APP_SECRET'),
             feishu_folder_token=os.getenv('FEISHU_FOLDER_TOKEN'),
             tushare_token=os.getenv('TUSHARE_TOKEN'),
+            tushare_bulk_threshold=cls._safe_int(os.getenv('TUSHARE_BULK_THRESHOLD'), 30),
             gemini_api_key=os.getenv('GEMINI_API_KEY'),
             gemini_model=os.getenv('GEMINI_MODEL', 'gemini-3-flash-preview'),
             gemini_model_fallback=os.getenv('GEMINI_MODEL_FALLBACK', 'gemini-2.5-flash'),
@@ -228,12 +275,23 @@ class Config:
             feishu_max_bytes=cls._safe_int(os.getenv('FEISHU_MAX_BYTES'), 20000),
             wechat_max_bytes=cls._safe_int(os.getenv('WECHAT_MAX_BYTES'), 4000),
             database_path=os.getenv('DATABASE_PATH', './data/stock_analysis.db'),
+            database_wal=os.getenv('DATABASE_WAL', 'true').lower() == 'true',
+            database_busy_timeout=cls._safe_float(os.getenv('DATABASE_BUSY_TIMEOUT'), 30.0),
+            database_write_queue=os.getenv('DATABASE_WRITE_QUEUE', 'false').lower() == 'true',
+            history_store=os.getenv('HISTORY_STORE', 'false').lower() == 'true',
+            history_store_dir=os.getenv('HISTORY_STORE_DIR', './data/history'),
             log_dir=os.getenv('LOG_DIR', './logs'),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             max_workers=cls._safe_int(os.getenv('MAX_WORKERS'), 3),
+            quote_snapshot_ttl=cls._safe_float(os.getenv('QUOTE_SNAPSHOT_TTL'), 30.0),
+            rate_limits=cls._parse_rate_limits(os.getenv('RATE_LIMITS')),
+            hedge_enabled=os.getenv('HEDGE_ENABLED', 'false').lower() == 'true',
+            hedge_delay=cls._safe_float(os.getenv('HEDGE_DELAY'), 3.0),
+            delta_max_gap_days=cls._safe_int(os.getenv('DELTA_MAX_GAP_DAYS'), 10),
             debug=os.getenv('DEBUG', 'false').lower() == 'true',
             schedule_enabled=os.getenv('SCHEDULE_ENABLED', 'false').lower() == 'true',
             schedule_time=os.getenv('SCHEDULE_TIME', '18:00'),
+            schedule_trading_days_only=os.getenv('SCHEDULE_TRADING_DAYS_ONLY', 'true').lower() == 'true',
             market_review_enabled=os.getenv('MARKET_REVIEW_ENABLED', 'true').lower() == 'true',
             webui_enabled=os.getenv('WEBUI_ENABLED', 'false').lower() == 'true',
             webui_host=os.getenv('WEBUI_HOST', '127.0.0.1'),
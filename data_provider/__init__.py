@@ -10,7 +10,7 @@
 3. 防封禁流控策略
 
 数据源优先级：
-0.1. SinaFetcher (Priority 0.1) - 极速数据源，新浪财经API
+0.1. SinaFetcher (Priority 0.1) - 极速数据源，新浪财经API（日线不复权，不参与日线故障切换）
 0. TencentFetcher (Priority 0) - 最高优先级，专门用于快速模式
 0.5. TonghuashunFetcher (Priority 0.5) - 同花顺数据源，与腾讯并列
 1. AkshareFetcher (Priority 1) - 默认数据源
@@ -9,7 +9,7 @@ AkshareFetcher - 主数据源 (Priority 1)
 风险：爬虫机制易被反爬封禁
 
 防封禁策略：
-1. 每次请求前随机休眠 2-5 秒
+1. 按数据源共享的令牌桶限速（默认 0.3 次/秒，突发 1）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 
@@ -23,8 +23,9 @@ import random
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
+import numpy as np
 import pandas as pd
 from tenacity import (
     retry,
@@ -34,7 +35,10 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, RateLimitError
+from .cache import TTLCache
+from .singleflight import SingleFlight
+from .spot_table import SpotTable
 
 
 @dataclass
@@ -184,11 +188,57 @@ USER_AGENTS = [
 ]
 
 
-# 缓存实时行情数据（避免重复请求）
-_realtime_cache: Dict[str, Any] = {'data': None, 'timestamp': 0, 'ttl': 60}  # 60秒缓存有效期
-
-# ETF 实时行情缓存
-_etf_realtime_cache: Dict[str, Any] = {'data': None, 'timestamp': 0, 'ttl': 60}  # 60秒缓存有效期
+# 全市场行情表缓存（A股/ETF/港股，避免重复请求）：key 为行情表名称，值为 SpotTable 索引，60秒有效期
+_spot_cache = TTLCache(ttl=60, max_entries=8, name='akshare_spot')
+
+# 行情表字段映射：RealtimeQuote 字段名 -> 行情表列名
+# 未列出的字段（如 ETF 的市盈率）保持 RealtimeQuote 默认值 0.0
+_SPOT_COLUMNS: Dict[str, Dict[str, str]] = {
+    'stock_zh_a_spot_em': {
+        'price': '最新价',
+        'change_pct': '涨跌幅',
+        'change_amount': '涨跌额',
+        'volume_ratio': '量比',
+        'turnover_rate': '换手率',
+        'amplitude': '振幅',
+        'pe_ratio': '市盈率-动态',
+        'pb_ratio': '市净率',
+        'total_mv': '总市值',
+        'circ_mv': '流通市值',
+        'change_60d': '60日涨跌幅',
+        'high_52w': '52周最高',
+        'low_52w': '52周最低',
+    },
+    'fund_etf_spot_em': {
+        'price': '最新价',
+        'change_pct': '涨跌幅',
+        'change_amount': '涨跌额',
+        'volume_ratio': '量比',
+        'turnover_rate': '换手率',
+        'amplitude': '振幅',
+        'total_mv': '总市值',
+        'circ_mv': '流通市值',
+        'high_52w': '52周最高',
+        'low_52w': '52周最低',
+    },
+    'stock_hk_spot_em': {
+        'price': '最新价',
+        'change_pct': '涨跌幅',
+        'change_amount': '涨跌额',
+        'volume_ratio': '量比',
+        'turnover_rate': '换手率',
+        'amplitude': '振幅',
+        'pe_ratio': '市盈率',
+        'pb_ratio': '市净率',
+        'total_mv': '总市值',
+        'circ_mv': '流通市值',
+        'high_52w': '52周最高',
+        'low_52w': '52周最低',
+    },
+}
+
+# 请求合并：缓存失效时并发调用只下载一次行情表/筹码数据
+_flight = SingleFlight(name='akshare')
 
 
 def _is_etf_code(stock_code: str) -> bool:
@@ -233,6 +283,19 @@ def _is_hk_code(stock_code: str) -> bool:
     return code.isdigit() and len(code) == 5
 
 
+def _normalize_hk_code(stock_code: str) -> str:
+    """
+    转换为港股行情表使用的 5 位数字代码
+
+    Args:
+        stock_code: 港股代码，如 'hk00700'、'HK700'、'00700'
+
+    Returns:
+        5 位数字代码，如 '00700'
+    """
+    return stock_code.lower().replace('hk', '').zfill(5)
+
+
 class AkshareFetcher(BaseFetcher):
     """
     Akshare 数据源实现
@@ -241,7 +304,7 @@ class AkshareFetcher(BaseFetcher):
     数据来源：东方财富网爬虫
 
     关键策略：
-    - 每次请求前随机休眠 2.0-5.0 秒
+    - 令牌桶限速（进程内按数据源共享，默认 0.3 次/秒，突发 1）
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -249,18 +312,6 @@ class AkshareFetcher(BaseFetcher):
     name = "AkshareFetcher"
     priority = 10  # 降低优先级，避免网络问题
 
-    def __init__(self, sleep_min: float = 2.0, sleep_max: float = 5.0):
-        """
-        初始化 AkshareFetcher
-
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
-        """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
-
     def _set_random_user_agent(self) -> None:
         """
         设置随机 User-Agent
@@ -278,27 +329,6 @@ class AkshareFetcher(BaseFetcher):
         except Exception as e:
             logger.debug(f"设置 User-Agent 失败: {e}")
 
-    def _enforce_rate_limit(self) -> None:
-        """
-        强制执行速率限制
-
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
-        """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
-
     @retry(
         stop=stop_after_attempt(1),  # 减少重试次数，快速失败切换到其他数据源
         wait=wait_exponential(multiplier=1, min=2, max=5),  # 减少等待时间
@@ -316,7 +346,7 @@ class AkshareFetcher(BaseFetcher):
         流程：
         1. 判断代码类型（股票/ETF）
         2. 设置随机 User-Agent
-        3. 执行速率限制（随机休眠）
+        3. 执行速率限制（令牌桶）
         4. 调用对应的 akshare API
         5. 处理返回数据
         """
@@ -339,7 +369,7 @@ class AkshareFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         logger.info(
@@ -405,7 +435,7 @@ class AkshareFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         logger.info(
@@ -469,11 +499,11 @@ class AkshareFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         # 确保代码格式正确（5位数字）
-        code = stock_code.lower().replace('hk', '').zfill(5)
+        code = _normalize_hk_code(stock_code)
 
         logger.info(
             f"[API调用] ak.stock_hk_hist(symbol={code}, period=daily, "
@@ -527,8 +557,6 @@ class AkshareFetcher(BaseFetcher):
         需要映射到标准列名：
         date, open, high, low, close, volume, amount, pct_chg
         """
-        df = df.copy()
-
         # 列名映射（Akshare 中文列名 -> 标准英文列名）
         column_mapping = {
             '日期': 'date',
@@ -544,14 +572,6 @@ class AkshareFetcher(BaseFetcher):
         # 重命名列
         df = df.rename(columns=column_mapping)
 
-        # 添加股票代码列
-        df['code'] = stock_code
-
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
-
         return df
 
     def get_realtime_quote(self, stock_code: str) -> Optional[RealtimeQuote]:
@@ -576,6 +596,90 @@ class AkshareFetcher(BaseFetcher):
         else:
             return self._get_stock_realtime_quote(stock_code)
 
+    def get_spot_vectors(self, stock_codes: List[str], fields: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        批量获取 A 股行情字段向量（用于向量化筛选）
+
+        与 get_realtime_quote 共用同一份缓存的全市场行情表，一次调用取出多只股票的多个字段
+
+        Args:
+            stock_codes: A 股代码列表
+            fields: RealtimeQuote 字段名列表（默认全部数值字段，如 price、volume_ratio、total_mv）
+
+        Returns:
+            字段名 -> 与 stock_codes 等长的 float 数组（缺失为 NaN），
+            另含 'found' 布尔数组
+        """
+        table = self._get_spot_table('stock_zh_a_spot_em', 'A股')
+        return table.take(stock_codes, fields)
+
+    def _get_spot_table(self, api_name: str, label: str) -> SpotTable:
+        """
+        获取全市场行情表索引（带缓存 + 请求合并）
+
+        - 缓存有效：直接返回缓存的索引
+        - 缓存失效：并发调用方合并为一次下载，共享结果
+
+        Args:
+            api_name: akshare 接口名称（如 stock_zh_a_spot_em、fund_etf_spot_em）
+            label: 日志中显示的行情类型名称
+
+        Returns:
+            SpotTable 索引（下载失败时为空表）
+        """
+        table = _spot_cache.get(api_name)
+        if table is not None:
+            logger.debug(f"[缓存命中] 使用缓存的{label}实时行情数据")
+            return table
+
+        return _flight.do(api_name, self._download_spot_table, api_name, label)
+
+    def _download_spot_table(self, api_name: str, label: str) -> SpotTable:
+        """下载全市场行情表，构建索引后写入缓存（最多尝试2次）"""
+        import akshare as ak
+
+        # 缓存检查之后、加入合并之前，其他线程可能刚完成下载
+        cached = _spot_cache.get(api_name)
+        if cached is not None:
+            return cached
+
+        api = getattr(ak, api_name)
+        last_error: Optional[Exception] = None
+        df = None
+        for attempt in range(1, 3):
+            try:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+
+                logger.info(f"[API调用] ak.{api_name}() 获取{label}实时行情... (attempt {attempt}/2)")
+                api_start = time.time()
+
+                df = api()
+
+                api_elapsed = time.time() - api_start
+                logger.info(f"[API返回] ak.{api_name} 成功: 返回 {len(df)} 条, 耗时 {api_elapsed:.2f}s")
+                break
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[API错误] ak.{api_name} 获取失败 (attempt {attempt}/2): {e}")
+                time.sleep(min(2**attempt, 5))
+
+        # 更新缓存：成功缓存数据；失败也缓存空数据，避免同一轮任务对同一接口反复请求
+        if df is None:
+            logger.error(f"[API错误] ak.{api_name} 最终失败: {last_error}")
+            df = pd.DataFrame()
+        table = SpotTable(df, columns=_SPOT_COLUMNS[api_name])
+        _spot_cache.set(api_name, table)
+        return table
+
+    def _quote_from_table(self, table: SpotTable, code: str, stock_code: str) -> Optional[RealtimeQuote]:
+        """从行情表索引构建 RealtimeQuote（O(1) 查找）"""
+        row = table.row(code)
+        if row is None:
+            return None
+        return RealtimeQuote(code=stock_code, **row)
+
     def _get_stock_realtime_quote(self, stock_code: str) -> Optional[RealtimeQuote]:
         """
         获取普通 A 股实时行情数据
@@ -583,89 +687,19 @@ class AkshareFetcher(BaseFetcher):
         数据来源：ak.stock_zh_a_spot_em()
         包含：量比、换手率、市盈率、市净率、总市值、流通市值等
         """
-        import akshare as ak
-
         try:
-            # 检查缓存
-            current_time = time.time()
-            if (
-                _realtime_cache['data'] is not None
-                and current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']
-            ):
-                df = _realtime_cache['data']
-                logger.debug(f"[缓存命中] 使用缓存的A股实时行情数据")
-            else:
-                last_error: Optional[Exception] = None
-                df = None
-                for attempt in range(1, 3):
-                    try:
-                        # 防封禁策略
-                        self._set_random_user_agent()
-                        self._enforce_rate_limit()
-
-                        logger.info(f"[API调用] ak.stock_zh_a_spot_em() 获取A股实时行情... (attempt {attempt}/2)")
-                        import time as _time
-
-                        api_start = _time.time()
-
-                        df = ak.stock_zh_a_spot_em()
-
-                        api_elapsed = _time.time() - api_start
-                        logger.info(
-                            f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s"
-                        )
-                        break
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"[API错误] ak.stock_zh_a_spot_em 获取失败 (attempt {attempt}/2): {e}")
-                        time.sleep(min(2**attempt, 5))
-
-                # 更新缓存：成功缓存数据；失败也缓存空数据，避免同一轮任务对同一接口反复请求
-                if df is None:
-                    logger.error(f"[API错误] ak.stock_zh_a_spot_em 最终失败: {last_error}")
-                    df = pd.DataFrame()
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
-
-            if df is None or df.empty:
+            table = self._get_spot_table('stock_zh_a_spot_em', 'A股')
+
+            if table.empty:
                 logger.warning(f"[实时行情] A股实时行情数据为空，跳过 {stock_code}")
                 return None
 
             # 查找指定股票
-            row = df[df['代码'] == stock_code]
-            if row.empty:
+            quote = self._quote_from_table(table, stock_code, stock_code)
+            if quote is None:
                 logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
                 return None
 
-            row = row.iloc[0]
-
-            # 安全获取字段值
-            def safe_float(val, default=0.0):
-                try:
-                    if pd.isna(val):
-                        return default
-                    return float(val)
-                except:
-                    return default
-
-            quote = RealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume_ratio=safe_float(row.get('量比')),
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                pe_ratio=safe_float(row.get('市盈率-动态')),
-                pb_ratio=safe_float(row.get('市净率')),
-                total_mv=safe_float(row.get('总市值')),
-                circ_mv=safe_float(row.get('流通市值')),
-                change_60d=safe_float(row.get('60日涨跌幅')),
-                high_52w=safe_float(row.get('52周最高')),
-                low_52w=safe_float(row.get('52周最低')),
-            )
-
             logger.info(
                 f"[实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
                 f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%, "
@@ -690,89 +724,19 @@ class AkshareFetcher(BaseFetcher):
         Returns:
             RealtimeQuote 对象，获取失败返回 None
         """
-        import akshare as ak
-
         try:
-            # 检查缓存
-            current_time = time.time()
-            if (
-                _etf_realtime_cache['data'] is not None
-                and current_time - _etf_realtime_cache['timestamp'] < _etf_realtime_cache['ttl']
-            ):
-                df = _etf_realtime_cache['data']
-                logger.debug(f"[缓存命中] 使用缓存的ETF实时行情数据")
-            else:
-                last_error: Optional[Exception] = None
-                df = None
-                for attempt in range(1, 3):
-                    try:
-                        # 防封禁策略
-                        self._set_random_user_agent()
-                        self._enforce_rate_limit()
-
-                        logger.info(f"[API调用] ak.fund_etf_spot_em() 获取ETF实时行情... (attempt {attempt}/2)")
-                        import time as _time
-
-                        api_start = _time.time()
-
-                        df = ak.fund_etf_spot_em()
-
-                        api_elapsed = _time.time() - api_start
-                        logger.info(
-                            f"[API返回] ak.fund_etf_spot_em 成功: 返回 {len(df)} 只ETF, 耗时 {api_elapsed:.2f}s"
-                        )
-                        break
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"[API错误] ak.fund_etf_spot_em 获取失败 (attempt {attempt}/2): {e}")
-                        time.sleep(min(2**attempt, 5))
-
-                if df is None:
-                    logger.error(f"[API错误] ak.fund_etf_spot_em 最终失败: {last_error}")
-                    df = pd.DataFrame()
-                _etf_realtime_cache['data'] = df
-                _etf_realtime_cache['timestamp'] = current_time
-
-            if df is None or df.empty:
+            table = self._get_spot_table('fund_etf_spot_em', 'ETF')
+
+            if table.empty:
                 logger.warning(f"[实时行情] ETF实时行情数据为空，跳过 {stock_code}")
                 return None
 
-            # 查找指定 ETF
-            row = df[df['代码'] == stock_code]
-            if row.empty:
+            # 查找指定 ETF（ETF 无市盈率/市净率/60日涨跌幅，保持默认值）
+            quote = self._quote_from_table(table, stock_code, stock_code)
+            if quote is None:
                 logger.warning(f"[API返回] 未找到 ETF {stock_code} 的实时行情")
                 return None
 
-            row = row.iloc[0]
-
-            # 安全获取字段值
-            def safe_float(val, default=0.0):
-                try:
-                    if pd.isna(val):
-                        return default
-                    return float(val)
-                except:
-                    return default
-
-            # ETF 行情数据构建（部分字段 ETF 可能不支持，使用默认值）
-            quote = RealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume_ratio=safe_float(row.get('量比', 0)),  # ETF 可能无量比
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                pe_ratio=0.0,  # ETF 通常无市盈率
-                pb_ratio=0.0,  # ETF 通常无市净率
-                total_mv=safe_float(row.get('总市值', 0)),
-                circ_mv=safe_float(row.get('流通市值', 0)),
-                change_60d=0.0,  # ETF 接口可能不提供
-                high_52w=safe_float(row.get('52周最高', 0)),
-                low_52w=safe_float(row.get('52周最低', 0)),
-            )
-
             logger.info(
                 f"[ETF实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
                 f"换手率={quote.turnover_rate}%"
@@ -796,62 +760,20 @@ class AkshareFetcher(BaseFetcher):
         Returns:
             RealtimeQuote 对象，获取失败返回 None
         """
-        import akshare as ak
-
         try:
-            # 防封禁策略
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-
-            # 确保代码格式正确（5位数字）
-            code = stock_code.lower().replace('hk', '').zfill(5)
-
-            logger.info(f"[API调用] ak.stock_hk_spot_em() 获取港股实时行情...")
-            import time as _time
-
-            api_start = _time.time()
+            table = self._get_spot_table('stock_hk_spot_em', '港股')
 
-            df = ak.stock_hk_spot_em()
-
-            api_elapsed = _time.time() - api_start
-            logger.info(f"[API返回] ak.stock_hk_spot_em 成功: 返回 {len(df)} 只港股, 耗时 {api_elapsed:.2f}s")
+            if table.empty:
+                logger.warning(f"[实时行情] 港股实时行情数据为空，跳过 {stock_code}")
+                return None
 
-            # 查找指定港股
-            row = df[df['代码'] == code]
-            if row.empty:
+            # 查找指定港股（5位数字代码）
+            code = _normalize_hk_code(stock_code)
+            quote = self._quote_from_table(table, code, stock_code)
+            if quote is None:
                 logger.warning(f"[API返回] 未找到港股 {code} 的实时行情")
                 return None
 
-            row = row.iloc[0]
-
-            # 安全获取字段值
-            def safe_float(val, default=0.0):
-                try:
-                    if pd.isna(val):
-                        return default
-                    return float(val)
-                except:
-                    return default
-
-            # 港股行情数据构建
-            quote = RealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume_ratio=safe_float(row.get('量比', 0)),  # 港股可能无量比
-                turnover_rate=safe_float(row.get('换手率', 0)),
-                amplitude=safe_float(row.get('振幅', 0)),
-                pe_ratio=safe_float(row.get('市盈率', 0)),  # 港股可能有市盈率
-                pb_ratio=safe_float(row.get('市净率', 0)),  # 港股可能有市净率
-                total_mv=safe_float(row.get('总市值', 0)),
-                circ_mv=safe_float(row.get('流通市值', 0)),
-                change_60d=0.0,  # 港股接口可能不提供
-                high_52w=safe_float(row.get('52周最高', 0)),
-                low_52w=safe_float(row.get('52周最低', 0)),
-            )
-
             logger.info(
                 f"[港股实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
                 f"换手率={quote.turnover_rate}%"
@@ -862,6 +784,35 @@ class AkshareFetcher(BaseFetcher):
             logger.error(f"[API错误] 获取港股 {stock_code} 实时行情失败: {e}")
             return None
 
+    def get_hk_realtime_quotes(self, stock_codes: List[str]) -> Dict[str, Optional[RealtimeQuote]]:
+        """
+        批量获取港股实时行情
+
+        整个列表共用一份缓存的港股行情表（TTL 内最多下载一次）
+
+        Args:
+            stock_codes: 港股代码列表（如 'hk00700'、'00700'）
+
+        Returns:
+            股票代码到行情数据的映射字典（未找到的代码为 None）
+        """
+        result: Dict[str, Optional[RealtimeQuote]] = {}
+        if not stock_codes:
+            return result
+
+        try:
+            table = self._get_spot_table('stock_hk_spot_em', '港股')
+        except Exception as e:
+            logger.error(f"[API错误] 批量获取港股实时行情失败: {e}")
+            return {code: None for code in stock_codes}
+
+        for stock_code in stock_codes:
+            result[stock_code] = self._quote_from_table(table, _normalize_hk_code(stock_code), stock_code)
+
+        success_count = sum(1 for q in result.values() if q is not None)
+        logger.info(f"[批量行情] 港股 成功: {success_count}/{len(stock_codes)} 只")
+        return result
+
     def get_chip_distribution(self, stock_code: str) -> Optional[ChipDistribution]:
         """
         获取筹码分布数据
@@ -894,7 +845,7 @@ class AkshareFetcher(BaseFetcher):
 
             api_start = _time.time()
 
-            df = ak.stock_cyq_em(symbol=stock_code)
+            df = _flight.do(('stock_cyq_em', stock_code), ak.stock_cyq_em, symbol=stock_code)
 
             api_elapsed = _time.time() - api_start
 
@@ -950,45 +901,23 @@ class AkshareFetcher(BaseFetcher):
         Returns:
             包含股票基本信息的DataFrame，获取失败返回None
         """
-        import akshare as ak
-
         try:
-            # 防封禁策略
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
+            # 与实时行情共用同一份全市场行情表（缓存 + 请求合并）
+            table = self._get_spot_table('stock_zh_a_spot_em', 'A股')
 
-            logger.info("[API调用] ak.stock_zh_a_spot_em() 获取A股基本信息...")
-            import time as _time
-
-            api_start = _time.time()
-
-            df = ak.stock_zh_a_spot_em()
-
-            api_elapsed = _time.time() - api_start
-            logger.info(f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
-
-            if df.empty:
+            if table.empty:
                 return None
 
-            # 标准化列名和数据
-            def safe_float(val, default=0.0):
-                try:
-                    if pd.isna(val):
-                        return default
-                    return float(val)
-                except:
-                    return default
-
-            # 构建标准化的基本信息DataFrame
+            # 直接使用索引中的数值列（缺失值填 0）
             basic_info = pd.DataFrame(
                 {
-                    'code': df['代码'],
-                    'name': df['名称'],
-                    'market_cap': df['总市值'].apply(lambda x: safe_float(x)),
-                    'pe_ratio': df['市盈率-动态'].apply(lambda x: safe_float(x)),
-                    'pb_ratio': df['市净率'].apply(lambda x: safe_float(x)),
-                    'turnover_rate': df['换手率'].apply(lambda x: safe_float(x)),
-                    'volume_ratio': df['量比'].apply(lambda x: safe_float(x)),
+                    'code': table.codes,
+                    'name': table.names,
+                    'market_cap': np.nan_to_num(table.column('total_mv')),
+                    'pe_ratio': np.nan_to_num(table.column('pe_ratio')),
+                    'pb_ratio': np.nan_to_num(table.column('pb_ratio')),
+                    'turnover_rate': np.nan_to_num(table.column('turnover_rate')),
+                    'volume_ratio': np.nan_to_num(table.column('volume_ratio')),
                     'status': '正常',  # 默认都是正常状态
                 }
             )
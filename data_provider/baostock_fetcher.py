@@ -9,15 +9,17 @@ BaostockFetcher - 备用数据源 2 (Priority 3)
 优点：稳定、无配额限制
 
 关键策略：
-1. 管理 bs.login() 和 bs.logout() 生命周期
-2. 使用上下文管理器防止连接泄露
-3. 失败后指数退避重试
+1. 进程内共享一个 Baostock 连接：首次使用时登录，会话失效时才重新登录
+2. baostock 库使用全局 socket，非线程安全，所有查询通过锁串行执行
+3. 进程退出时登出
+4. 失败后指数退避重试
 """
 
+import atexit
 import logging
-from contextlib import contextmanager
-from datetime import datetime
-from typing import Optional, Generator, Dict, Any
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
 
 import pandas as pd
 from tenacity import (
@@ -28,86 +30,156 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, DataSourceUnavailableError
 
 logger = logging.getLogger(__name__)
 
 
-class BaostockFetcher(BaseFetcher):
-    """
-    Baostock 数据源实现
+# 日线查询字段
+KLINE_FIELDS = "date,open,high,low,close,volume,amount,pctChg"
 
-    优先级：3
-    数据来源：证券宝 Baostock API
 
-    关键策略：
-    - 使用上下文管理器管理连接生命周期
-    - 每次请求都重新登录/登出，防止连接泄露
-    - 失败后指数退避重试
+class BaostockConnection:
+    """
+    进程内共享的 Baostock 连接（线程安全）
 
-    Baostock 特点：
-    - 免费、无需注册
-    - 需要显式登录/登出
-    - 数据更新略有延迟（T+1）
+    - 延迟登录：第一次查询时才 bs.login()
+    - 会话失效（未登录、网络错误）时重新登录并重试一次
+    - baostock 的全局 socket 不能并发使用，每次查询持锁期间独占连接
     """
 
-    name = "BaostockFetcher"
-    priority = 3
+    # 需要重新登录的错误码前缀：100010xx 用户/登录类错误，100020xx 网络类错误
+    _SESSION_ERROR_PREFIXES = ('10001', '10002')
 
     def __init__(self):
-        """初始化 BaostockFetcher"""
-        self._bs_module = None
+        self._lock = threading.RLock()
+        self._bs = None
+        self._logged_in = False
 
-    def _get_baostock(self):
-        """
-        延迟加载 baostock 模块
+        self.logins = 0  # 累计登录次数
+        self.queries = 0  # 累计查询次数
 
-        只在首次使用时导入，避免未安装时报错
-        """
-        if self._bs_module is None:
+    def _get_baostock(self):
+        """延迟加载 baostock 模块，避免未安装时报错"""
+        if self._bs is None:
             import baostock as bs
 
-            self._bs_module = bs
-        return self._bs_module
+            self._bs = bs
+        return self._bs
 
-    @contextmanager
-    def _baostock_session(self) -> Generator:
+    def _login(self) -> None:
+        bs = self._get_baostock()
+        login_result = bs.login()
+        if login_result.error_code != '0':
+            raise DataSourceUnavailableError(f"Baostock 登录失败: {login_result.error_msg}")
+
+        self._logged_in = True
+        self.logins += 1
+        logger.debug(f"Baostock 登录成功（第 {self.logins} 次）")
+
+    def _ensure_login(self) -> None:
+        if not self._logged_in:
+            self._login()
+
+    def invalidate(self) -> None:
+        """标记会话失效，下次查询前重新登录"""
+        with self._lock:
+            self._logged_in = False
+
+    def is_session_error(self, error_code: str) -> bool:
+        return str(error_code).startswith(self._SESSION_ERROR_PREFIXES)
+
+    def query_k_data(self, bs_code: str, start_date: str, end_date: str, adjustflag: str = "2") -> pd.DataFrame:
         """
-        Baostock 连接上下文管理器
+        查询日线数据，会话失效时重新登录后重试一次
 
-        确保：
-        1. 进入上下文时自动登录
-        2. 退出上下文时自动登出
-        3. 异常时也能正确登出
+        Args:
+            bs_code: Baostock 格式代码，如 'sh.600519'
+            start_date: 开始日期
+            end_date: 结束日期
+            adjustflag: 1-后复权，2-前复权，3-不复权
 
-        使用示例：
-            with self._baostock_session():
-                # 在这里执行数据查询
+        Returns:
+            原始数据 DataFrame（字符串列，可能为空）
         """
-        bs = self._get_baostock()
-        login_result = None
+        with self._lock:
+            for attempt in range(2):
+                self._ensure_login()
+                try:
+                    rs = self._bs.query_history_k_data_plus(
+                        code=bs_code,
+                        fields=KLINE_FIELDS,
+                        start_date=start_date,
+                        end_date=end_date,
+                        frequency="d",  # 日线
+                        adjustflag=adjustflag,
+                    )
+                except (ConnectionError, OSError) as e:
+                    # socket 断开：重新登录后重试
+                    self._logged_in = False
+                    if attempt == 0:
+                        logger.warning(f"Baostock 连接异常，重新登录: {e}")
+                        continue
+                    raise
 
-        try:
-            # 登录 Baostock
-            login_result = bs.login()
+                self.queries += 1
+                if rs.error_code == '0':
+                    data_list = []
+                    while rs.next():
+                        data_list.append(rs.get_row_data())
+                    return pd.DataFrame(data_list, columns=rs.fields)
 
-            if login_result.error_code != '0':
-                raise DataFetchError(f"Baostock 登录失败: {login_result.error_msg}")
+                if self.is_session_error(rs.error_code) and attempt == 0:
+                    logger.warning(f"Baostock 会话失效（{rs.error_code} {rs.error_msg}），重新登录")
+                    self._logged_in = False
+                    continue
 
-            logger.debug("Baostock 登录成功")
+                raise DataFetchError(f"Baostock 查询失败: {rs.error_msg}")
 
-            yield bs
+        raise DataSourceUnavailableError("Baostock 查询失败: 重新登录后仍无法查询")
 
-        finally:
-            # 确保登出，防止连接泄露
+    def logout(self) -> None:
+        """登出（进程退出时自动调用）"""
+        with self._lock:
+            if not self._logged_in or self._bs is None:
+                return
             try:
-                logout_result = bs.logout()
+                logout_result = self._bs.logout()
                 if logout_result.error_code == '0':
                     logger.debug("Baostock 登出成功")
                 else:
                     logger.warning(f"Baostock 登出异常: {logout_result.error_msg}")
             except Exception as e:
                 logger.warning(f"Baostock 登出时发生错误: {e}")
+            finally:
+                self._logged_in = False
+
+
+# 进程内唯一连接
+_connection = BaostockConnection()
+atexit.register(_connection.logout)
+
+
+class BaostockFetcher(BaseFetcher):
+    """
+    Baostock 数据源实现
+
+    优先级：3
+    数据来源：证券宝 Baostock API
+
+    关键策略：
+    - 共享进程内的 BaostockConnection，只登录一次，会话失效时重新登录
+    - 查询经由连接锁串行执行（baostock 非线程安全）
+    - 失败后指数退避重试
+
+    Baostock 特点：
+    - 免费、无需注册
+    - 需要显式登录/登出
+    - 数据更新略有延迟（T+1）
+    """
+
+    name = "BaostockFetcher"
+    priority = 3
 
     def _convert_stock_code(self, stock_code: str) -> str:
         """
@@ -164,38 +236,67 @@ class BaostockFetcher(BaseFetcher):
 
         logger.debug(f"调用 Baostock query_history_k_data_plus({bs_code}, {start_date}, {end_date})")
 
-        with self._baostock_session() as bs:
-            try:
-                # 查询日线数据
-                # adjustflag: 1-后复权，2-前复权，3-不复权
-                rs = bs.query_history_k_data_plus(
-                    code=bs_code,
-                    fields="date,open,high,low,close,volume,amount,pctChg",
-                    start_date=start_date,
-                    end_date=end_date,
-                    frequency="d",  # 日线
-                    adjustflag="2",  # 前复权
-                )
+        try:
+            # adjustflag: 1-后复权，2-前复权，3-不复权
+            df = _connection.query_k_data(bs_code, start_date, end_date, adjustflag="2")
+        except DataFetchError:
+            raise
+        except Exception as e:
+            raise DataFetchError(f"Baostock 获取数据失败: {e}") from e
 
-                if rs.error_code != '0':
-                    raise DataFetchError(f"Baostock 查询失败: {rs.error_msg}")
+        if df.empty:
+            raise DataFetchError(f"Baostock 未查询到 {stock_code} 的数据")
 
-                # 转换为 DataFrame
-                data_list = []
-                while rs.next():
-                    data_list.append(rs.get_row_data())
+        return df
 
-                if not data_list:
-                    raise DataFetchError(f"Baostock 未查询到 {stock_code} 的数据")
+    def get_daily_data_batch(
+        self, stock_codes: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None, days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据（复用同一个登录会话）
 
-                df = pd.DataFrame(data_list, columns=rs.fields)
+        连接锁按单只股票获取（见 query_k_data），其他线程的 Baostock 查询
+        （如 get_realtime_quote）可以穿插在两只股票之间，不必等待整个股票池完成
 
-                return df
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期（可选）
+            end_date: 结束日期（可选，默认今天）
+            days: 获取天数（当 start_date 未指定时使用）
+
+        Returns:
+            {代码: 标准化且含技术指标的 DataFrame}，获取失败或无数据的代码不在结果中
 
+        Raises:
+            DataFetchError: 所有股票都查询失败时抛出（由管理器切换到下一个数据源）
+        """
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
+        logger.info(f"[{self.name}] 批量获取 {len(stock_codes)} 只股票数据: {start_date} ~ {end_date}")
+
+        raw_frames: Dict[str, pd.DataFrame] = {}
+        failed = 0
+        last_error: Optional[Exception] = None
+        for code in stock_codes:
+            try:
+                raw_df = _connection.query_k_data(self._convert_stock_code(code), start_date, end_date)
             except Exception as e:
-                if isinstance(e, DataFetchError):
-                    raise
-                raise DataFetchError(f"Baostock 获取数据失败: {e}") from e
+                logger.warning(f"[{self.name}] 批量获取 {code} 失败: {e}")
+                failed += 1
+                last_error = e
+                continue
+            if not raw_df.empty:
+                raw_frames[code] = raw_df
+
+        if stock_codes and failed == len(stock_codes):
+            raise DataFetchError(f"Baostock 批量获取 {failed} 只股票全部失败: {last_error}") from last_error
+
+        # 标准化与指标计算不占用连接
+        results: Dict[str, pd.DataFrame] = {}
+        for code, raw_df in raw_frames.items():
+            results[code] = self._process_raw_data(raw_df, code)
+
+        logger.info(f"[{self.name}] 批量获取完成: {len(results)}/{len(stock_codes)} 只股票")
+        return results
 
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
@@ -207,8 +308,6 @@ class BaostockFetcher(BaseFetcher):
         需要映射到标准列名：
         date, open, high, low, close, volume, amount, pct_chg
         """
-        df = df.copy()
-
         # 列名映射（只需要处理 pctChg）
         column_mapping = {
             'pctChg': 'pct_chg',
@@ -216,20 +315,6 @@ class BaostockFetcher(BaseFetcher):
 
         df = df.rename(columns=column_mapping)
 
-        # 数值类型转换（Baostock 返回的都是字符串）
-        numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # 添加股票代码列
-        df['code'] = stock_code
-
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
-
         return df
 
     def get_realtime_quote(self, stock_code: str) -> Optional[Dict[str, Any]]:
@@ -250,72 +335,55 @@ class BaostockFetcher(BaseFetcher):
 
             logger.info(f"[API调用] Baostock 获取 {stock_code} 最新行情...")
 
-            with self._baostock_session() as bs:
-                # 获取最近3天的数据（确保能获取到最新交易日）
-                from datetime import datetime, timedelta
-
-                end_date = datetime.now().strftime('%Y-%m-%d')
-                start_date = (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
-
-                rs = bs.query_history_k_data_plus(
-                    code=bs_code,
-                    fields="date,open,high,low,close,volume,amount,pctChg",
-                    start_date=start_date,
-                    end_date=end_date,
-                    frequency="d",
-                    adjustflag="2",
-                )
-
-                if rs.error_code != '0':
-                    logger.warning(f"[API返回] Baostock 查询最新行情失败: {rs.error_msg}")
-                    return None
-
-                # 转换为 DataFrame 并取最新一条
-                data_list = []
-                while rs.next():
-                    data_list.append(rs.get_row_data())
-
-                if not data_list:
-                    logger.warning(f"[API返回] Baostock 未找到 {stock_code} 的最新数据")
-                    return None
-
-                df = pd.DataFrame(data_list, columns=rs.fields)
-
-                # 数值转换
-                numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'amount', 'pctChg']
-                for col in numeric_cols:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-                # 取最新一条数据
-                latest = df.iloc[-1]
-
-                # 构造实时行情数据
-                quote_data = {
-                    'code': stock_code,
-                    'name': f'股票{stock_code}',  # Baostock不提供股票名称
-                    'price': float(latest.get('close', 0)),
-                    'change_pct': float(latest.get('pctChg', 0)),
-                    'change_amount': 0.0,  # 需要计算
-                    'volume_ratio': 0.0,  # Baostock不提供量比
-                    'turnover_rate': 0.0,  # Baostock不提供换手率
-                    'amplitude': 0.0,  # 可以计算
-                    'pe_ratio': 0.0,  # Baostock不提供PE
-                    'pb_ratio': 0.0,  # Baostock不提供PB
-                    'total_mv': 0.0,  # Baostock不提供市值
-                    'circulation_mv': 0.0,
-                }
-
-                # 计算振幅
-                high = float(latest.get('high', 0))
-                low = float(latest.get('low', 0))
-                pre_close = quote_data['price'] / (1 + quote_data['change_pct'] / 100)
-                if pre_close > 0:
-                    quote_data['amplitude'] = (high - low) / pre_close * 100
-                    quote_data['change_amount'] = quote_data['price'] - pre_close
-
-                logger.info(f"[实时行情] {stock_code}: 价格={quote_data['price']}, 涨跌幅={quote_data['change_pct']}%")
-                return quote_data
+            # 获取最近3天的数据（确保能获取到最新交易日）
+            end_date = datetime.now().strftime('%Y-%m-%d')
+            start_date = (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
+
+            try:
+                df = _connection.query_k_data(bs_code, start_date, end_date, adjustflag="2")
+            except DataFetchError as e:
+                logger.warning(f"[API返回] Baostock 查询最新行情失败: {e}")
+                return None
+
+            if df.empty:
+                logger.warning(f"[API返回] Baostock 未找到 {stock_code} 的最新数据")
+                return None
+
+            # 数值转换
+            numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'amount', 'pctChg']
+            for col in numeric_cols:
+                if col in df.columns:
+                    df[col] = pd.to_numeric(df[col], errors='coerce')
+
+            # 取最新一条数据
+            latest = df.iloc[-1]
+
+            # 构造实时行情数据
+            quote_data = {
+                'code': stock_code,
+                'name': f'股票{stock_code}',  # Baostock不提供股票名称
+                'price': float(latest.get('close', 0)),
+                'change_pct': float(latest.get('pctChg', 0)),
+                'change_amount': 0.0,  # 需要计算
+                'volume_ratio': 0.0,  # Baostock不提供量比
+                'turnover_rate': 0.0,  # Baostock不提供换手率
+                'amplitude': 0.0,  # 可以计算
+                'pe_ratio': 0.0,  # Baostock不提供PE
+                'pb_ratio': 0.0,  # Baostock不提供PB
+                'total_mv': 0.0,  # Baostock不提供市值
+                'circulation_mv': 0.0,
+            }
+
+            # 计算振幅
+            high = float(latest.get('high', 0))
+            low = float(latest.get('low', 0))
+            pre_close = quote_data['price'] / (1 + quote_data['change_pct'] / 100)
+            if pre_close > 0:
+                quote_data['amplitude'] = (high - low) / pre_close * 100
+                quote_data['change_amount'] = quote_data['price'] - pre_close
+
+            logger.info(f"[实时行情] {stock_code}: 价格={quote_data['price']}, 涨跌幅={quote_data['change_pct']}%")
+            return quote_data
 
         except Exception as e:
             logger.error(f"[API错误] 获取 {stock_code} Baostock实时行情失败: {e}")
@@ -9,20 +9,25 @@
 - DataFetcherManager: 策略管理器，实现自动切换
 
 防封禁策略：
-1. 每个 Fetcher 内置流控逻辑
-2. 失败自动切换到下一个数据源
+1. 按数据源共享的令牌桶流控（rate_limiter.py）
+2. 失败自动切换到下一个数据源，持续失败的数据源熔断（circuit_breaker.py）
 3. 指数退避重试机制
 """
 
+import importlib
 import logging
 import random
+import threading
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 
 import pandas as pd
 import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -30,6 +35,9 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from .circuit_breaker import CircuitState, get_circuit_breaker
+from .rate_limiter import get_rate_limiter, normalize_source_name
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -56,6 +64,160 @@ class DataSourceUnavailableError(DataFetchError):
     pass
 
 
+# 表示数据源本身故障的异常类型（requests 的连接/超时异常不是内置 ConnectionError 的子类）
+_SOURCE_ERROR_TYPES = (
+    RateLimitError,
+    DataSourceUnavailableError,
+    ConnectionError,
+    TimeoutError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+
+def is_source_error(error: Optional[BaseException]) -> bool:
+    """
+    异常是否为数据源本身的故障（计入熔断器）
+
+    沿异常链（__cause__ / __context__）查找：网络错误、超时、限流、数据源不可用、
+    HTTP 429/5xx 属于数据源故障；代码不支持、停牌或非交易日无数据等
+    只与单只股票有关的缺失不是，不应让健康的数据源熔断
+
+    Args:
+        error: 数据源抛出的异常
+
+    Returns:
+        是否为数据源故障
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, _SOURCE_ERROR_TYPES):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            if status == 429 or status >= 500:
+                return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+# 技术指标最长回看窗口（MA20），增量计算时需要的历史K线条数
+INDICATOR_WARMUP_BARS = 20
+
+# calculate_indicators 生成的指标列
+INDICATOR_COLUMNS = ['ma5', 'ma10', 'ma20', 'volume_ratio']
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    滑动平均（min_periods=1），返回 float64 数组
+
+    仍使用 pandas 的滚动窗口实现（带误差补偿的累加），保证保留2位小数后
+    与原先逐列计算的结果逐位一致；Series 只是对数组的零拷贝包装
+    """
+    return pd.Series(values, copy=False).rolling(window=window, min_periods=1).mean().to_numpy()
+
+
+def indicator_arrays(close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """在 float64 数组上计算 INDICATOR_COLUMNS（保留2位小数）"""
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+
+    result = {f'ma{window}': np.round(_rolling_mean(close, window), 2) for window in (5, 10, 20)}
+
+    # 量比：当日成交量 / 前一日的5日平均成交量，无法计算时记为 1.0
+    prev_avg_volume = np.empty_like(volume)
+    prev_avg_volume[:1] = np.nan
+    prev_avg_volume[1:] = _rolling_mean(volume, 5)[:-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volume_ratio = volume / prev_avg_volume
+    volume_ratio[np.isnan(volume_ratio)] = 1.0
+    result['volume_ratio'] = np.round(volume_ratio, 2)
+    return result
+
+
+def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    计算技术指标
+
+    计算指标：
+    - MA5, MA10, MA20: 移动平均线
+    - Volume_Ratio: 量比（今日成交量 / 5日平均成交量）
+
+    增量更新时在新K线前拼接最近 INDICATOR_WARMUP_BARS 条历史数据，
+    即可得到与完整窗口一致的指标值
+    """
+    df = df.copy()
+    for col, values in indicator_arrays(df['close'].to_numpy(), df['volume'].to_numpy()).items():
+        df[col] = values
+    return df
+
+
+# 标准列中的数值列
+NUMERIC_COLUMNS = STANDARD_COLUMNS[1:]
+
+
+def _numeric_values(series: pd.Series) -> np.ndarray:
+    """列 -> 数值数组（已是 numpy 数值类型时直接复用底层数组，否则按 to_numeric 转换）"""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+        return series.to_numpy()
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def build_daily_frame(df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+    """
+    标准化后的日线数据 -> 清洗并含技术指标的 DataFrame（单次融合处理）
+
+    处理：
+    1. 只保留 code + STANDARD_COLUMNS，日期转为 datetime，数值列一次性转为数值数组
+    2. 去除 close / volume 为空的行
+    3. 按日期升序排序（输入已升序时跳过排序）
+    4. 在 float64 数组上计算均线与量比
+
+    各列只在最后组装结果时复制一次，不产生中间 DataFrame
+
+    Args:
+        df: 子类 _normalize_data 的结果（列名已为标准列名，可缺少 code 列）
+        stock_code: 股票代码（df 中没有 code 列时使用）
+
+    Returns:
+        列为 code + STANDARD_COLUMNS（存在的列）+ INDICATOR_COLUMNS 的 DataFrame
+    """
+    dates = df['date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+
+    columns: Dict[str, object] = {'date': dates.array}
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            columns[col] = _numeric_values(df[col])
+
+    # 只在需要时计算行选择：去空行 + 排序
+    keep = ~(pd.isna(columns['close']) | pd.isna(columns['volume']))
+    all_valid = bool(keep.all())
+    if dates.is_monotonic_increasing:
+        indexer = None if all_valid else np.flatnonzero(keep)
+    else:
+        order = columns['date'].argsort(kind='stable')
+        indexer = order if all_valid else order[keep[order]]
+
+    if indexer is not None:
+        columns = {col: values[indexer] for col, values in columns.items()}
+
+    codes = df['code'].to_numpy() if 'code' in df.columns else None
+    if codes is not None and indexer is not None:
+        codes = codes[indexer]
+
+    columns.update(indicator_arrays(columns['close'], columns['volume']))
+
+    # 经过行选择的列已是新数组，无需再复制；否则复制一次，避免结果与输入共享内存
+    result = pd.DataFrame(columns, copy=indexer is None)
+    result.insert(0, 'code', stock_code if codes is None else codes)
+    return result
+
+
 class BaseFetcher(ABC):
     """
     数据源抽象基类
@@ -72,6 +234,7 @@ class BaseFetcher(ABC):
 
     name: str = "BaseFetcher"
     priority: int = 99  # 优先级数字越小越优先
+    adjusted_daily: bool = True  # 日线是否为前复权价格（不复权的数据源不参与日线故障切换）
 
     @abstractmethod
     def _fetch_raw_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
@@ -95,6 +258,9 @@ class BaseFetcher(ABC):
 
         将不同数据源的列名统一为：
         ['date', 'open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg']
+
+        只需重命名列并换算单位；选列、补 code 列、类型转换、排序由 build_daily_frame
+        统一完成，子类无需先 copy（rename / reset_index 本身返回新对象，不会修改原始数据）
         """
         pass
 
@@ -107,8 +273,8 @@ class BaseFetcher(ABC):
         流程：
         1. 计算日期范围
         2. 调用子类获取原始数据
-        3. 标准化列名
-        4. 计算技术指标
+        3. 标准化列名（子类 _normalize_data）
+        4. 清洗与计算技术指标（build_daily_frame，单次融合处理）
 
         Args:
             stock_code: 股票代码
@@ -120,15 +286,7 @@ class BaseFetcher(ABC):
             标准化的 DataFrame，包含技术指标
         """
         # 计算日期范围
-        if end_date is None:
-            end_date = datetime.now().strftime('%Y-%m-%d')
-
-        if start_date is None:
-            # 默认获取最近 30 个交易日（按日历日估算，多取一些）
-            from datetime import timedelta
-
-            start_dt = datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)
-            start_date = start_dt.strftime('%Y-%m-%d')
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
 
         logger.info(f"[{self.name}] 获取 {stock_code} 数据: {start_date} ~ {end_date}")
 
@@ -139,14 +297,8 @@ class BaseFetcher(ABC):
             if raw_df is None or raw_df.empty:
                 raise DataFetchError(f"[{self.name}] 未获取到 {stock_code} 的数据")
 
-            # Step 2: 标准化列名
-            df = self._normalize_data(raw_df, stock_code)
-
-            # Step 3: 数据清洗
-            df = self._clean_data(df)
-
-            # Step 4: 计算技术指标
-            df = self._calculate_indicators(df)
+            # Step 2-4: 标准化列名、数据清洗、计算技术指标
+            df = self._process_raw_data(raw_df, stock_code)
 
             logger.info(f"[{self.name}] {stock_code} 获取成功，共 {len(df)} 条数据")
             return df
@@ -155,62 +307,87 @@ class BaseFetcher(ABC):
             logger.error(f"[{self.name}] 获取 {stock_code} 失败: {str(e)}")
             raise DataFetchError(f"[{self.name}] {stock_code}: {str(e)}") from e
 
-    def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _process_raw_data(self, raw_df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
-        数据清洗
+        原始数据 -> 标准化、清洗并含技术指标的 DataFrame
 
-        处理：
-        1. 确保日期列格式正确
-        2. 数值类型转换
-        3. 去除空值行
-        4. 按日期排序
+        单只获取（get_daily_data）与批量获取（get_daily_data_batch）共用
         """
-        df = df.copy()
+        return build_daily_frame(self._normalize_data(raw_df, stock_code), stock_code)
 
-        # 确保日期列为 datetime 类型
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'])
+    def get_daily_data_batch(
+        self, stock_codes: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None, days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据
 
-        # 数值列类型转换
-        numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        默认实现逐只调用 get_daily_data；底层库支持一次请求多只股票的数据源
+        （yfinance、efinance、Tushare 截面、Baostock 单会话）覆盖此方法
 
-        # 去除关键列为空的行
-        df = df.dropna(subset=['close', 'volume'])
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期（可选）
+            end_date: 结束日期（可选，默认今天）
+            days: 获取天数（当 start_date 未指定时使用）
 
-        # 按日期升序排序
-        df = df.sort_values('date', ascending=True).reset_index(drop=True)
+        Returns:
+            {代码: 标准化且含技术指标的 DataFrame}，获取失败或无数据的代码不在结果中
+        """
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
 
-        return df
+        results: Dict[str, pd.DataFrame] = {}
+        source_error: Optional[Exception] = None
+        for code in stock_codes:
+            try:
+                results[code] = self.get_daily_data(code, start_date=start_date, end_date=end_date)
+            except Exception as e:
+                logger.warning(f"[{self.name}] 批量获取 {code} 失败: {e}")
+                if is_source_error(e):
+                    source_error = e
 
-    def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        # 全部失败且出现过数据源故障：抛出异常，由管理器记入熔断器并切换数据源
+        if not results and source_error is not None:
+            raise DataFetchError(f"[{self.name}] 批量获取全部失败: {source_error}") from source_error
+        return results
+
+    @property
+    def supports_batch(self) -> bool:
+        """是否提供原生批量接口（覆盖了 get_daily_data_batch）"""
+        return type(self).get_daily_data_batch is not BaseFetcher.get_daily_data_batch
+
+    @staticmethod
+    def _resolve_date_range(start_date: Optional[str], end_date: Optional[str], days: int) -> Tuple[str, str]:
         """
-        计算技术指标
+        计算请求的日期范围
 
-        计算指标：
-        - MA5, MA10, MA20: 移动平均线
-        - Volume_Ratio: 量比（今日成交量 / 5日平均成交量）
+        Args:
+            start_date: 开始日期（可选）
+            end_date: 结束日期（可选，默认今天）
+            days: 获取天数（当 start_date 未指定时使用）
+
+        Returns:
+            Tuple[开始日期, 结束日期]，格式 'YYYY-MM-DD'
         """
-        df = df.copy()
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
 
-        # 移动平均线
-        df['ma5'] = df['close'].rolling(window=5, min_periods=1).mean()
-        df['ma10'] = df['close'].rolling(window=10, min_periods=1).mean()
-        df['ma20'] = df['close'].rolling(window=20, min_periods=1).mean()
+        if start_date is None:
+            # 默认获取最近 30 个交易日（按日历日估算，多取一些）
+            from datetime import timedelta
 
-        # 量比：当日成交量 / 5日平均成交量
-        avg_volume_5 = df['volume'].rolling(window=5, min_periods=1).mean()
-        df['volume_ratio'] = df['volume'] / avg_volume_5.shift(1)
-        df['volume_ratio'] = df['volume_ratio'].fillna(1.0)
+            start_dt = datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)
+            start_date = start_dt.strftime('%Y-%m-%d')
 
-        # 保留2位小数
-        for col in ['ma5', 'ma10', 'ma20', 'volume_ratio']:
-            if col in df.columns:
-                df[col] = df[col].round(2)
+        return start_date, end_date
 
-        return df
+    def _enforce_rate_limit(self) -> None:
+        """
+        强制执行速率限制
+
+        从按数据源名称共享的令牌桶中取令牌：令牌充足时立即返回，
+        不足时只休眠到下一个令牌可用（见 rate_limiter.py）
+        """
+        get_rate_limiter(self.name).acquire()
 
     @staticmethod
     def random_sleep(min_seconds: float = 1.0, max_seconds: float = 3.0) -> None:
@@ -225,6 +402,49 @@ class BaseFetcher(ABC):
         time.sleep(sleep_time)
 
 
+def create_http_session(pool_size: Optional[int] = None) -> requests.Session:
+    """
+    创建带连接池的 HTTP Session
+
+    连接池大小按并发线程数设置，线程池中的 worker 可复用 keep-alive 连接，
+    不会因为连接池过小而频繁丢弃连接（urllib3 默认 pool_maxsize=10 且会打印告警）
+
+    Args:
+        pool_size: 每个主机的最大连接数（默认取 MAX_WORKERS 配置，至少 4）
+
+    Returns:
+        requests.Session 实例
+    """
+    if pool_size is None:
+        try:
+            from config import get_config
+
+            pool_size = get_config().max_workers
+        except Exception:
+            pool_size = 3
+        pool_size = max(pool_size * 2, 4)  # 留出余量：批量行情与日线请求可能同时进行
+
+    # 重试交给 tenacity，这里不让 urllib3 再重试
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# 数据源注册表：名称 -> (模块, 类名)，按需导入
+_FETCHER_REGISTRY: Dict[str, Tuple[str, str]] = {
+    'sina': ('.sina_fetcher', 'SinaFetcher'),
+    'tencent': ('.tencent_fetcher', 'TencentFetcher'),
+    'tonghuashun': ('.tonghuashun_fetcher', 'TonghuashunFetcher'),
+    'akshare': ('.akshare_fetcher', 'AkshareFetcher'),
+    'tushare': ('.tushare_fetcher', 'TushareFetcher'),
+    'baostock': ('.baostock_fetcher', 'BaostockFetcher'),
+    'efinance': ('.efinance_fetcher', 'EfinanceFetcher'),
+    'yfinance': ('.yfinance_fetcher', 'YfinanceFetcher'),
+}
+
+
 class DataFetcherManager:
     """
     数据源策略管理器
@@ -240,15 +460,87 @@ class DataFetcherManager:
     - 所有数据源都失败时抛出异常
     """
 
-    def __init__(self, fetchers: Optional[List[BaseFetcher]] = None):
+    # 进程内共享的数据源单例（见 get()）
+    _instances: Dict[str, BaseFetcher] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str) -> BaseFetcher:
+        """
+        获取数据源单例
+
+        同一进程内每个数据源只创建一次，复用其 HTTP Session（keep-alive 连接）
+        和登录状态，选股器、分析流水线和默认数据源列表共用同一批实例
+
+        Args:
+            name: 数据源名称，如 'sina'、'SinaFetcher'（不区分大小写）
+
+        Returns:
+            数据源实例
+
+        Raises:
+            ValueError: 未知的数据源名称
+        """
+        key = normalize_source_name(name)
+
+        fetcher = cls._instances.get(key)
+        if fetcher is not None:
+            return fetcher
+
+        if key not in _FETCHER_REGISTRY:
+            raise ValueError(f"未知的数据源: {name}（可选: {', '.join(_FETCHER_REGISTRY)}）")
+
+        with cls._instances_lock:
+            fetcher = cls._instances.get(key)
+            if fetcher is None:
+                module_name, class_name = _FETCHER_REGISTRY[key]
+                module = importlib.import_module(module_name, package=__package__)
+                fetcher = getattr(module, class_name)()
+                cls._instances[key] = fetcher
+                logger.debug(f"创建数据源单例: {class_name}")
+            return fetcher
+
+    @classmethod
+    def available_sources(cls) -> List[str]:
+        """已注册的数据源名称列表"""
+        return list(_FETCHER_REGISTRY)
+
+    # 对冲请求使用的共享线程池（落败的请求在后台自然结束，结果被忽略）
+    _hedge_executor: Optional[ThreadPoolExecutor] = None
+
+    def __init__(
+        self,
+        fetchers: Optional[List[BaseFetcher]] = None,
+        hedge_enabled: Optional[bool] = None,
+        hedge_delay: Optional[float] = None,
+    ):
         """
         初始化管理器
 
         Args:
             fetchers: 数据源列表（可选，默认按优先级自动创建）
+            hedge_enabled: 是否启用对冲请求（可选，默认读取 HEDGE_ENABLED 配置）
+            hedge_delay: 无耗时样本时的对冲等待预算（秒，可选，默认读取 HEDGE_DELAY 配置）
         """
         self._fetchers: List[BaseFetcher] = []
 
+        if hedge_enabled is None or hedge_delay is None:
+            try:
+                from config import get_config
+
+                config = get_config()
+                hedge_enabled = config.hedge_enabled if hedge_enabled is None else hedge_enabled
+                hedge_delay = config.hedge_delay if hedge_delay is None else hedge_delay
+            except Exception:
+                hedge_enabled = bool(hedge_enabled)
+                hedge_delay = 3.0 if hedge_delay is None else hedge_delay
+        self.hedge_enabled = hedge_enabled
+        self.hedge_delay = hedge_delay
+
+        # 对冲统计：数据源 -> {'hedged': 超预算触发对冲次数, 'won': 作为对冲请求胜出次数}
+        self._hedge_stats: Dict[str, Dict[str, int]] = {}
+        self._hedge_lock = threading.Lock()
+
         if fetchers:
             # 按优先级排序
             self._fetchers = sorted(fetchers, key=lambda f: f.priority)
@@ -261,7 +553,7 @@ class DataFetcherManager:
         初始化默认数据源列表
 
         按优先级排序：
-        0.1. SinaFetcher (Priority 0.1) - 极速数据源，新浪财经API
+        0.1. SinaFetcher (Priority 0.1) - 极速数据源，新浪财经API（日线不复权，不参与日线故障切换）
         0. TencentFetcher (Priority 0) - 最高优先级，专门用于快速模式
         0.5. TonghuashunFetcher (Priority 0.5) - 同花顺数据源，与腾讯并列
         1. AkshareFetcher (Priority 1) - 默认数据源
@@ -269,26 +561,10 @@ class DataFetcherManager:
         3. BaostockFetcher (Priority 3)
         4. YfinanceFetcher (Priority 4)
         5. EfinanceFetcher (Priority 5) - 仅在明确指定时使用
+
+        实例来自进程内单例注册表（见 get()），多个管理器共享同一批数据源
         """
-        from .sina_fetcher import SinaFetcher
-        from .tencent_fetcher import TencentFetcher
-        from .tonghuashun_fetcher import TonghuashunFetcher
-        from .efinance_fetcher import EfinanceFetcher
-        from .akshare_fetcher import AkshareFetcher
-        from .tushare_fetcher import TushareFetcher
-        from .baostock_fetcher import BaostockFetcher
-        from .yfinance_fetcher import YfinanceFetcher
-
-        self._fetchers = [
-            SinaFetcher(),  # 极速数据源，新浪财经API
-            TencentFetcher(),  # 最高优先级，专门用于快速模式
-            TonghuashunFetcher(),  # 同花顺数据源，与腾讯并列
-            TushareFetcher(),
-            BaostockFetcher(),
-            EfinanceFetcher(),  # 较低优先级，仅在明确指定时使用
-            YfinanceFetcher(),
-            AkshareFetcher(),  # 最低优先级，避免网络问题
-        ]
+        self._fetchers = [self.get(name) for name in _FETCHER_REGISTRY]
 
         # 按优先级排序
         self._fetchers.sort(key=lambda f: f.priority)
@@ -300,6 +576,46 @@ class DataFetcherManager:
         self._fetchers.append(fetcher)
         self._fetchers.sort(key=lambda f: f.priority)
 
+    def _ordered_fetchers(self) -> List[BaseFetcher]:
+        """
+        按实际健康状况排列数据源
+
+        排序规则：
+        1. 表现已知且健康的数据源，按期望耗时（平均耗时 / 成功率）升序
+        2. 表现未知（调用次数不足）的数据源，按优先级
+        3. 错误率偏高的数据源，按期望耗时升序
+        4. 熔断中 / 半开的数据源，按优先级（熔断中会被直接跳过）
+        """
+        healthy, unknown, degraded, tripped = [], [], [], []
+        for fetcher in self._fetchers:
+            breaker = get_circuit_breaker(fetcher.name)
+            cost = breaker.expected_cost()
+            if breaker.state != CircuitState.CLOSED:
+                tripped.append(fetcher)
+            elif cost is None:
+                unknown.append(fetcher)
+            elif breaker.is_healthy():
+                healthy.append((cost, fetcher))
+            else:
+                degraded.append((cost, fetcher))
+
+        healthy.sort(key=lambda item: item[0])
+        degraded.sort(key=lambda item: item[0])
+        return [f for _, f in healthy] + unknown + [f for _, f in degraded] + tripped
+
+    def _daily_fetchers(self) -> List[BaseFetcher]:
+        """
+        参与日线故障切换的数据源（顺序同 _ordered_fetchers）
+
+        日线会写入数据库并用于计算指标，不复权的数据源（adjusted_daily=False）
+        与前复权历史混用会在除权日产生价格跳变，因此排除在外
+        """
+        return [f for f in self._ordered_fetchers() if f.adjusted_daily]
+
+    def get_health_report(self) -> List[dict]:
+        """各数据源熔断器状态（按当前尝试顺序）"""
+        return [get_circuit_breaker(f.name).snapshot() for f in self._ordered_fetchers()]
+
     def get_daily_data(
         self, stock_code: str, start_date: Optional[str] = None, end_date: Optional[str] = None, days: int = 30
     ) -> Tuple[pd.DataFrame, str]:
@@ -307,9 +623,10 @@ class DataFetcherManager:
         获取日线数据（自动切换数据源）
 
         故障切换策略：
-        1. 从最高优先级数据源开始尝试
-        2. 捕获异常后自动切换到下一个
-        3. 记录每个数据源的失败原因
+        1. 按健康状况排列数据源，不复权的数据源不参与（见 _daily_fetchers）
+        2. 熔断中的数据源直接跳过，不再等待超时
+        3. 捕获异常或返回空数据后自动切换到下一个；只有数据源故障（见 is_source_error）
+           记为熔断器的一次失败，单只股票无数据 / 不支持不影响该数据源的健康状态
         4. 所有数据源失败后抛出详细异常
 
         Args:
@@ -324,17 +641,20 @@ class DataFetcherManager:
         Raises:
             DataFetchError: 所有数据源都失败时抛出
         """
+        if self.hedge_enabled:
+            return self._get_daily_data_hedged(stock_code, start_date, end_date, days)
+
         errors = []
 
-        for fetcher in self._fetchers:
+        for fetcher in self._daily_fetchers():
+            breaker = get_circuit_breaker(fetcher.name)
+            if not breaker.allow_request():
+                errors.append(f"[{fetcher.name}] 熔断中，跳过")
+                continue
+
             try:
                 logger.info(f"尝试使用 [{fetcher.name}] 获取 {stock_code}...")
-                df = fetcher.get_daily_data(stock_code=stock_code, start_date=start_date, end_date=end_date, days=days)
-
-                if df is not None and not df.empty:
-                    logger.info(f"[{fetcher.name}] 成功获取 {stock_code}")
-                    return df, fetcher.name
-
+                df = self._timed_fetch(fetcher, stock_code, start_date, end_date, days)
             except Exception as e:
                 error_msg = f"[{fetcher.name}] 失败: {str(e)}"
                 logger.warning(error_msg)
@@ -342,6 +662,207 @@ class DataFetcherManager:
                 # 继续尝试下一个数据源
                 continue
 
+            if df is None or df.empty:
+                errors.append(f"[{fetcher.name}] 返回空数据")
+                continue
+
+            logger.info(f"[{fetcher.name}] 成功获取 {stock_code}")
+            return df, fetcher.name
+
+        # 所有数据源都失败
+        error_summary = f"所有数据源获取 {stock_code} 失败:\n" + "\n".join(errors)
+        logger.error(error_summary)
+        raise DataFetchError(error_summary)
+
+    def get_daily_data_batch(
+        self, stock_codes: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None, days: int = 30
+    ) -> Dict[str, Tuple[pd.DataFrame, str]]:
+        """
+        批量获取多只股票的日线数据（自动切换数据源）
+
+        按 _daily_fetchers 顺序，每个数据源用其批量接口处理剩余的股票，
+        未获取到的股票交给下一个数据源；原生批量接口只需少量请求即可覆盖整个股票池
+
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            days: 获取天数
+
+        Returns:
+            {代码: (数据, 数据源名称)}，所有数据源都失败的股票不在结果中
+        """
+        results: Dict[str, Tuple[pd.DataFrame, str]] = {}
+        remaining = list(dict.fromkeys(stock_codes))
+
+        for fetcher in self._daily_fetchers():
+            if not remaining:
+                break
+
+            breaker = get_circuit_breaker(fetcher.name)
+            if not breaker.allow_request():
+                logger.info(f"[{fetcher.name}] 熔断中，跳过批量获取")
+                continue
+
+            start = time.monotonic()
+            try:
+                logger.info(f"尝试使用 [{fetcher.name}] 批量获取 {len(remaining)} 只股票...")
+                frames = fetcher.get_daily_data_batch(remaining, start_date=start_date, end_date=end_date, days=days)
+            except Exception as e:
+                self._record_outcome(breaker, time.monotonic() - start, error=e)
+                logger.warning(f"[{fetcher.name}] 批量获取失败: {e}")
+                continue
+
+            # 熔断器的耗时窗口按单只股票计，避免批量耗时抬高对冲预算；
+            # 未获取到任何股票（停牌、非交易日等）不计入熔断器
+            per_code_latency = (time.monotonic() - start) / max(1, len(remaining))
+            if frames:
+                breaker.record_success(per_code_latency)
+            else:
+                breaker.release()
+
+            for code, df in frames.items():
+                if df is not None and not df.empty:
+                    results[code] = (df, fetcher.name)
+            remaining = [code for code in remaining if code not in results]
+
+        if remaining:
+            logger.warning(f"批量获取完成，{len(remaining)} 只股票所有数据源均失败: {remaining[:10]}")
+        return results
+
+    @classmethod
+    def _get_hedge_executor(cls) -> ThreadPoolExecutor:
+        if cls._hedge_executor is None:
+            with cls._instances_lock:
+                if cls._hedge_executor is None:
+                    cls._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+        return cls._hedge_executor
+
+    def _hedge_budget(self, fetcher: BaseFetcher) -> float:
+        """对冲等待预算：该数据源最近成功调用的 p95 耗时，无样本时使用 hedge_delay"""
+        p95 = get_circuit_breaker(fetcher.name).latency_percentile(0.95)
+        return p95 if p95 is not None else self.hedge_delay
+
+    def _record_hedge(self, source: str, key: str) -> None:
+        with self._hedge_lock:
+            stats = self._hedge_stats.setdefault(source, {'hedged': 0, 'won': 0})
+            stats[key] += 1
+
+    def get_hedge_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        对冲统计（用于调整 HEDGE_DELAY）
+
+        Returns:
+            数据源 -> {'hedged': 因超出预算触发对冲的次数, 'won': 作为对冲请求胜出的次数}
+        """
+        with self._hedge_lock:
+            return {name: dict(stats) for name, stats in self._hedge_stats.items()}
+
+    @staticmethod
+    def _record_outcome(breaker, latency: float, error: Optional[BaseException] = None, found: bool = True) -> None:
+        """
+        把一次调用的结果记录到熔断器
+
+        数据源故障记为失败；单只股票无数据 / 不支持只归还名额，不影响健康状态
+        """
+        if error is not None and is_source_error(error):
+            breaker.record_failure(latency)
+        elif error is None and found:
+            breaker.record_success(latency)
+        else:
+            breaker.release()
+
+    def _timed_fetch(
+        self, fetcher: BaseFetcher, stock_code: str, start_date: Optional[str], end_date: Optional[str], days: int
+    ) -> pd.DataFrame:
+        """调用数据源并把结果记录到熔断器（逐只获取与对冲线程池共用）"""
+        breaker = get_circuit_breaker(fetcher.name)
+        start = time.monotonic()
+        try:
+            df = fetcher.get_daily_data(stock_code=stock_code, start_date=start_date, end_date=end_date, days=days)
+        except Exception as e:
+            self._record_outcome(breaker, time.monotonic() - start, error=e)
+            raise
+        self._record_outcome(breaker, time.monotonic() - start, found=df is not None and not df.empty)
+        return df
+
+    def _get_daily_data_hedged(
+        self, stock_code: str, start_date: Optional[str], end_date: Optional[str], days: int
+    ) -> Tuple[pd.DataFrame, str]:
+        """
+        对冲模式获取日线数据
+
+        流程：
+        1. 请求当前最健康的数据源
+        2. 超过其耗时预算仍未返回：并行请求下一个健康数据源（记一次对冲）
+        3. 请求失败或返回空数据：立即请求下一个数据源
+        4. 第一个返回有效数据的请求胜出，其余请求的结果被忽略
+        """
+        candidates = iter(self._daily_fetchers())
+        pending: Dict[Future, BaseFetcher] = {}
+        launched_at: Dict[Future, float] = {}
+        hedge_futures: set = set()
+        errors = []
+        executor = self._get_hedge_executor()
+
+        def launch_next(is_hedge: bool) -> bool:
+            for fetcher in candidates:
+                if not get_circuit_breaker(fetcher.name).allow_request():
+                    errors.append(f"[{fetcher.name}] 熔断中，跳过")
+                    continue
+                logger.info(f"尝试使用 [{fetcher.name}] 获取 {stock_code}{'（对冲）' if is_hedge else ''}...")
+                future = executor.submit(self._timed_fetch, fetcher, stock_code, start_date, end_date, days)
+                pending[future] = fetcher
+                launched_at[future] = time.monotonic()
+                if is_hedge:
+                    hedge_futures.add(future)
+                return True
+            return False
+
+        launch_next(is_hedge=False)
+        exhausted = False
+        while pending:
+            # 以最近发出、仍未返回的请求计算预算截止时间
+            newest = next(reversed(pending))
+            slow = pending[newest]
+            budget = self._hedge_budget(slow)
+            timeout = None if exhausted else max(0.0, launched_at[newest] + budget - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # 超出预算：并行请求下一个数据源；没有可用数据源时继续等待
+                if launch_next(is_hedge=True):
+                    self._record_hedge(slow.name, 'hedged')
+                    logger.info(f"[{slow.name}] 超过 {budget:.2f}s 未返回 {stock_code}，发起对冲请求")
+                else:
+                    exhausted = True
+                continue
+
+            for future in done:
+                fetcher = pending.pop(future)
+                try:
+                    df = future.result()
+                except Exception as e:
+                    error_msg = f"[{fetcher.name}] 失败: {str(e)}"
+                    logger.warning(error_msg)
+                    errors.append(error_msg)
+                    # 失败的请求不占用并发名额：立即请求下一个数据源
+                    launch_next(is_hedge=False)
+                    continue
+
+                if df is not None and not df.empty:
+                    if future in hedge_futures:
+                        self._record_hedge(fetcher.name, 'won')
+                    for other, other_fetcher in pending.items():
+                        # 仍在排队的请求被取消后不会执行，需归还其熔断器名额
+                        if other.cancel():
+                            get_circuit_breaker(other_fetcher.name).release()
+                    logger.info(f"[{fetcher.name}] 成功获取 {stock_code}")
+                    return df, fetcher.name
+
+                errors.append(f"[{fetcher.name}] 返回空数据")
+                launch_next(is_hedge=False)
+
         # 所有数据源都失败
         error_summary = f"所有数据源获取 {stock_code} 失败:\n" + "\n".join(errors)
         logger.error(error_summary)
@@ -351,3 +872,57 @@ class DataFetcherManager:
     def available_fetchers(self) -> List[str]:
         """返回可用数据源名称列表"""
         return [f.name for f in self._fetchers]
+
+
+if __name__ == "__main__":
+    import timeit
+    import tracemalloc
+
+    def legacy_pipeline(raw: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+        """融合前的处理链：子类 normalize（copy）-> _clean_data（copy）-> 指标（copy + 逐列 round）"""
+        df = raw.copy()
+        df['code'] = stock_code
+        df = df[[col for col in ['code'] + STANDARD_COLUMNS if col in df.columns]]
+
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date'])
+        for col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = df.dropna(subset=['close', 'volume'])
+        df = df.sort_values('date', ascending=True).reset_index(drop=True)
+
+        df = df.copy()
+        for window in (5, 10, 20):
+            df[f'ma{window}'] = df['close'].rolling(window=window, min_periods=1).mean()
+        avg_volume_5 = df['volume'].rolling(window=5, min_periods=1).mean()
+        df['volume_ratio'] = (df['volume'] / avg_volume_5.shift(1)).fillna(1.0)
+        for col in INDICATOR_COLUMNS:
+            df[col] = df[col].round(2)
+        return df
+
+    rng = np.random.default_rng(0)
+    for bars in (250, 5000):
+        close = np.round(10 + np.cumsum(rng.normal(0, 0.2, bars)), 2)
+        volume = rng.integers(10_000, 1_000_000, bars).astype(np.float64)
+        raw = pd.DataFrame(
+            {
+                'date': pd.bdate_range('2006-01-02', periods=bars),
+                'open': close,
+                'high': close + 0.1,
+                'low': close - 0.1,
+                'close': close,
+                'volume': volume,
+                'amount': volume * close,
+                'pct_chg': rng.normal(0, 1, bars).round(2),
+            }
+        )
+        pd.testing.assert_frame_equal(legacy_pipeline(raw, '600519'), build_daily_frame(raw, '600519'))
+
+        print(f"--- {bars} 根K线 ---")
+        for label, fn in (("原处理链", legacy_pipeline), ("融合处理", build_daily_frame)):
+            seconds = min(timeit.repeat(lambda: fn(raw, '600519'), number=50, repeat=5)) / 50
+            tracemalloc.start()
+            fn(raw, '600519')
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{label}: {seconds * 1000:.3f} ms, 峰值内存 {peak / 1024:.0f} KiB")
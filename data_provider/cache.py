@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+数据源缓存组件
+===================================
+
+职责：
+1. 按 key 独立记录过期时间（TTL），写入一个 key 不会延长其他 key 的有效期
+2. 限制最大条目数，超出时按 LRU（最近最少使用）淘汰
+3. 统计命中/未命中次数，便于评估缓存效果
+4. 线程安全，可在多个数据源实例、线程池之间共享
+
+使用方式：
+    _quote_cache = TTLCache(ttl=30, max_entries=6000, name='sina_quote')
+
+    quote = _quote_cache.get(code)
+    if quote is None:
+        quote = fetch(code)
+        _quote_cache.set(code, quote)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    线程安全的 TTL + LRU 缓存
+
+    - 每个 key 单独记录过期时间，过期条目在访问时惰性清除
+    - 条目数超过 max_entries 时淘汰最久未访问的条目
+    - 使用 time.monotonic()，不受系统时间调整影响
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024, name: str = "cache"):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 默认有效期（秒）
+            max_entries: 最大条目数
+            name: 缓存名称（用于日志和统计）
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须大于 0")
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            default: 未命中或已过期时的返回值
+
+        Returns:
+            缓存值，未命中返回 default
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 本条目的有效期（秒，可选，默认使用实例 ttl）
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """删除指定缓存条目"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存（统计计数保留）"""
+        with self._lock:
+            self._data.clear()
+
+    def purge_expired(self) -> int:
+        """
+        主动清除所有已过期条目
+
+        Returns:
+            清除的条目数
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """是否存在未过期的条目（不计入命中统计）"""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含 size/hits/misses/hit_rate/evictions/expirations 的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def __repr__(self) -> str:
+        return f"<TTLCache(name={self.name}, size={len(self)}, ttl={self.ttl}, max_entries={self.max_entries})>"
+
+
+if __name__ == "__main__":
+    cache = TTLCache(ttl=0.5, max_entries=2, name='demo')
+    cache.set('600519', 'a')
+    cache.set('000001', 'b')
+    cache.set('300750', 'c')  # 淘汰 600519
+    print(cache.get('600519'), cache.get('000001'))
+    time.sleep(0.6)
+    print(cache.get('000001'))  # 已过期
+    print(cache.stats())
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+数据源熔断器
+===================================
+
+职责：
+1. 为每个数据源维护熔断状态：关闭（正常）/ 打开（熔断）/ 半开（试探）
+2. 滚动窗口统计最近 N 次调用的成功率和耗时
+3. 提供健康评估，供 DataFetcherManager 按实际表现调整数据源顺序
+
+状态流转：
+    CLOSED --(窗口内错误率 >= 阈值)--> OPEN
+    OPEN --(冷却时间到)--> HALF_OPEN（只放行少量试探请求）
+    HALF_OPEN --(试探成功)--> CLOSED
+    HALF_OPEN --(试探失败)--> OPEN（重新计时）
+
+效果：某个数据源宕机时，每轮只付出几次失败试探的代价，
+而不是每只股票都等待一次超时 + 重试
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """熔断器状态"""
+
+    CLOSED = "closed"  # 正常放行
+    OPEN = "open"  # 熔断，拒绝请求
+    HALF_OPEN = "half_open"  # 试探，放行少量请求
+
+
+class CircuitBreaker:
+    """
+    单个数据源的熔断器（线程安全）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        min_calls: int = 4,
+        failure_threshold: float = 0.5,
+        open_seconds: float = 60.0,
+        half_open_max_calls: int = 1,
+    ):
+        """
+        Args:
+            name: 数据源名称
+            window_size: 滚动窗口大小（最近 N 次调用）
+            min_calls: 窗口内至少有多少次调用才判断错误率
+            failure_threshold: 触发熔断的错误率（0-1）
+            open_seconds: 熔断后的冷却时间（秒），之后进入半开状态
+            half_open_max_calls: 半开状态下同时放行的试探请求数
+        """
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        # 滚动窗口：(是否成功, 耗时秒)
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+
+        self.rejected = 0  # 熔断期间被拒绝的请求数
+
+    # === 状态 ===
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state == CircuitState.OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info(f"[熔断器] {self.name} 冷却结束，进入半开状态（试探请求）")
+
+    def _open(self, now: float) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = now
+        self._half_open_in_flight = 0
+
+    def allow_request(self) -> bool:
+        """
+        是否放行本次请求
+
+        半开状态下放行的请求必须随后调用 record_success / record_failure，
+        未执行的请求调用 release
+        """
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+
+            self.rejected += 1
+            return False
+
+    def release(self) -> None:
+        """
+        归还 allow_request 占用的半开试探名额，不记录调用结果
+
+        用于放行后未真正执行（如对冲请求在排队时被取消）或结果与数据源健康无关
+        （如单只股票无数据）的请求，否则半开状态的名额会一直被占用，数据源将被永久拒绝
+        """
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def record_success(self, latency: float) -> None:
+        """记录一次成功调用"""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._state = CircuitState.CLOSED
+                self._window.clear()
+                logger.info(f"[熔断器] {self.name} 试探成功，恢复正常")
+            self._window.append((True, latency))
+
+    def record_failure(self, latency: float) -> None:
+        """记录一次失败调用"""
+        now = time.monotonic()
+        with self._lock:
+            self._window.append((False, latency))
+
+            if self._state == CircuitState.HALF_OPEN:
+                self._open(now)
+                logger.warning(f"[熔断器] {self.name} 试探失败，继续熔断 {self.open_seconds:.0f} 秒")
+                return
+
+            if self._state == CircuitState.CLOSED and len(self._window) >= self.min_calls:
+                failures = sum(1 for ok, _ in self._window if not ok)
+                error_rate = failures / len(self._window)
+                if error_rate >= self.failure_threshold:
+                    self._open(now)
+                    logger.warning(
+                        f"[熔断器] {self.name} 错误率 {error_rate:.0%} "
+                        f"({failures}/{len(self._window)})，熔断 {self.open_seconds:.0f} 秒"
+                    )
+
+    # === 统计 ===
+
+    @property
+    def calls(self) -> int:
+        with self._lock:
+            return len(self._window)
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        """窗口内成功率（无调用记录时为 None）"""
+        with self._lock:
+            if not self._window:
+                return None
+            return sum(1 for ok, _ in self._window if ok) / len(self._window)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """
+        窗口内成功调用耗时的分位数
+
+        Args:
+            q: 分位（0-1），如 0.95
+
+        Returns:
+            耗时秒数（无成功记录时为 None）
+        """
+        with self._lock:
+            latencies = sorted(latency for ok, latency in self._window if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(q * len(latencies)))
+        return latencies[index]
+
+    @property
+    def avg_latency(self) -> Optional[float]:
+        """窗口内全部调用的平均耗时（含失败调用，失败往往耗尽超时）"""
+        with self._lock:
+            if not self._window:
+                return None
+            return sum(latency for _, latency in self._window) / len(self._window)
+
+    def expected_cost(self) -> Optional[float]:
+        """
+        期望耗时 = 平均耗时 / 成功率
+
+        即平均需要花多少秒才能从该数据源拿到一次成功结果，越小越好；
+        调用次数不足 min_calls 时返回 None（表现未知）
+        """
+        with self._lock:
+            if len(self._window) < self.min_calls:
+                return None
+            successes = sum(1 for ok, _ in self._window if ok)
+            avg_latency = sum(latency for _, latency in self._window) / len(self._window)
+        success_rate = successes / len(self._window)
+        return max(avg_latency, 1e-3) / max(success_rate, 0.05)
+
+    def is_healthy(self) -> bool:
+        """关闭状态且窗口错误率低于阈值"""
+        rate = self.success_rate
+        return self.state == CircuitState.CLOSED and (rate is None or 1 - rate < self.failure_threshold)
+
+    def snapshot(self) -> Dict[str, object]:
+        """健康状态快照（用于日志）"""
+        rate = self.success_rate
+        latency = self.avg_latency
+        return {
+            'name': self.name,
+            'state': self.state.value,
+            'calls': self.calls,
+            'success_rate': round(rate, 3) if rate is not None else None,
+            'avg_latency': round(latency, 3) if latency is not None else None,
+            'rejected': self.rejected,
+        }
+
+    def __repr__(self) -> str:
+        return f"<CircuitBreaker(name={self.name}, state={self.state.value})>"
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(source: str) -> CircuitBreaker:
+    """
+    获取数据源对应的熔断器（进程内单例，按数据源名称共享）
+
+    Args:
+        source: 数据源名称（如 'AkshareFetcher'）
+
+    Returns:
+        CircuitBreaker 实例
+    """
+    breaker = _breakers.get(source)
+    if breaker is not None:
+        return breaker
+
+    with _breakers_lock:
+        breaker = _breakers.get(source)
+        if breaker is None:
+            breaker = CircuitBreaker(source)
+            _breakers[source] = breaker
+        return breaker
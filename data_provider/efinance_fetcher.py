@@ -14,9 +14,10 @@ EfinanceFetcher - 快速数据源 (Priority 5)
 3. 更稳定的接口封装
 
 防封禁策略：
-1. 每次请求前随机休眠 1.5-3.0 秒
+1. 按数据源共享的令牌桶限速（默认 0.45 次/秒，突发 1）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
+4. 批量获取：ef.stock.get_quote_history 一次请求多个代码
 """
 
 import logging
@@ -35,7 +36,9 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, RateLimitError
+from .cache import TTLCache
+from .singleflight import SingleFlight
 
 
 @dataclass
@@ -94,8 +97,11 @@ USER_AGENTS = [
 ]
 
 
-# 缓存实时行情数据（避免重复请求）
-_realtime_cache: Dict[str, Any] = {'data': None, 'timestamp': 0, 'ttl': 60}  # 60秒缓存有效期
+# 全市场行情表缓存（避免重复请求）：60秒有效期
+_spot_cache = TTLCache(ttl=60, max_entries=4, name='efinance_spot')
+
+# 请求合并：缓存失效时并发调用只下载一次行情表/板块数据
+_flight = SingleFlight(name='efinance')
 
 
 def _is_etf_code(stock_code: str) -> bool:
@@ -130,7 +136,7 @@ class EfinanceFetcher(BaseFetcher):
     - ef.stock.get_realtime_quotes(): 获取实时行情
 
     关键策略：
-    - 每次请求前随机休眠 1.5-3.0 秒
+    - 令牌桶限速（进程内按数据源共享，默认 0.45 次/秒，突发 1）
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -138,17 +144,8 @@ class EfinanceFetcher(BaseFetcher):
     name = "EfinanceFetcher"
     priority = 5  # 较低优先级，仅在明确指定时使用
 
-    def __init__(self, sleep_min: float = 1.5, sleep_max: float = 3.0):
-        """
-        初始化 EfinanceFetcher
-
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
-        """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
+    # 批量获取时每次请求的股票数
+    BATCH_SIZE = 50
 
     def _set_random_user_agent(self) -> None:
         """
@@ -163,27 +160,6 @@ class EfinanceFetcher(BaseFetcher):
         except Exception as e:
             logger.debug(f"设置 User-Agent 失败: {e}")
 
-    def _enforce_rate_limit(self) -> None:
-        """
-        强制执行速率限制
-
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
-        """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
-
     @retry(
         stop=stop_after_attempt(3),  # 最多重试3次
         wait=wait_exponential(multiplier=1, min=2, max=30),  # 指数退避：2, 4, 8... 最大30秒
@@ -201,7 +177,7 @@ class EfinanceFetcher(BaseFetcher):
         流程：
         1. 判断代码类型（股票/ETF）
         2. 设置随机 User-Agent
-        3. 执行速率限制（随机休眠）
+        3. 执行速率限制（令牌桶）
         4. 调用对应的 efinance API
         5. 处理返回数据
         """
@@ -229,7 +205,7 @@ class EfinanceFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         # 格式化日期（efinance 使用 YYYYMMDD 格式）
@@ -279,6 +255,91 @@ class EfinanceFetcher(BaseFetcher):
 
             raise DataFetchError(f"efinance 获取数据失败: {e}") from e
 
+    def get_daily_data_batch(
+        self, stock_codes: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None, days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据
+
+        普通股票按 BATCH_SIZE 分组，每组一次 ef.stock.get_quote_history(stock_codes=[...])
+        （返回 {代码: DataFrame}），每组只消耗一个令牌；ETF 逐只获取
+
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期（可选）
+            end_date: 结束日期（可选，默认今天）
+            days: 获取天数（当 start_date 未指定时使用）
+
+        Returns:
+            {代码: 标准化且含技术指标的 DataFrame}，获取失败或无数据的代码不在结果中
+
+        Raises:
+            DataFetchError: 所有分组请求和 ETF 请求都失败时抛出（由管理器切换到下一个数据源）
+        """
+        import efinance as ef
+
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
+        beg_date = start_date.replace('-', '')
+        end_date_fmt = end_date.replace('-', '')
+
+        stock_list = [code for code in stock_codes if not _is_etf_code(code)]
+        etf_list = [code for code in stock_codes if _is_etf_code(code)]
+
+        results: Dict[str, pd.DataFrame] = {}
+        requests_made = 0
+        failed = 0
+        last_error: Optional[Exception] = None
+        for i in range(0, len(stock_list), self.BATCH_SIZE):
+            chunk = stock_list[i : i + self.BATCH_SIZE]
+
+            # 防封禁策略：每组一次请求
+            self._set_random_user_agent()
+            self._enforce_rate_limit()
+
+            logger.info(
+                f"[API调用] ef.stock.get_quote_history(stock_codes=[{len(chunk)} 只], "
+                f"beg={beg_date}, end={end_date_fmt}, klt=101, fqt=1)"
+            )
+            api_start = time.time()
+            requests_made += 1
+            try:
+                data = ef.stock.get_quote_history(stock_codes=chunk, beg=beg_date, end=end_date_fmt, klt=101, fqt=1)
+            except Exception as e:
+                logger.warning(f"[{self.name}] 批量获取 {len(chunk)} 只股票失败: {e}")
+                failed += 1
+                last_error = e
+                continue
+            api_elapsed = time.time() - api_start
+            logger.info(f"[API返回] ef.stock.get_quote_history 批量返回 {len(data or {})} 只, 耗时 {api_elapsed:.2f}s")
+
+            # 只请求一只时 efinance 直接返回 DataFrame
+            if isinstance(data, pd.DataFrame):
+                data = {chunk[0]: data}
+
+            for code, raw_df in (data or {}).items():
+                if raw_df is None or raw_df.empty:
+                    continue
+                try:
+                    results[code] = self._process_raw_data(raw_df, code)
+                except Exception as e:
+                    logger.warning(f"[{self.name}] 处理 {code} 批量数据失败: {e}")
+
+        if etf_list:
+            # ETF 逐只获取；全部失败时基类抛出异常，保留上面已获取的股票
+            requests_made += 1
+            try:
+                results.update(super().get_daily_data_batch(etf_list, start_date=start_date, end_date=end_date))
+            except Exception as e:
+                logger.warning(f"[{self.name}] 批量获取 {len(etf_list)} 只 ETF 失败: {e}")
+                failed += 1
+                last_error = e
+
+        if requests_made and failed == requests_made:
+            raise DataFetchError(f"efinance 批量获取全部失败: {last_error}") from last_error
+
+        logger.info(f"[{self.name}] 批量获取完成: {len(results)}/{len(stock_codes)} 只")
+        return results
+
     def _fetch_etf_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
         """
         获取 ETF 基金历史数据
@@ -298,7 +359,7 @@ class EfinanceFetcher(BaseFetcher):
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         # 格式化日期
@@ -354,8 +415,6 @@ class EfinanceFetcher(BaseFetcher):
         需要映射到标准列名：
         date, open, high, low, close, volume, amount, pct_chg
         """
-        df = df.copy()
-
         # 列名映射（efinance 中文列名 -> 标准英文列名）
         column_mapping = {
             '日期': 'date',
@@ -376,15 +435,32 @@ class EfinanceFetcher(BaseFetcher):
         # 重命名列
         df = df.rename(columns=column_mapping)
 
-        # 如果没有 code 列，手动添加
-        if 'code' not in df.columns:
-            df['code'] = stock_code
+        return df
 
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
+    def _download_realtime_quotes(self) -> pd.DataFrame:
+        """下载全市场实时行情表并写入缓存"""
+        import efinance as ef
+
+        # 缓存检查之后、加入合并之前，其他线程可能刚完成下载
+        df = _spot_cache.get('realtime_quotes')
+        if df is not None:
+            return df
+
+        # 防封禁策略
+        self._set_random_user_agent()
+        self._enforce_rate_limit()
 
+        logger.info(f"[API调用] ef.stock.get_realtime_quotes() 获取实时行情...")
+        api_start = time.time()
+
+        # efinance 的实时行情 API
+        df = ef.stock.get_realtime_quotes()
+
+        api_elapsed = time.time() - api_start
+        logger.info(f"[API返回] ef.stock.get_realtime_quotes 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
+
+        # 更新缓存
+        _spot_cache.set('realtime_quotes', df)
         return df
 
     def get_realtime_quote(self, stock_code: str) -> Optional[EfinanceRealtimeQuote]:
@@ -399,38 +475,13 @@ class EfinanceFetcher(BaseFetcher):
         Returns:
             EfinanceRealtimeQuote 对象，获取失败返回 None
         """
-        import efinance as ef
-
         try:
-            # 检查缓存
-            current_time = time.time()
-            if (
-                _realtime_cache['data'] is not None
-                and current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']
-            ):
-                df = _realtime_cache['data']
+            # 检查缓存；缓存失效时并发调用合并为一次下载
+            df = _spot_cache.get('realtime_quotes')
+            if df is not None:
                 logger.debug(f"[缓存命中] 使用缓存的实时行情数据")
             else:
-                # 防封禁策略
-                self._set_random_user_agent()
-                self._enforce_rate_limit()
-
-                logger.info(f"[API调用] ef.stock.get_realtime_quotes() 获取实时行情...")
-                import time as _time
-
-                api_start = _time.time()
-
-                # efinance 的实时行情 API
-                df = ef.stock.get_realtime_quotes()
-
-                api_elapsed = _time.time() - api_start
-                logger.info(
-                    f"[API返回] ef.stock.get_realtime_quotes 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s"
-                )
-
-                # 更新缓存
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
+                df = _flight.do('realtime_quotes', self._download_realtime_quotes)
 
             # 查找指定股票
             # efinance 返回的列名可能是 '股票代码' 或 'code'
@@ -568,7 +619,7 @@ class EfinanceFetcher(BaseFetcher):
 
             api_start = _time.time()
 
-            df = ef.stock.get_belong_board(stock_code)
+            df = _flight.do(('get_belong_board', stock_code), ef.stock.get_belong_board, stock_code)
 
             api_elapsed = _time.time() - api_start
 
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+批量行情报文解析（列式）
+===================================
+
+职责：
+1. 一次性把新浪 / 腾讯批量行情报文解析为列式结构
+   （每个数值字段一个 float64 数组 + 代码到行号的字典）
+2. 涨跌额、涨跌幅、振幅等衍生字段按整列向量化计算
+3. 行情 dataclass 只在按代码访问时才创建（并缓存），
+   只用到少数股票时不再为整批 800 只股票逐个构造对象
+
+报文格式：
+    新浪：var hq_str_sh600519="贵州茅台,1850.00,1860.00,...";   （逗号分隔）
+    腾讯：v_sh600519="1~贵州茅台~600519~1850.00~...";           （~ 分隔）
+
+使用方式：
+    batch = parse_sina_batch(response.text, {'sh600519': '600519'}, SinaRealtimeQuote)
+    batch['600519']            # SinaRealtimeQuote（首次访问时创建）
+    batch.column('price')      # 整列 float64 数组
+"""
+
+import logging
+import re
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# 新浪字段：0 名称 1 今开 2 昨收 3 最新价 4 最高 5 最低 ... 8 成交量(股) 9 成交额(元) ... 30 日期 31 时间
+_SINA_FIELDS: Dict[str, int] = {
+    'open_price': 1,
+    'pre_close': 2,
+    'price': 3,
+    'high': 4,
+    'low': 5,
+    'volume': 8,
+    'amount': 9,
+}
+_SINA_MIN_FIELDS = 32
+_SINA_WIDTH = max(_SINA_FIELDS.values()) + 1
+_SINA_PATTERN = re.compile(r'hq_str_(\w+)="([^"]*)"')
+
+# 腾讯字段：1 名称 3 最新价 4 昨收 5 今开 6 成交量(手) ... 42 涨跌额 43 涨跌幅 49 换手率 50 市盈率
+_TENCENT_FIELDS: Dict[str, int] = {
+    'price': 3,
+    'pre_close': 4,
+    'open_price': 5,
+    'volume': 6,
+    'high': 18,
+    'low': 19,
+    'amount': 21,
+    'change_amount': 42,
+    'change_pct': 43,
+    'turnover_rate': 49,
+    'pe_ratio': 50,
+}
+_TENCENT_MIN_FIELDS = 20
+_TENCENT_WIDTH = max(_TENCENT_FIELDS.values()) + 1
+_TENCENT_PATTERN = re.compile(r'v_(\w+)="([^"]*)"')
+
+# dataclass 中为 int 类型的字段
+_INT_FIELDS = ('volume',)
+
+
+class QuoteBatch(Mapping):
+    """
+    一批行情的列式表示（构建后只读，可在线程间共享）
+
+    作为 Mapping 使用时与原先的 {代码: 行情对象或 None} 字典行为一致：
+    键为请求的全部代码，解析失败或未返回的代码对应 None
+    """
+
+    def __init__(
+        self,
+        codes: Sequence[str],
+        names: Sequence[str],
+        arrays: Dict[str, np.ndarray],
+        quote_cls: Optional[Callable[..., Any]] = None,
+        requested: Sequence[str] = (),
+    ):
+        """
+        Args:
+            codes: 解析成功的代码（与数组行号一一对应）
+            names: 股票名称（与 codes 等长）
+            arrays: 字段名 -> float64 数组（字段名与行情 dataclass 字段一致，缺失值为 NaN）
+            quote_cls: 行情 dataclass（按代码访问时创建），为 None 时返回字段字典
+            requested: 请求的全部代码（含解析失败的代码）
+        """
+        self.codes = list(codes)
+        self.names = list(names)
+        self._arrays = arrays
+        self._quote_cls = quote_cls
+        self._index: Dict[str, int] = {}
+        for i, code in enumerate(self.codes):
+            self._index.setdefault(code, i)
+        self._keys: List[str] = list(dict.fromkeys(list(requested) + self.codes))
+        self._quotes: Dict[str, Any] = {}
+        # 首次按代码访问时把各列转换为 Python 列表，之后逐只取值不再经过 numpy 标量
+        self._lists: Optional[Dict[str, list]] = None
+
+    @classmethod
+    def concat(cls, batches: Sequence['QuoteBatch']) -> 'QuoteBatch':
+        """合并多批行情（如超过单次请求上限时分批请求的结果），仍为列式结构"""
+        if len(batches) == 1:
+            return batches[0]
+
+        first = batches[0]
+        return cls(
+            codes=[code for batch in batches for code in batch.codes],
+            names=[name for batch in batches for name in batch.names],
+            arrays={field: np.concatenate([batch._arrays[field] for batch in batches]) for field in first._arrays},
+            quote_cls=first._quote_cls,
+            requested=[code for batch in batches for code in batch._keys],
+        )
+
+    # === Mapping 接口 ===
+
+    def __getitem__(self, code: str) -> Any:
+        i = self._index.get(code)
+        if i is None:
+            if code in self._keys:
+                return None
+            raise KeyError(code)
+
+        quote = self._quotes.get(code)
+        if quote is None:
+            # 并发首次访问时可能重复创建，结果等价，保留先写入的一个
+            quote = self._quotes.setdefault(code, self._build(code, i))
+        return quote
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._index or code in self._keys
+
+    # === 列式访问 ===
+
+    @property
+    def valid_count(self) -> int:
+        """解析成功的股票数"""
+        return len(self.codes)
+
+    def has_quote(self, code: str) -> bool:
+        """代码是否解析成功（不创建行情对象）"""
+        return code in self._index
+
+    def column(self, field: str) -> np.ndarray:
+        """整列数组（与 codes 对应，缺失值为 NaN）"""
+        return self._arrays[field]
+
+    def row(self, code: str) -> Optional[Dict[str, Any]]:
+        """单只股票的字段字典（缺失值为 0），代码不存在返回 None"""
+        i = self._index.get(code)
+        if i is None:
+            return None
+
+        lists = self._lists
+        if lists is None:
+            lists = self._lists = {field: arr.tolist() for field, arr in self._arrays.items()}
+
+        result: Dict[str, Any] = {'code': code, 'name': self.names[i]}
+        for field, values in lists.items():
+            value = values[i]
+            if value != value:  # NaN
+                value = 0.0
+            result[field] = int(value) if field in _INT_FIELDS else value
+        return result
+
+    def to_frame(self) -> pd.DataFrame:
+        """转换为 DataFrame（每行一只解析成功的股票）"""
+        df = pd.DataFrame(self._arrays)
+        df.insert(0, 'name', self.names)
+        df.insert(0, 'code', self.codes)
+        return df
+
+    def _build(self, code: str, i: int) -> Any:
+        fields = self.row(code)
+        if self._quote_cls is None:
+            return fields
+        return self._quote_cls(**fields)
+
+    def __repr__(self) -> str:
+        return f"<QuoteBatch(valid={len(self.codes)}, requested={len(self._keys)})>"
+
+
+def _split_columns(
+    content: str,
+    pattern: 're.Pattern[str]',
+    symbols: Dict[str, str],
+    sep: str,
+    width: int,
+    min_fields: int,
+) -> Tuple[List[str], List[Tuple[str, ...]]]:
+    """
+    提取整段报文中各股票的字段并按列转置
+
+    匹配、切分由正则与 str.split 在 C 层完成，Python 层只有列表推导，
+    不再为每只股票调用解析函数
+
+    Returns:
+        (代码列表, 至少 width 个字段列，每列与代码列表等长)
+    """
+    payloads = [
+        (symbols[symbol], payload)
+        for symbol, payload in pattern.findall(content)
+        if symbol in symbols and payload.count(sep) + 1 >= min_fields
+    ]
+    if not payloads:
+        return [], [()] * width
+
+    rows = [payload.split(sep, width) for _, payload in payloads]
+    if width > min_fields:
+        # 字段数介于 min_fields 与 width 之间的行补空串
+        rows = [row if len(row) >= width else row + [''] * (width - len(row)) for row in rows]
+    return [code for code, _ in payloads], list(zip(*rows))
+
+
+def _to_float(values: Sequence[str]) -> np.ndarray:
+    """字符串列批量转换为 float64（空串、非数字为 NaN）"""
+    if not values:
+        return np.empty(0)
+    try:
+        return np.fromiter(map(float, values), dtype=np.float64, count=len(values))
+    except ValueError:
+        # 含空串等非法值时走逐元素容错转换
+        return pd.to_numeric(np.asarray(values, dtype=object), errors='coerce').astype(np.float64)
+
+
+def _nan_to_zero(arr: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(arr), 0.0, arr)
+
+
+def parse_sina_batch(
+    content: str,
+    symbols: Dict[str, str],
+    quote_cls: Optional[Callable[..., Any]] = None,
+) -> QuoteBatch:
+    """
+    解析新浪批量行情报文
+
+    Args:
+        content: hq.sinajs.cn 返回的完整报文
+        symbols: 新浪代码 -> 原始代码（如 {'sh600519': '600519'}）
+        quote_cls: 行情 dataclass（如 SinaRealtimeQuote）
+
+    Returns:
+        QuoteBatch（未返回或字段不足的代码对应 None）
+    """
+    codes, columns = _split_columns(content, _SINA_PATTERN, symbols, ',', _SINA_WIDTH, _SINA_MIN_FIELDS)
+
+    arrays = {field: _to_float(columns[idx]) for field, idx in _SINA_FIELDS.items()}
+    for field in ('open_price', 'pre_close', 'price', 'high', 'low', 'amount'):
+        arrays[field] = _nan_to_zero(arrays[field])
+    arrays['volume'] = np.trunc(_nan_to_zero(arrays['volume']))
+
+    # 衍生指标：昨收为 0（停牌/新股）时记为 0
+    pre_close = arrays['pre_close']
+    has_pre = pre_close > 0
+    safe_pre = np.where(has_pre, pre_close, 1.0)
+    change_amount = np.where(has_pre, arrays['price'] - pre_close, 0.0)
+    arrays['change_amount'] = change_amount
+    arrays['change_pct'] = np.where(has_pre, change_amount / safe_pre * 100, 0.0)
+    arrays['amplitude'] = np.where(has_pre, (arrays['high'] - arrays['low']) / safe_pre * 100, 0.0)
+
+    # 新浪接口不提供换手率、估值和市值
+    zeros = np.zeros(len(codes))
+    for field in ('turnover_rate', 'pe_ratio', 'pb_ratio', 'total_mv', 'circulation_mv'):
+        arrays[field] = zeros
+
+    return QuoteBatch(codes, list(columns[0]), arrays, quote_cls, requested=list(symbols.values()))
+
+
+def parse_tencent_batch(
+    content: str,
+    symbols: Dict[str, str],
+    quote_cls: Optional[Callable[..., Any]] = None,
+) -> QuoteBatch:
+    """
+    解析腾讯批量行情报文
+
+    Args:
+        content: qt.gtimg.cn 返回的完整报文
+        symbols: 腾讯代码 -> 原始代码（如 {'sh600519': '600519'}）
+        quote_cls: 行情 dataclass（如 TencentRealtimeQuote）
+
+    Returns:
+        QuoteBatch（未返回或字段不足的代码对应 None）
+    """
+    codes, columns = _split_columns(
+        content, _TENCENT_PATTERN, symbols, '~', _TENCENT_WIDTH, _TENCENT_MIN_FIELDS
+    )
+
+    arrays = {field: _to_float(columns[idx]) for field, idx in _TENCENT_FIELDS.items()}
+    price = _nan_to_zero(arrays['price'])
+    arrays['price'] = price
+    # 最高/最低缺失时以最新价代替
+    arrays['high'] = np.where(np.isnan(arrays['high']), price, arrays['high'])
+    arrays['low'] = np.where(np.isnan(arrays['low']), price, arrays['low'])
+    for field in ('pre_close', 'open_price', 'change_amount', 'change_pct', 'turnover_rate', 'pe_ratio'):
+        arrays[field] = _nan_to_zero(arrays[field])
+    arrays['volume'] = np.trunc(_nan_to_zero(arrays['volume'])) * 100  # 手转股
+    arrays['amount'] = _nan_to_zero(arrays['amount']) * 10000  # 万元转元
+
+    pre_close = arrays['pre_close']
+    has_pre = pre_close > 0
+    arrays['amplitude'] = np.where(
+        has_pre, (arrays['high'] - arrays['low']) / np.where(has_pre, pre_close, 1.0) * 100, 0.0
+    )
+
+    # 腾讯基础报文不含市净率和市值
+    zeros = np.zeros(len(codes))
+    for field in ('pb_ratio', 'total_mv', 'circulation_mv'):
+        arrays[field] = zeros
+
+    return QuoteBatch(codes, list(columns[1]), arrays, quote_cls, requested=list(symbols.values()))
+
+
+if __name__ == "__main__":
+    import timeit
+
+    from data_provider.sina_fetcher import SinaFetcher, SinaRealtimeQuote
+
+    # 构造 800 只股票（一次批量请求的上限）的新浪报文，对比逐行解析与列式解析的耗时
+    symbols = {f"sh{600000 + i}": str(600000 + i) for i in range(800)}
+    content = '\n'.join(
+        f'var hq_str_{symbol}="股票{code},10.{i % 90:02d},10.00,10.50,10.80,9.90,10.49,10.50,'
+        f'{1000000 + i},{10500000.0 + i:.2f},' + ','.join(['100', '10.49'] * 10) + ',2026-10-16,15:00:00,00";'
+        for i, (symbol, code) in enumerate(symbols.items())
+    )
+    codes = list(symbols.values())
+    lines = content.split('\n')
+    fetcher = SinaFetcher()
+
+    def legacy():
+        return {code: fetcher._parse_sina_data(line, code) for code, line in zip(codes, lines)}
+
+    def columnar():
+        return parse_sina_batch(content, symbols, SinaRealtimeQuote)
+
+    def columnar_access_all():
+        batch = columnar()
+        return {code: batch[code] for code in codes}
+
+    def columnar_access_20():
+        batch = columnar()
+        return {code: batch[code] for code in codes[:20]}
+
+    assert columnar()['600123'] == legacy()['600123']
+    for label, fn in [
+        ("逐行解析（每只创建 dataclass）", legacy),
+        ("列式解析（不创建对象）", columnar),
+        ("列式解析 + 访问 20 只", columnar_access_20),
+        ("列式解析 + 访问全部 800 只", columnar_access_all),
+    ]:
+        best = min(timeit.repeat(fn, number=20, repeat=5)) / 20
+        print(f"{label}: {best * 1000:.2f} ms / 800 只")
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全市场行情快照服务
+===================================
+
+职责：
+1. 用一次批量请求（新浪 hq.sinajs.cn，每次最多800只）刷新整个股票池的实时行情
+2. 在 TTL 有效期内从内存提供单只股票的行情查询
+3. 统一行情对象类型（RealtimeQuote），屏蔽不同数据源的字段差异
+
+说明：
+新浪批量行情只提供价格、涨跌、成交量额等字段，不含量比、换手率、市值。
+需要这些字段的调用方可传入 require_detail=True，服务优先从 detail_fetcher
+（如 AkshareFetcher，其全市场行情表本身带缓存）获取完整行情，快照只作为回退，
+此时不发起新浪请求。
+选股等整池筛选场景可先调用 prefetch_detail，由 spot_fetcher（AkShare 全市场
+行情表）一次取出整个股票池的扩展字段，表中缺失的代码才逐只回退到 detail_fetcher。
+
+批量接口返回列式的 QuoteBatch，快照只记录代码所属的批次，
+RealtimeQuote 在 get_quote 首次访问该代码时才转换。
+"""
+
+import logging
+import threading
+import time
+from typing import Optional, List, Dict, Any, Iterable, Mapping
+
+import numpy as np
+
+from .akshare_fetcher import RealtimeQuote
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def to_realtime_quote(quote: Any) -> Optional[RealtimeQuote]:
+    """
+    将任意数据源的行情对象转换为统一的 RealtimeQuote
+
+    不同数据源的行情字段不完全一致（如 circulation_mv / circ_mv），
+    既支持 dataclass 对象也支持字典（Tushare / Baostock / Yfinance 返回 dict），
+    缺失字段使用 0.0 填充
+    """
+    if quote is None:
+        return None
+    if isinstance(quote, RealtimeQuote):
+        return quote
+
+    if isinstance(quote, Mapping):
+        _field = quote.get
+    else:
+
+        def _field(name: str, default: Any = None) -> Any:
+            return getattr(quote, name, default)
+
+    def _get(*names: str) -> float:
+        for name in names:
+            value = _field(name)
+            if value:
+                try:
+                    return float(value)
+                except (TypeError, ValueError):
+                    continue
+        return 0.0
+
+    return RealtimeQuote(
+        code=str(_field('code', '') or ''),
+        name=str(_field('name', '') or ''),
+        price=_get('price'),
+        change_pct=_get('change_pct'),
+        change_amount=_get('change_amount'),
+        volume_ratio=_get('volume_ratio'),
+        turnover_rate=_get('turnover_rate'),
+        amplitude=_get('amplitude'),
+        pe_ratio=_get('pe_ratio'),
+        pb_ratio=_get('pb_ratio'),
+        total_mv=_get('total_mv'),
+        circ_mv=_get('circ_mv', 'circulation_mv'),
+        change_60d=_get('change_60d'),
+        high_52w=_get('high_52w'),
+        low_52w=_get('low_52w'),
+    )
+
+
+def _has_detail(quote: RealtimeQuote) -> bool:
+    """行情是否包含量比/换手率/市值等扩展字段"""
+    return quote.volume_ratio > 0 or quote.turnover_rate > 0 or quote.total_mv > 0
+
+
+class QuoteSnapshotService:
+    """
+    行情快照服务
+
+    使用方式：
+        snapshot = QuoteSnapshotService(ttl=30)
+        snapshot.prefetch(stock_pool)         # 1 次批量请求
+        quote = snapshot.get_quote('600519')  # 内存查询
+
+    线程安全：快照读写由锁保护，可在线程池中共享同一实例；批量请求期间不持锁，
+    并发的整池刷新 / 同一批代码的补取经 SingleFlight 合并为一次请求
+    """
+
+    def __init__(self, batch_fetcher=None, detail_fetcher=None, ttl: float = 30.0, spot_fetcher=None):
+        """
+        初始化快照服务
+
+        Args:
+            batch_fetcher: 支持 get_batch_realtime_quotes() 的数据源（默认 SinaFetcher）
+            detail_fetcher: 提供完整行情字段的数据源（可选，require_detail 时使用）
+            ttl: 快照有效期（秒）
+            spot_fetcher: 支持 get_spot_vectors() 的数据源（可选，prefetch_detail 时使用）
+        """
+        if batch_fetcher is None:
+            from .base import DataFetcherManager
+
+            batch_fetcher = DataFetcherManager.get('sina')
+
+        self.batch_fetcher = batch_fetcher
+        self.detail_fetcher = detail_fetcher
+        self.ttl = ttl
+        self.spot_fetcher = spot_fetcher
+
+        self._lock = threading.Lock()
+        self._pool: List[str] = []
+        # 代码 -> 所属批次（批量接口的原始返回）；_quotes 为已转换的 RealtimeQuote
+        self._batches: Dict[str, Mapping[str, Any]] = {}
+        self._quotes: Dict[str, Optional[RealtimeQuote]] = {}
+        self._refreshed_at: float = 0.0
+        # 代码 -> 带扩展字段的行情（prefetch_detail 批量写入）
+        self._details: Dict[str, RealtimeQuote] = {}
+        self._details_at: float = 0.0
+        self.request_count = 0  # 批量请求次数（用于统计）
+        self._flight = SingleFlight(name='quote_snapshot')
+
+    def _is_fresh(self) -> bool:
+        return self._refreshed_at > 0 and time.time() - self._refreshed_at < self.ttl
+
+    def _details_fresh(self) -> bool:
+        return self._details_at > 0 and time.time() - self._details_at < self.ttl
+
+    def _fetch_batch(self, codes: List[str]) -> Dict[str, Mapping[str, Any]]:
+        """调用批量接口，返回 代码 -> 所属批次（不在此处创建行情对象，调用方不得持锁）"""
+        if not codes:
+            return {}
+
+        raw = self.batch_fetcher.get_batch_realtime_quotes(codes)
+        with self._lock:
+            self.request_count += (len(codes) + 799) // 800
+        return dict.fromkeys(codes, raw)
+
+    def _download_pool(self) -> None:
+        """整池刷新：锁内取股票池，锁外请求，再持锁替换批次"""
+        with self._lock:
+            pool = list(self._pool)
+
+        batches = self._fetch_batch(pool)
+
+        with self._lock:
+            # 请求期间补取并加入股票池的代码保留其批次
+            for code in self._pool:
+                if code not in batches and code in self._batches:
+                    batches[code] = self._batches[code]
+            self._replace(batches)
+
+    def _refresh_pool(self) -> None:
+        """整池刷新（并发调用合并为一次批量请求）"""
+        self._flight.do('pool', self._download_pool)
+
+    def _fetch_missing(self, codes: List[str]) -> None:
+        """补取快照中缺失的代码并加入股票池（相同的缺失代码并发补取时合并为一次请求）"""
+        with self._lock:
+            missing = [code for code in codes if code not in self._batches]
+        if not missing:
+            return
+
+        batches = self._flight.do(tuple(missing), self._fetch_batch, missing)
+
+        with self._lock:
+            for code in missing:
+                if code not in self._pool:
+                    self._pool.append(code)
+            self._batches.update(batches)
+            if self._refreshed_at == 0:
+                self._refreshed_at = time.time()
+
+    def _replace(self, batches: Dict[str, Mapping[str, Any]]) -> None:
+        """整池刷新：替换批次并丢弃已转换的行情"""
+        self._batches = batches
+        self._quotes = {}
+        self._refreshed_at = time.time()
+
+    def _has_quote(self, code: str) -> bool:
+        """代码是否取得行情（QuoteBatch 可不创建行情对象直接判断）"""
+        batch = self._batches.get(code)
+        if batch is None:
+            return False
+        has_quote = getattr(batch, 'has_quote', None)
+        return has_quote(code) if has_quote is not None else batch.get(code) is not None
+
+    def _resolve(self, code: str) -> Optional[RealtimeQuote]:
+        """取出代码的 RealtimeQuote（首次访问时从批次转换，调用方持有锁）"""
+        if code in self._quotes:
+            return self._quotes[code]
+        batch = self._batches.get(code)
+        quote = to_realtime_quote(batch.get(code)) if batch is not None else None
+        self._quotes[code] = quote
+        return quote
+
+    def refresh(self, codes: Optional[Iterable[str]] = None) -> int:
+        """
+        刷新快照
+
+        Args:
+            codes: 股票池（可选，指定时替换当前股票池）
+
+        Returns:
+            成功获取行情的股票数量
+        """
+        with self._lock:
+            if codes is not None:
+                self._pool = list(dict.fromkeys(codes))
+            pool = list(self._pool)
+
+        self._refresh_pool()
+        # 合并到进行中的刷新时，其开始后才加入股票池的代码单独补取
+        self._fetch_missing(pool)
+
+        with self._lock:
+            success_count = sum(1 for code in pool if self._has_quote(code))
+            total = len(pool)
+
+        logger.info(f"[行情快照] 刷新完成: {success_count}/{total} 只股票, TTL {self.ttl:.0f}s")
+        return success_count
+
+    def prefetch(self, codes: Iterable[str]) -> None:
+        """
+        确保指定股票已在快照中
+
+        - 快照过期：将 codes 并入股票池后整池刷新（1 次批量请求）
+        - 快照有效：只补取快照中缺失的代码（最多 1 次批量请求）
+
+        Args:
+            codes: 股票代码列表
+        """
+        codes = list(dict.fromkeys(codes))
+        with self._lock:
+            stale = not self._is_fresh()
+            if stale:
+                self._pool = list(dict.fromkeys(self._pool + codes))
+
+        if stale:
+            self._refresh_pool()
+        self._fetch_missing(codes)
+
+    def prefetch_detail(self, codes: Iterable[str]) -> int:
+        """
+        批量取出股票池的扩展字段（量比/换手率/市值等）
+
+        使用 spot_fetcher 的全市场行情表（1 次请求，表本身带缓存），
+        表中缺失或无扩展字段的代码留给 get_quote(require_detail=True) 逐只回退
+
+        Args:
+            codes: 股票代码列表
+
+        Returns:
+            取得扩展字段的股票数量
+        """
+        if self.spot_fetcher is None:
+            return 0
+
+        codes = list(dict.fromkeys(codes))
+        try:
+            vectors = self.spot_fetcher.get_spot_vectors(codes)
+        except Exception as e:
+            logger.warning(f"[行情快照] 批量获取扩展字段失败: {e}")
+            return 0
+
+        found = vectors.pop('found')
+        details: Dict[str, RealtimeQuote] = {}
+        for i, code in enumerate(codes):
+            if not found[i]:
+                continue
+            fields = {field: float(values[i]) for field, values in vectors.items() if not np.isnan(values[i])}
+            quote = to_realtime_quote({'code': code, **fields})
+            if _has_detail(quote):
+                details[code] = quote
+
+        with self._lock:
+            if not self._details_fresh():
+                self._details = {}
+            self._details.update(details)
+            self._details_at = time.time()
+
+        logger.info(f"[行情快照] 扩展字段: {len(details)}/{len(codes)} 只股票")
+        return len(details)
+
+    def get_quote(self, stock_code: str, require_detail: bool = False) -> Optional[RealtimeQuote]:
+        """
+        获取单只股票的实时行情
+
+        流程：
+        1. require_detail：优先使用 prefetch_detail 批量取得的扩展字段，
+           未取得时使用 detail_fetcher 逐只获取
+        2. 快照过期则整池刷新（1 次批量请求）
+        3. 代码不在股票池中则加入股票池并单独补取
+
+        Args:
+            stock_code: 股票代码
+            require_detail: 是否需要量比/换手率/市值等扩展字段
+
+        Returns:
+            RealtimeQuote 对象，获取失败返回 None
+        """
+        detail: Optional[RealtimeQuote] = None
+        if require_detail:
+            with self._lock:
+                detail = self._details.get(stock_code) if self._details_fresh() else None
+            if detail is not None:
+                return detail
+
+        if require_detail and self.detail_fetcher is not None:
+            try:
+                detail = to_realtime_quote(self.detail_fetcher.get_realtime_quote(stock_code))
+            except Exception as e:
+                logger.debug(f"[行情快照] {stock_code} 扩展行情获取失败: {e}")
+            if detail is not None and _has_detail(detail):
+                return detail
+
+        quote: Optional[RealtimeQuote] = None
+        try:
+            with self._lock:
+                stale = not self._is_fresh() and bool(self._pool)
+            if stale:
+                self._refresh_pool()
+            self._fetch_missing([stock_code])
+
+            with self._lock:
+                quote = self._resolve(stock_code)
+        except Exception as e:
+            logger.warning(f"[行情快照] 获取 {stock_code} 失败: {e}")
+
+        # 扩展行情缺少扩展字段时优先使用快照行情（其价格等字段有效）
+        return quote if quote is not None else detail
+
+    def get_quotes(self, stock_codes: List[str]) -> Dict[str, Optional[RealtimeQuote]]:
+        """批量获取多只股票的实时行情（仅使用快照）"""
+        return {code: self.get_quote(code) for code in stock_codes}
+
+    def get_name(self, stock_code: str) -> Optional[str]:
+        """从快照获取股票名称"""
+        quote = self.get_quote(stock_code)
+        return quote.name if quote and quote.name else None
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+数据源流控 - 令牌桶限速器
+===================================
+
+职责：
+1. 按数据源名称维护进程内共享的令牌桶（与 Fetcher 实例无关）
+2. 令牌充足时立即放行，不足时只休眠到下一个令牌可用
+3. 线程安全：线程池中多个 worker 共享同一个桶，总吞吐不超过设定速率
+
+说明：
+以前每个 Fetcher 实例记录自己的上次请求时间，再叠加随机休眠。
+选股器每次调用都会新建 Fetcher 实例，实例级流控形同虚设，
+而随机休眠又让每次请求都付出固定等待。令牌桶按数据源全局限速，
+速率 rate（次/秒）决定长期吞吐，容量 burst 决定允许的瞬时突发。
+
+配置：
+    RATE_LIMITS=sina=8:5,akshare=0.3:1
+    （数据源名不区分大小写，可省略 Fetcher 后缀；格式为 速率:突发容量）
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 默认速率（次/秒, 突发容量），由原先各数据源的平均随机休眠间隔换算
+_DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'sina': (8.0, 5),  # 原 0.05-0.2 秒
+    'tencent': (3.0, 3),  # 原 0.1-0.5 秒
+    'tonghuashun': (2.5, 2),  # 原 0.2-0.6 秒
+    'efinance': (0.45, 1),  # 原 1.5-3 秒
+    'akshare': (0.3, 1),  # 原 2-5 秒
+}
+
+# 未配置的数据源使用的默认值
+_FALLBACK_LIMIT: Tuple[float, float] = (1.0, 1)
+
+
+def normalize_source_name(source: str) -> str:
+    """数据源名称归一化：'SinaFetcher' / 'sina' -> 'sina'"""
+    name = source.strip().lower()
+    if name.endswith('fetcher'):
+        name = name[: -len('fetcher')]
+    return name
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（线程安全）
+
+    采用预约方式：调用方先扣减令牌（允许为负），再在锁外休眠到令牌"到账"，
+    多个线程同时等待时依次排队，不会同时醒来争抢
+    """
+
+    def __init__(self, rate: float, burst: float = 1, name: str = "bucket"):
+        """
+        Args:
+            rate: 令牌生成速率（次/秒）
+            burst: 桶容量（允许的瞬时突发请求数）
+            name: 名称（用于日志）
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        if burst < 1:
+            raise ValueError("burst 不能小于 1")
+
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._last = time.monotonic()
+
+        self.acquired = 0  # 累计放行次数
+        self.waited_seconds = 0.0  # 累计等待时间
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        获取令牌，必要时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            实际等待的秒数（令牌充足时为 0）
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            self.waited_seconds += wait
+
+        if wait > 0:
+            logger.debug(f"[流控] {self.name} 等待 {wait:.3f} 秒")
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        非阻塞获取令牌
+
+        Returns:
+            令牌充足返回 True（已扣减），否则返回 False
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.acquired += 1
+                return True
+            return False
+
+    def update(self, rate: float, burst: float) -> None:
+        """调整速率与容量（保留当前令牌，截断到新容量）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            self.burst = float(burst)
+            self._tokens = min(self._tokens, self.burst)
+
+    def __repr__(self) -> str:
+        return f"<TokenBucket(name={self.name}, rate={self.rate}/s, burst={self.burst:.0f})>"
+
+
+_registry: Dict[str, TokenBucket] = {}
+_registry_lock = threading.Lock()
+_config_limits: Optional[Dict[str, Tuple[float, float]]] = None
+
+
+def _load_config_limits() -> Dict[str, Tuple[float, float]]:
+    """从配置读取限速参数（只读取一次）"""
+    global _config_limits
+    if _config_limits is not None:
+        return _config_limits
+
+    limits: Dict[str, Tuple[float, float]] = {}
+    try:
+        from config import get_config
+
+        for source, (rate, burst) in get_config().rate_limits.items():
+            limits[normalize_source_name(source)] = (rate, burst)
+    except Exception as e:
+        logger.debug(f"[流控] 读取限速配置失败，使用默认值: {e}")
+
+    _config_limits = limits
+    return limits
+
+
+def get_rate_limiter(source: str) -> TokenBucket:
+    """
+    获取数据源对应的令牌桶（进程内单例）
+
+    Args:
+        source: 数据源名称（如 'SinaFetcher'、'akshare'）
+
+    Returns:
+        该数据源共享的 TokenBucket
+    """
+    key = normalize_source_name(source)
+    bucket = _registry.get(key)
+    if bucket is not None:
+        return bucket
+
+    with _registry_lock:
+        bucket = _registry.get(key)
+        if bucket is None:
+            rate, burst = _load_config_limits().get(key) or _DEFAULT_LIMITS.get(key, _FALLBACK_LIMIT)
+            bucket = TokenBucket(rate, burst, name=key)
+            _registry[key] = bucket
+            logger.debug(f"[流控] 创建令牌桶 {bucket!r}")
+        return bucket
+
+
+def configure_rate_limiter(source: str, rate: float, burst: float = 1) -> TokenBucket:
+    """
+    设置数据源的速率与突发容量（已存在的桶就地更新）
+
+    Args:
+        source: 数据源名称
+        rate: 速率（次/秒）
+        burst: 突发容量
+
+    Returns:
+        更新后的 TokenBucket
+    """
+    key = normalize_source_name(source)
+    with _registry_lock:
+        bucket = _registry.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst, name=key)
+            _registry[key] = bucket
+        else:
+            bucket.update(rate, burst)
+        return bucket
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    logging.basicConfig(level=logging.INFO)
+
+    bucket = configure_rate_limiter('demo', rate=10, burst=2)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(lambda _: bucket.acquire(), range(22)))
+    elapsed = time.monotonic() - start
+    # 22 次请求：前 2 次突发，其余 20 次按 10 次/秒 => 约 2.0 秒
+    print(f"22 次请求耗时 {elapsed:.2f}s, 累计等待 {bucket.waited_seconds:.2f}s")
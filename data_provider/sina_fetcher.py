@@ -11,10 +11,11 @@ SinaFetcher - 极速数据源 (Priority 0.1)
 接口说明：
 - 实时行情：http://hq.sinajs.cn/list=sh600519,sz000001
 - 批量查询：支持一次查询最多800只股票
-- 历史数据：通过实时数据模拟构造
+- 历史数据：日K线接口 quotes.sina.cn/.../CN_MarketDataService.getKLineData（不复权，
+  不参与 DataFetcherManager 的日线故障切换，仅在明确指定新浪时使用）
 
 防封禁策略：
-1. 每次请求前随机休眠 0.05-0.2 秒（极短延时）
+1. 按数据源共享的令牌桶限速（默认 8 次/秒，突发 5）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 4. 批量查询减少请求次数
@@ -25,7 +26,7 @@ import time
 import random
 import re
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Mapping
 import requests
 import pandas as pd
 from dataclasses import dataclass
@@ -37,10 +38,17 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, RateLimitError, create_http_session
+from .cache import TTLCache
+from .quote_parser import QuoteBatch, parse_sina_batch
+from .trading_calendar import china_now, weekdays_between
 
 logger = logging.getLogger(__name__)
 
+# 日K线接口（scale=240 即日线），单次最多返回约 1023 根
+KLINE_URL = "https://quotes.sina.cn/cn/api/json_v2.php/CN_MarketDataService.getKLineData"
+KLINE_MAX_BARS = 1023
+
 
 @dataclass
 class SinaRealtimeQuote:
@@ -108,8 +116,9 @@ USER_AGENTS = [
 ]
 
 
-# 缓存实时行情数据（避免重复请求）
-_realtime_cache: Dict[str, Any] = {'data': {}, 'timestamp': 0, 'ttl': 30}  # 30秒缓存有效期
+# 缓存实时行情数据（避免重复请求）：每只股票独立过期，超出上限按 LRU 淘汰
+# 批量请求的结果以整批 QuoteBatch 入缓存（每个代码一个条目），行情对象在读取时才创建
+_realtime_cache = TTLCache(ttl=30, max_entries=6000, name='sina_realtime')
 
 
 class SinaFetcher(BaseFetcher):
@@ -122,9 +131,10 @@ class SinaFetcher(BaseFetcher):
     主要 API：
     - 实时行情：http://hq.sinajs.cn/list={market_codes}
     - 批量查询：支持一次最多800只股票
+    - 日K线：CN_MarketDataService.getKLineData?symbol={market_code}&scale=240&datalen={N}
 
     关键策略：
-    - 每次请求前随机休眠 0.05-0.2 秒（极短延时）
+    - 令牌桶限速（进程内按数据源共享，默认 8 次/秒，突发 5）
     - 随机 User-Agent 轮换
     - 批量查询优化（一次获取多只股票）
     - 失败后指数退避重试（最多3次）
@@ -132,19 +142,16 @@ class SinaFetcher(BaseFetcher):
 
     name = "SinaFetcher"
     priority = 0.1  # 最高优先级，专门用于极速模式
+    adjusted_daily = False  # K线不复权，不参与日线故障切换（避免与前复权历史混存）
 
-    def __init__(self, sleep_min: float = 0.05, sleep_max: float = 0.2):
+    def __init__(self):
         """
         初始化 SinaFetcher
 
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
+        流控由按数据源共享的令牌桶负责（见 rate_limiter.py）；
+        Session 带按并发数设置的连接池，通过 DataFetcherManager.get() 复用单例时保持 keep-alive
         """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
-        self.session = requests.Session()
+        self.session = create_http_session()
 
     def _set_random_user_agent(self) -> None:
         """
@@ -169,27 +176,6 @@ class SinaFetcher(BaseFetcher):
         except Exception as e:
             logger.debug(f"设置 User-Agent 失败: {e}")
 
-    def _enforce_rate_limit(self) -> None:
-        """
-        强制执行速率限制
-
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠（极短）
-        """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.3f} 秒")
-                time.sleep(additional_sleep)
-
-        # 执行随机 jitter 休眠（极短延时）
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
-
     def _convert_stock_code(self, stock_code: str) -> str:
         """
         转换股票代码为新浪格式
@@ -316,68 +302,68 @@ class SinaFetcher(BaseFetcher):
     )
     def _fetch_raw_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
         """
-        从新浪获取原始数据
+        从新浪获取原始日K线数据
+
+        K线接口只支持"最近 N 根"（datalen），按日期区间换算出所需条数后请求，
+        再按 [start_date, end_date] 过滤。多取的一根K线用于计算首日涨跌幅。
 
-        注意：新浪API主要提供实时数据，历史数据需要通过实时数据模拟
-        这里我们获取实时数据并构造简单的历史数据格式
+        注意：新浪K线为不复权价格，且不提供成交额（amount 为空），
+        因此 DataFetcherManager 的日线故障切换不会使用本数据源
 
         流程：
         1. 设置随机 User-Agent
-        2. 执行速率限制（极短随机休眠）
-        3. 调用新浪实时行情API
-        4. 处理返回数据
+        2. 执行速率限制（令牌桶）
+        3. 调用新浪日K线API
+        4. 整表解析返回的 JSON
         """
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠（极短）
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         # 转换代码格式
         sina_code = self._convert_stock_code(stock_code)
 
-        logger.info(f"[API调用] 新浪财经实时行情: {sina_code}")
+        # 从 start_date 到今天的工作日数（datalen 从最新一根往前数，节假日多取的K线按日期过滤），
+        # 多取 1 根用于计算涨跌幅
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
+        datalen = weekdays_between(start_dt, china_now().date()) + 2
+        datalen = max(2, min(datalen, KLINE_MAX_BARS))
 
-        try:
-            import time as _time
+        logger.info(f"[API调用] 新浪财经日K线: {sina_code}, datalen={datalen}")
 
-            api_start = _time.time()
+        try:
+            api_start = time.time()
 
-            # 调用新浪实时行情API
-            url = f"http://hq.sinajs.cn/list={sina_code}"
-            response = self.session.get(url, timeout=5)
+            response = self.session.get(
+                KLINE_URL,
+                params={'symbol': sina_code, 'scale': 240, 'ma': 'no', 'datalen': datalen},
+                timeout=10,
+            )
             response.raise_for_status()
 
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
 
-            # 解析返回数据
-            content = response.text.strip()
-            if not content or 'null' in content or len(content) < 10:
-                raise DataFetchError(f"新浪API未找到股票 {stock_code} 的数据")
+            # 返回格式：[{"day":"2024-01-02","open":"1715.000","high":"...","low":"...","close":"...","volume":"3215500"}, ...]
+            rows = response.json()
+            if not rows:
+                raise DataFetchError(f"新浪K线API未找到股票 {stock_code} 的数据")
 
-            # 解析新浪数据
-            quote = self._parse_sina_data(content, stock_code)
-            if not quote:
-                raise DataFetchError(f"新浪API数据解析失败")
-
-            # 构造DataFrame（模拟历史数据格式）
-            today = datetime.now().strftime('%Y-%m-%d')
-            df_data = {
-                'date': [today],
-                'open': [quote.open_price],
-                'high': [quote.high],
-                'low': [quote.low],
-                'close': [quote.price],
-                'volume': [quote.volume],
-                'amount': [quote.amount],
-                'pct_chg': [quote.change_pct],
-            }
-
-            df = pd.DataFrame(df_data)
-
-            logger.info(f"[API返回] 新浪财经 成功: {stock_code} 价格={quote.price}, 耗时 {api_elapsed:.3f}s")
+            df = pd.DataFrame.from_records(rows).rename(columns={'day': 'date'})
+            df = df.reindex(columns=['date', 'open', 'high', 'low', 'close', 'volume'])
+            df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].apply(
+                pd.to_numeric, errors='coerce'
+            )
+            df['pct_chg'] = (df['close'].pct_change() * 100).round(2)
+
+            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)].reset_index(drop=True)
+
+            logger.info(f"[API返回] 新浪财经日K线 成功: {stock_code} 共 {len(df)} 条, 耗时 {api_elapsed:.3f}s")
             return df
 
+        except DataFetchError:
+            raise
         except Exception as e:
             error_msg = str(e).lower()
 
@@ -386,24 +372,14 @@ class SinaFetcher(BaseFetcher):
                 logger.warning(f"检测到可能被封禁: {e}")
                 raise RateLimitError(f"新浪API可能被限流: {e}") from e
 
-            raise DataFetchError(f"新浪API获取数据失败: {e}") from e
+            raise DataFetchError(f"新浪K线API获取数据失败: {e}") from e
 
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
         标准化新浪数据
 
-        新浪返回的数据已经是标准格式，只需要添加股票代码
+        新浪返回的数据已经是标准格式（股票代码列由 build_daily_frame 补充）
         """
-        df = df.copy()
-
-        # 添加股票代码列
-        df['code'] = stock_code
-
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
-
         return df
 
     def get_realtime_quote(self, stock_code: str) -> Optional[SinaRealtimeQuote]:
@@ -418,16 +394,10 @@ class SinaFetcher(BaseFetcher):
         """
         try:
             # 检查缓存
-            current_time = time.time()
-            cache_key = stock_code
-
-            if (
-                cache_key in _realtime_cache['data']
-                and current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']
-            ):
-                quote_data = _realtime_cache['data'][cache_key]
+            cached = _realtime_cache.get(stock_code)
+            if cached is not None:
                 logger.debug(f"[缓存命中] 使用缓存的 {stock_code} 实时行情数据")
-                return SinaRealtimeQuote(**quote_data)
+                return cached[stock_code] if isinstance(cached, QuoteBatch) else cached
 
             # 防封禁策略
             self._set_random_user_agent()
@@ -437,16 +407,14 @@ class SinaFetcher(BaseFetcher):
             sina_code = self._convert_stock_code(stock_code)
 
             logger.info(f"[API调用] 新浪实时行情: {sina_code}")
-            import time as _time
-
-            api_start = _time.time()
+            api_start = time.time()
 
             # 调用新浪实时行情API
             url = f"http://hq.sinajs.cn/list={sina_code}"
             response = self.session.get(url, timeout=5)
             response.raise_for_status()
 
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
 
             # 解析返回数据
             content = response.text.strip()
@@ -461,8 +429,7 @@ class SinaFetcher(BaseFetcher):
                 return None
 
             # 更新缓存
-            _realtime_cache['data'][cache_key] = quote.to_dict()
-            _realtime_cache['timestamp'] = current_time
+            _realtime_cache.set(stock_code, quote)
 
             logger.info(
                 f"[实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
@@ -474,7 +441,7 @@ class SinaFetcher(BaseFetcher):
             logger.error(f"[API错误] 获取 {stock_code} 实时行情失败: {e}")
             return None
 
-    def get_batch_realtime_quotes(self, stock_codes: List[str]) -> Dict[str, Optional[SinaRealtimeQuote]]:
+    def get_batch_realtime_quotes(self, stock_codes: List[str]) -> Mapping[str, Optional[SinaRealtimeQuote]]:
         """
         批量获取实时行情数据（新浪API优势功能）
 
@@ -484,23 +451,23 @@ class SinaFetcher(BaseFetcher):
             stock_codes: 股票代码列表
 
         Returns:
-            股票代码到行情数据的映射字典
+            股票代码到行情数据的映射（QuoteBatch：列式存储，行情对象在按代码访问时才创建）
         """
-        result = {}
-
         if not stock_codes:
-            return result
+            return {}
 
         # 分批处理，每批最多800只
         batch_size = 800
-        for i in range(0, len(stock_codes), batch_size):
-            batch_codes = stock_codes[i : i + batch_size]
-            batch_result = self._get_batch_quotes_single_request(batch_codes)
-            result.update(batch_result)
-
-        return result
-
-    def _get_batch_quotes_single_request(self, stock_codes: List[str]) -> Dict[str, Optional[SinaRealtimeQuote]]:
+        batches = [
+            self._get_batch_quotes_single_request(stock_codes[i : i + batch_size])
+            for i in range(0, len(stock_codes), batch_size)
+        ]
+        batch = QuoteBatch.concat(batches)
+        for stock_code in batch.codes:
+            _realtime_cache.set(stock_code, batch)
+        return batch
+
+    def _get_batch_quotes_single_request(self, stock_codes: List[str]) -> QuoteBatch:
         """
         单次批量请求获取实时行情
 
@@ -508,60 +475,46 @@ class SinaFetcher(BaseFetcher):
             stock_codes: 股票代码列表（最多800只）
 
         Returns:
-            股票代码到行情数据的映射字典
+            QuoteBatch（请求失败或未返回的股票对应 None）
         """
-        result = {}
+        # 新浪代码 -> 原始代码（按报文中的 hq_str_ 变量名对应，不依赖返回行的顺序）
+        symbols = {self._convert_stock_code(code): code for code in stock_codes}
 
         try:
             # 防封禁策略
             self._set_random_user_agent()
             self._enforce_rate_limit()
 
-            # 转换代码格式
-            sina_codes = [self._convert_stock_code(code) for code in stock_codes]
-            codes_str = ','.join(sina_codes)
+            codes_str = ','.join(symbols)
 
             logger.info(f"[API调用] 新浪批量实时行情: {len(stock_codes)} 只股票")
-            import time as _time
-
-            api_start = _time.time()
+            api_start = time.time()
 
             # 调用新浪批量实时行情API
             url = f"http://hq.sinajs.cn/list={codes_str}"
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
 
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
 
             # 解析返回数据
             content = response.text.strip()
             if not content:
                 logger.warning(f"[API返回] 新浪批量API返回空数据")
-                return result
+                return parse_sina_batch('', symbols, SinaRealtimeQuote)
 
-            # 按行分割，每行对应一只股票
-            lines = content.split('\n')
+            # 整段报文一次解析为列式结构
+            batch = parse_sina_batch(content, symbols, SinaRealtimeQuote)
 
-            for i, line in enumerate(lines):
-                if i >= len(stock_codes):
-                    break
-
-                stock_code = stock_codes[i]
-                quote = self._parse_sina_data(line, stock_code)
-                result[stock_code] = quote
-
-            success_count = sum(1 for v in result.values() if v is not None)
             logger.info(
-                f"[批量行情] 新浪财经 成功: {success_count}/{len(stock_codes)} 只股票, " f"耗时 {api_elapsed:.3f}s"
+                f"[批量行情] 新浪财经 成功: {batch.valid_count}/{len(stock_codes)} 只股票, " f"耗时 {api_elapsed:.3f}s"
             )
+            return batch
 
         except Exception as e:
             logger.error(f"[API错误] 新浪批量获取实时行情失败: {e}")
             # 失败时为所有股票返回None
-            for code in stock_codes:
-                result[code] = None
-
-        return result
+            return parse_sina_batch('', symbols, SinaRealtimeQuote)
 
     def get_enhanced_data(self, stock_code: str, days: int = 60) -> Dict[str, Any]:
         """
@@ -569,7 +522,7 @@ class SinaFetcher(BaseFetcher):
 
         Args:
             stock_code: 股票代码
-            days: 历史数据天数（新浪API主要提供实时数据）
+            days: 历史数据天数
 
         Returns:
             包含所有数据的字典
@@ -583,9 +536,9 @@ class SinaFetcher(BaseFetcher):
         # 获取实时行情（主要数据）
         result['realtime_quote'] = self.get_realtime_quote(stock_code)
 
-        # 尝试获取简单的日线数据
+        # 获取日线数据
         try:
-            df = self.get_daily_data(stock_code, days=1)  # 只获取当日数据
+            df = self.get_daily_data(stock_code, days=days)
             result['daily_data'] = df
         except Exception as e:
             logger.warning(f"获取 {stock_code} 日线数据失败: {e}")
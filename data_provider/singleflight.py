@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+请求合并（Single-Flight）
+===================================
+
+职责：
+1. 同一资源（key）同一时刻只发起一次真实请求
+2. 并发到达的其他调用方等待这次请求完成，共享其结果（或异常）
+3. 请求结束后立即释放 key，下一次调用重新发起请求（结果缓存交给 TTLCache）
+
+典型场景：
+线程池中多个 worker 同时发现全市场行情表缓存失效，
+如果各自下载会重复拉取 5000+ 行数据；合并后只下载一次。
+
+使用方式：
+    _flight = SingleFlight(name='akshare')
+
+    df = _flight.do('stock_zh_a_spot_em', ak.stock_zh_a_spot_em)
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """一次进行中的请求"""
+
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    请求合并器（线程安全）
+
+    - do(key, fn): 若 key 已有进行中的请求，则等待并返回其结果；
+      否则由当前线程执行 fn，并把结果分发给所有等待者
+    - fn 抛出的异常同样分发给所有等待者
+    """
+
+    def __init__(self, name: str = "flight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+        self.executed = 0  # 实际执行次数
+        self.coalesced = 0  # 被合并（共享结果）的调用次数
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        执行（或加入）key 对应的请求
+
+        Args:
+            key: 资源标识（如行情表名称、('stock_cyq_em', code)）
+            fn: 实际发起请求的函数
+            *args, **kwargs: 传给 fn 的参数
+
+        Returns:
+            fn 的返回值（等待者获得同一个对象）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"[请求合并] {self.name}:{key} 等待进行中的请求")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+            if call.waiters:
+                logger.debug(f"[请求合并] {self.name}:{key} 结果已共享给 {call.waiters} 个调用方")
+
+    def in_flight(self, key: Hashable) -> bool:
+        """key 是否有进行中的请求"""
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> Dict[str, Any]:
+        """获取合并统计"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+            }
+
+
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    flight = SingleFlight(name='demo')
+
+    def slow_download():
+        time.sleep(0.5)
+        return 'spot-table'
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, 'spot', slow_download) for _ in range(3)]
+        print([f.result() for f in futures])
+
+    print(flight.stats())  # executed=1, coalesced=2
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全市场行情表索引
+===================================
+
+职责：
+1. 每次刷新行情表后，一次性转换为按代码索引的列式结构
+   （每个数值字段一个 float64 数组 + 代码到行号的字典）
+2. 单只股票查询 O(1)，不再对整张 DataFrame 做布尔过滤
+3. 支持按代码列表一次取出多列向量，用于批量筛选
+
+使用方式：
+    table = SpotTable(df, columns={'price': '最新价', 'change_pct': '涨跌幅'})
+    row = table.row('600519')                 # {'name': '贵州茅台', 'price': ..., ...}
+    vecs = table.take(['600519', '000001'])   # {'price': array([...]), ...}
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class SpotTable:
+    """
+    按代码索引的列式行情表（构建后只读，可在线程间共享）
+
+    Attributes:
+        frame: 原始行情表 DataFrame（不复制，供需要完整列的调用方复用）
+        codes: 代码列表（与数组行号一一对应）
+    """
+
+    def __init__(
+        self,
+        df: Optional[pd.DataFrame],
+        columns: Dict[str, str],
+        code_col: str = '代码',
+        name_col: str = '名称',
+    ):
+        """
+        构建索引
+
+        Args:
+            df: 原始行情表
+            columns: 字段名 -> 行情表列名 的映射（字段名与 RealtimeQuote 字段一致）
+            code_col: 代码列名
+            name_col: 名称列名
+        """
+        if df is None or df.empty or code_col not in df.columns:
+            df = pd.DataFrame() if df is None else df
+            self.frame = df
+            self.codes: List[str] = []
+            self.names: List[str] = []
+            self._index: Dict[str, int] = {}
+            self._arrays: Dict[str, np.ndarray] = {field: np.empty(0) for field in columns}
+            return
+
+        n = len(df)
+        self.frame = df
+        self.codes = df[code_col].astype(str).tolist()
+        self.names = df[name_col].fillna('').astype(str).tolist() if name_col in df.columns else [''] * n
+
+        # 代码重复时保留第一行（与原先 df[df['代码'] == code].iloc[0] 的行为一致）
+        self._index = {}
+        for i, code in enumerate(self.codes):
+            self._index.setdefault(code, i)
+
+        self._arrays = {}
+        for field, col in columns.items():
+            if col in df.columns:
+                self._arrays[field] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                self._arrays[field] = np.full(n, np.nan)
+
+    @property
+    def empty(self) -> bool:
+        return not self._index
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._arrays)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def row(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        获取单只股票的全部字段（O(1)）
+
+        Args:
+            code: 代码
+
+        Returns:
+            {'name': 名称, 字段名: 数值...}，缺失值为 0.0；代码不存在返回 None
+        """
+        i = self._index.get(code)
+        if i is None:
+            return None
+
+        result: Dict[str, Any] = {'name': self.names[i]}
+        for field, arr in self._arrays.items():
+            value = arr[i]
+            result[field] = 0.0 if np.isnan(value) else float(value)
+        return result
+
+    def column(self, field: str) -> np.ndarray:
+        """获取整列数组（只读视图，缺失值为 NaN）"""
+        return self._arrays[field]
+
+    def take(self, codes: Iterable[str], fields: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        按代码列表一次取出多列向量
+
+        Args:
+            codes: 代码列表
+            fields: 字段列表（默认全部字段）
+
+        Returns:
+            字段名 -> 与 codes 等长的数组；不存在的代码对应 NaN，
+            另含 'found' 布尔数组标记代码是否存在
+        """
+        positions = np.fromiter((self._index.get(code, -1) for code in codes), dtype=np.int64)
+        found = positions >= 0
+        safe_positions = np.where(found, positions, 0)
+
+        result: Dict[str, np.ndarray] = {'found': found}
+        for field in fields or self._arrays:
+            arr = self._arrays[field]
+            values = arr[safe_positions] if len(arr) else np.full(len(positions), np.nan)
+            result[field] = np.where(found, values, np.nan)
+        return result
@@ -10,12 +10,14 @@ TencentFetcher - 超快数据源 (Priority 0)
 
 接口说明：
 - 实时行情：http://qt.gtimg.cn/q=sz000858
+- 批量行情：http://qt.gtimg.cn/q=sz000858,sh600519,...（每次 60 只，整段报文列式解析）
 - 资金流向：http://qt.gtimg.cn/q=ff_sz000858
 - 盘口分析：http://qt.gtimg.cn/q=s_pksz000858
 - 简要信息：http://qt.gtimg.cn/q=s_sz000858
+- 日K线：https://web.ifzq.gtimg.cn/appstock/app/fqkline/get?param=sz000858,day,开始,结束,条数,qfq
 
 防封禁策略：
-1. 每次请求前随机休眠 0.1-0.5 秒
+1. 按数据源共享的令牌桶限速（默认 3 次/秒，突发 3）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 """
@@ -24,7 +26,7 @@ import logging
 import time
 import random
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Mapping
 import requests
 import pandas as pd
 from dataclasses import dataclass
@@ -36,10 +38,21 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, RateLimitError, create_http_session
+from .cache import TTLCache
+from .quote_parser import QuoteBatch, parse_tencent_batch
+from .trading_calendar import weekdays_between
 
 logger = logging.getLogger(__name__)
 
+# 日K线接口（fqkline，支持前复权），单次最多返回约 2000 根
+KLINE_URL = "https://web.ifzq.gtimg.cn/appstock/app/fqkline/get"
+KLINE_MAX_BARS = 2000
+
+# 实时行情批量查询：q= 后以逗号拼接多个代码
+QUOTE_URL = "http://qt.gtimg.cn/q="
+QUOTE_BATCH_SIZE = 60
+
 
 @dataclass
 class TencentRealtimeQuote:
@@ -106,8 +119,9 @@ USER_AGENTS = [
 ]
 
 
-# 缓存实时行情数据（避免重复请求）
-_realtime_cache: Dict[str, Any] = {'data': {}, 'timestamp': 0, 'ttl': 30}  # 30秒缓存有效期
+# 缓存实时行情数据（避免重复请求）：每只股票独立过期，超出上限按 LRU 淘汰
+# 值为整批 QuoteBatch（每个代码一个条目），行情对象在读取时才创建
+_realtime_cache = TTLCache(ttl=30, max_entries=6000, name='tencent_realtime')
 
 
 class TencentFetcher(BaseFetcher):
@@ -119,11 +133,13 @@ class TencentFetcher(BaseFetcher):
 
     主要 API：
     - 实时行情：http://qt.gtimg.cn/q={market_code}
+    - 批量行情：http://qt.gtimg.cn/q={market_code},{market_code},...
     - 资金流向：http://qt.gtimg.cn/q=ff_{market_code}
     - 盘口分析：http://qt.gtimg.cn/q=s_pk{market_code}
+    - 日K线（前复权）：fqkline/get?param={market_code},day,{start},{end},{count},qfq
 
     关键策略：
-    - 每次请求前随机休眠 0.1-0.5 秒（极快）
+    - 令牌桶限速（进程内按数据源共享，默认 3 次/秒，突发 3）
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -131,18 +147,14 @@ class TencentFetcher(BaseFetcher):
     name = "TencentFetcher"
     priority = 0  # 最高优先级，专门用于快速模式
 
-    def __init__(self, sleep_min: float = 0.1, sleep_max: float = 0.5):
+    def __init__(self):
         """
         初始化 TencentFetcher
 
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
+        流控由按数据源共享的令牌桶负责（见 rate_limiter.py）；
+        Session 带按并发数设置的连接池，通过 DataFetcherManager.get() 复用单例时保持 keep-alive
         """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
-        self.session = requests.Session()
+        self.session = create_http_session()
 
     def _set_random_user_agent(self) -> None:
         """
@@ -158,27 +170,6 @@ class TencentFetcher(BaseFetcher):
         except Exception as e:
             logger.debug(f"设置 User-Agent 失败: {e}")
 
-    def _enforce_rate_limit(self) -> None:
-        """
-        强制执行速率限制
-
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
-        """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
-
     def _convert_stock_code(self, stock_code: str) -> str:
         """
         转换股票代码为腾讯格式
@@ -219,93 +210,73 @@ class TencentFetcher(BaseFetcher):
     )
     def _fetch_raw_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
         """
-        从腾讯获取原始数据
+        从腾讯获取原始日K线数据（前复权）
 
-        注意：腾讯API主要提供实时数据，历史数据需要通过实时数据模拟
-        这里我们获取实时数据并构造简单的历史数据格式
+        K线接口按日期区间 + 最大条数返回，起始日期向前多取几天，
+        用前一根K线计算首日涨跌幅后再按 [start_date, end_date] 过滤
 
         流程：
         1. 设置随机 User-Agent
-        2. 执行速率限制（随机休眠）
-        3. 调用腾讯实时行情API
-        4. 处理返回数据
+        2. 执行速率限制（令牌桶）
+        3. 调用腾讯日K线API
+        4. 整表解析返回的 JSON
         """
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         # 转换代码格式
         tencent_code = self._convert_stock_code(stock_code)
 
-        logger.info(f"[API调用] 腾讯股票实时行情: {tencent_code}")
+        # 多取约两周，保证区间前至少有一根K线用于计算涨跌幅
+        query_start = (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=14)).strftime('%Y-%m-%d')
+        # 请求条数只是上限，按工作日估算即可（节假日多出的条数不影响结果）
+        count = weekdays_between(
+            datetime.strptime(query_start, '%Y-%m-%d').date(), datetime.strptime(end_date, '%Y-%m-%d').date()
+        )
+        count = max(2, min(count + 2, KLINE_MAX_BARS))
 
-        try:
-            import time as _time
+        logger.info(f"[API调用] 腾讯股票日K线: {tencent_code}, {query_start} ~ {end_date}")
 
-            api_start = _time.time()
+        try:
+            api_start = time.time()
 
-            # 调用腾讯实时行情API
-            url = f"http://qt.gtimg.cn/q={tencent_code}"
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(
+                KLINE_URL,
+                params={'param': f"{tencent_code},day,{query_start},{end_date},{count},qfq"},
+                timeout=10,
+            )
             response.raise_for_status()
 
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
 
-            # 解析返回数据
-            content = response.text.strip()
-            if not content or 'pv_none_match' in content:
-                raise DataFetchError(f"腾讯API未找到股票 {stock_code} 的数据")
-
-            # 腾讯返回格式：v_sh600519="1~贵州茅台~600519~1850.00~1860.00~1840.00~..."
-            if '="' not in content:
-                raise DataFetchError(f"腾讯API返回数据格式异常: {content[:100]}")
-
-            # 提取数据部分
-            data_part = content.split('="')[1].rstrip('";')
-            fields = data_part.split('~')
-
-            if len(fields) < 20:
-                raise DataFetchError(f"腾讯API返回字段不足: {len(fields)} < 20")
-
-            # 解析字段（腾讯API字段说明）
-            # 0:未知 1:名称 2:代码 3:当前价格 4:昨收 5:今开 6:成交量(手) 7:外盘 8:内盘
-            # 9:买一 10:买一量 11:买二 12:买二量 ... 18:最高 19:最低 20:成交量 21:成交额
-            # 22:买二量 23:买二 24:买三量 25:买三 26:买四量 27:买四 28:买五量 29:买五
-            # 30:卖一量 31:卖一 32:卖二量 33:卖二 34:卖三量 35:卖三 36:卖四量 37:卖四 38:卖五量 39:卖五
-            # 40:最近逐笔成交 41:时间 42:涨跌 43:涨跌% 44:最高 45:最低 46:价格/成交量(手)/成交额
-            # 47:成交量(手) 48:成交额(万) 49:换手率 50:市盈率 51:? 52:最高 53:最低 54:振幅
-
-            current_price = float(fields[3]) if fields[3] else 0.0
-            pre_close = float(fields[4]) if fields[4] else 0.0
-            open_price = float(fields[5]) if fields[5] else 0.0
-            volume = int(float(fields[6]) * 100) if fields[6] else 0  # 手转股
-            high = float(fields[18]) if len(fields) > 18 and fields[18] else current_price
-            low = float(fields[19]) if len(fields) > 19 and fields[19] else current_price
-            amount = float(fields[21]) * 10000 if len(fields) > 21 and fields[21] else 0.0  # 万元转元
-            change_pct = float(fields[43]) if len(fields) > 43 and fields[43] else 0.0
-            turnover_rate = float(fields[49]) if len(fields) > 49 and fields[49] else 0.0
-            pe_ratio = float(fields[50]) if len(fields) > 50 and fields[50] else 0.0
-
-            # 构造DataFrame（模拟历史数据格式）
-            today = datetime.now().strftime('%Y-%m-%d')
-            df_data = {
-                'date': [today],
-                'open': [open_price],
-                'high': [high],
-                'low': [low],
-                'close': [current_price],
-                'volume': [volume],
-                'amount': [amount],
-                'pct_chg': [change_pct],
-            }
+            # 返回格式：{"code":0,"data":{"sh600519":{"qfqday":[["2024-01-02","1715.00","1685.01",...], ...]}}}
+            # 每行字段：日期 开盘 收盘 最高 最低 成交量(手)，部分行附带 除权信息 换手率 成交额(万元) 等额外字段
+            payload = response.json()
+            stock_data = (payload.get('data') or {}).get(tencent_code) or {}
+            rows = stock_data.get('qfqday') or stock_data.get('day')
+            if not rows:
+                raise DataFetchError(f"腾讯K线API未找到股票 {stock_code} 的数据")
+
+            df = pd.DataFrame.from_records(
+                [row[:6] + [row[8] if len(row) > 8 else None] for row in rows],
+                columns=['date', 'open', 'close', 'high', 'low', 'volume', 'amount'],
+            )
+            numeric = ['open', 'close', 'high', 'low', 'volume', 'amount']
+            df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce')
+            df['volume'] = df['volume'] * 100  # 手转股
+            df['amount'] = self._fill_amount(df)
+            df['pct_chg'] = (df['close'].pct_change() * 100).round(2)
 
-            df = pd.DataFrame(df_data)
+            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)].reset_index(drop=True)
 
-            logger.info(f"[API返回] 腾讯股票 成功: {stock_code} 价格={current_price}, 耗时 {api_elapsed:.2f}s")
+            logger.info(f"[API返回] 腾讯股票日K线 成功: {stock_code} 共 {len(df)} 条, 耗时 {api_elapsed:.2f}s")
             return df
 
+        except DataFetchError:
+            raise
         except Exception as e:
             error_msg = str(e).lower()
 
@@ -314,24 +285,27 @@ class TencentFetcher(BaseFetcher):
                 logger.warning(f"检测到可能被封禁: {e}")
                 raise RateLimitError(f"腾讯API可能被限流: {e}") from e
 
-            raise DataFetchError(f"腾讯API获取数据失败: {e}") from e
+            raise DataFetchError(f"腾讯K线API获取数据失败: {e}") from e
 
-    def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+    @staticmethod
+    def _fill_amount(df: pd.DataFrame) -> pd.Series:
         """
-        标准化腾讯数据
+        计算成交额（元）
 
-        腾讯返回的数据已经是标准格式，只需要添加股票代码
+        使用K线附带的成交额字段（万元），其隐含均价须落在当日最高/最低价附近；
+        字段缺失或不可信时记为 NaN（入库为 NULL），不写入估算值，避免与真实成交额混淆
         """
-        df = df.copy()
-
-        # 添加股票代码列
-        df['code'] = stock_code
+        amount = df['amount'] * 10000  # 万元转元
+        avg_price = amount / df['volume'].where(df['volume'] > 0)
+        valid = (avg_price >= df['low'] * 0.9) & (avg_price <= df['high'] * 1.1)
+        return amount.where(valid)
 
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
+    def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+        """
+        标准化腾讯数据
 
+        腾讯返回的数据已经是标准格式（股票代码列由 build_daily_frame 补充）
+        """
         return df
 
     def get_realtime_quote(self, stock_code: str) -> Optional[TencentRealtimeQuote]:
@@ -346,16 +320,10 @@ class TencentFetcher(BaseFetcher):
         """
         try:
             # 检查缓存
-            current_time = time.time()
-            cache_key = stock_code
-
-            if (
-                cache_key in _realtime_cache['data']
-                and current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']
-            ):
-                quote_data = _realtime_cache['data'][cache_key]
+            cached = _realtime_cache.get(stock_code)
+            if cached is not None:
                 logger.debug(f"[缓存命中] 使用缓存的 {stock_code} 实时行情数据")
-                return TencentRealtimeQuote(**quote_data)
+                return cached[stock_code]
 
             # 防封禁策略
             self._set_random_user_agent()
@@ -365,16 +333,14 @@ class TencentFetcher(BaseFetcher):
             tencent_code = self._convert_stock_code(stock_code)
 
             logger.info(f"[API调用] 腾讯实时行情: {tencent_code}")
-            import time as _time
-
-            api_start = _time.time()
+            api_start = time.time()
 
             # 调用腾讯实时行情API
-            url = f"http://qt.gtimg.cn/q={tencent_code}"
+            url = f"{QUOTE_URL}{tencent_code}"
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
 
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
 
             # 解析返回数据
             content = response.text.strip()
@@ -382,73 +348,14 @@ class TencentFetcher(BaseFetcher):
                 logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
                 return None
 
-            # 提取数据部分
-            data_part = content.split('="')[1].rstrip('";')
-            fields = data_part.split('~')
-
-            if len(fields) < 20:
-                logger.warning(f"[API返回] 腾讯API返回字段不足: {len(fields)} < 20")
+            batch = parse_tencent_batch(content, {tencent_code: stock_code}, TencentRealtimeQuote)
+            quote = batch[stock_code]
+            if quote is None:
+                logger.warning("[API返回] 腾讯API返回字段不足")
                 return None
 
-            # 安全获取字段值
-            def safe_float(idx, default=0.0):
-                try:
-                    if idx < len(fields) and fields[idx]:
-                        return float(fields[idx])
-                    return default
-                except:
-                    return default
-
-            def safe_int(idx, default=0):
-                try:
-                    if idx < len(fields) and fields[idx]:
-                        return int(float(fields[idx]))
-                    return default
-                except:
-                    return default
-
-            # 解析关键字段
-            name = fields[1] if len(fields) > 1 else ""
-            current_price = safe_float(3)
-            pre_close = safe_float(4)
-            open_price = safe_float(5)
-            volume = safe_int(6) * 100  # 手转股
-            high = safe_float(18, current_price)
-            low = safe_float(19, current_price)
-            amount = safe_float(21) * 10000  # 万元转元
-            change_amount = safe_float(42)
-            change_pct = safe_float(43)
-            turnover_rate = safe_float(49)
-            pe_ratio = safe_float(50)
-
-            # 计算振幅
-            amplitude = 0.0
-            if pre_close > 0:
-                amplitude = ((high - low) / pre_close) * 100
-
-            quote = TencentRealtimeQuote(
-                code=stock_code,
-                name=name,
-                price=current_price,
-                change_pct=change_pct,
-                change_amount=change_amount,
-                volume=volume,
-                amount=amount,
-                turnover_rate=turnover_rate,
-                amplitude=amplitude,
-                high=high,
-                low=low,
-                open_price=open_price,
-                pre_close=pre_close,
-                pe_ratio=pe_ratio,
-                pb_ratio=0.0,  # 腾讯API不直接提供PB
-                total_mv=0.0,  # 需要额外计算
-                circulation_mv=0.0,  # 需要额外计算
-            )
-
             # 更新缓存
-            _realtime_cache['data'][cache_key] = quote.to_dict()
-            _realtime_cache['timestamp'] = current_time
+            _realtime_cache.set(stock_code, batch)
 
             logger.info(
                 f"[实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
@@ -460,6 +367,65 @@ class TencentFetcher(BaseFetcher):
             logger.error(f"[API错误] 获取 {stock_code} 实时行情失败: {e}")
             return None
 
+    def get_batch_realtime_quotes(self, stock_codes: List[str]) -> Mapping[str, Optional[TencentRealtimeQuote]]:
+        """
+        批量获取实时行情数据
+
+        腾讯接口支持 q=sh600519,sz000001,... 一次查询多只股票，按 QUOTE_BATCH_SIZE 分批请求
+
+        Args:
+            stock_codes: 股票代码列表
+
+        Returns:
+            股票代码到行情数据的映射（QuoteBatch：列式存储，行情对象在按代码访问时才创建）
+        """
+        if not stock_codes:
+            return {}
+
+        batches = [
+            self._get_batch_quotes_single_request(stock_codes[i : i + QUOTE_BATCH_SIZE])
+            for i in range(0, len(stock_codes), QUOTE_BATCH_SIZE)
+        ]
+        batch = QuoteBatch.concat(batches)
+        for stock_code in batch.codes:
+            _realtime_cache.set(stock_code, batch)
+        return batch
+
+    def _get_batch_quotes_single_request(self, stock_codes: List[str]) -> QuoteBatch:
+        """
+        单次批量请求获取实时行情
+
+        Args:
+            stock_codes: 股票代码列表（最多 QUOTE_BATCH_SIZE 只）
+
+        Returns:
+            QuoteBatch（请求失败或未返回的股票对应 None）
+        """
+        symbols = {self._convert_stock_code(code): code for code in stock_codes}
+
+        try:
+            self._set_random_user_agent()
+            self._enforce_rate_limit()
+
+            logger.info(f"[API调用] 腾讯批量实时行情: {len(stock_codes)} 只股票")
+            api_start = time.time()
+
+            response = self.session.get(f"{QUOTE_URL}{','.join(symbols)}", timeout=10)
+            response.raise_for_status()
+
+            api_elapsed = time.time() - api_start
+
+            batch = parse_tencent_batch(response.text, symbols, TencentRealtimeQuote)
+
+            logger.info(
+                f"[批量行情] 腾讯财经 成功: {batch.valid_count}/{len(stock_codes)} 只股票, 耗时 {api_elapsed:.3f}s"
+            )
+            return batch
+
+        except Exception as e:
+            logger.error(f"[API错误] 腾讯批量获取实时行情失败: {e}")
+            return parse_tencent_batch('', symbols, TencentRealtimeQuote)
+
     def get_fundamental_data(self, stock_code: str) -> Dict[str, Any]:
         """
         获取基本面数据（从实时行情构造）
@@ -498,7 +464,7 @@ class TencentFetcher(BaseFetcher):
 
         Args:
             stock_code: 股票代码
-            days: 历史数据天数（腾讯API主要提供实时数据）
+            days: 历史数据天数
 
         Returns:
             包含所有数据的字典
@@ -512,9 +478,9 @@ class TencentFetcher(BaseFetcher):
         # 获取实时行情（主要数据）
         result['realtime_quote'] = self.get_realtime_quote(stock_code)
 
-        # 尝试获取简单的日线数据
+        # 获取日线数据
         try:
-            df = self.get_daily_data(stock_code, days=1)  # 只获取当日数据
+            df = self.get_daily_data(stock_code, days=days)
             result['daily_data'] = df
         except Exception as e:
             logger.warning(f"获取 {stock_code} 日线数据失败: {e}")
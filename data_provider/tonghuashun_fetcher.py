@@ -14,7 +14,7 @@ TonghuashunFetcher - 同花顺数据源 (Priority 0.5)
 - 资金流向：http://d.10jqka.com.cn/v2/fkline/hs_{code}/last.js
 
 防封禁策略：
-1. 每次请求前随机休眠 0.2-0.6 秒
+1. 按数据源共享的令牌桶限速（默认 2.5 次/秒，突发 2）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 """
@@ -37,7 +37,8 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, RateLimitError, create_http_session
+from .cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -107,8 +108,8 @@ USER_AGENTS = [
 ]
 
 
-# 缓存实时行情数据（避免重复请求）
-_realtime_cache: Dict[str, Any] = {'data': {}, 'timestamp': 0, 'ttl': 45}  # 45秒缓存有效期
+# 缓存实时行情数据（避免重复请求）：每只股票独立过期，超出上限按 LRU 淘汰
+_realtime_cache = TTLCache(ttl=45, max_entries=6000, name='tonghuashun_realtime')
 
 
 class TonghuashunFetcher(BaseFetcher):
@@ -124,7 +125,7 @@ class TonghuashunFetcher(BaseFetcher):
     - 资金流向：http://d.10jqka.com.cn/v2/fkline/hs_{code}/last.js
 
     关键策略：
-    - 每次请求前随机休眠 0.2-0.6 秒
+    - 令牌桶限速（进程内按数据源共享，默认 2.5 次/秒，突发 2）
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -132,18 +133,14 @@ class TonghuashunFetcher(BaseFetcher):
     name = "TonghuashunFetcher"
     priority = 0.5  # 高优先级，与腾讯数据源并列
 
-    def __init__(self, sleep_min: float = 0.2, sleep_max: float = 0.6):
+    def __init__(self):
         """
         初始化 TonghuashunFetcher
 
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
+        流控由按数据源共享的令牌桶负责（见 rate_limiter.py）；
+        Session 带按并发数设置的连接池，通过 DataFetcherManager.get() 复用单例时保持 keep-alive
         """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
-        self.session = requests.Session()
+        self.session = create_http_session()
 
     def _set_random_user_agent(self) -> None:
         """
@@ -168,27 +165,6 @@ class TonghuashunFetcher(BaseFetcher):
         except Exception as e:
             logger.debug(f"设置 User-Agent 失败: {e}")
 
-    def _enforce_rate_limit(self) -> None:
-        """
-        强制执行速率限制
-
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
-        """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
-
     def _convert_stock_code(self, stock_code: str) -> str:
         """
         转换股票代码为同花顺格式
@@ -231,14 +207,14 @@ class TonghuashunFetcher(BaseFetcher):
 
         流程：
         1. 设置随机 User-Agent
-        2. 执行速率限制（随机休眠）
+        2. 执行速率限制（令牌桶）
         3. 调用同花顺实时行情API
         4. 处理返回数据
         """
         # 防封禁策略 1: 随机 User-Agent
         self._set_random_user_agent()
 
-        # 防封禁策略 2: 强制休眠
+        # 防封禁策略 2: 令牌桶限速
         self._enforce_rate_limit()
 
         # 转换代码格式
@@ -247,16 +223,14 @@ class TonghuashunFetcher(BaseFetcher):
         logger.info(f"[API调用] 同花顺实时行情: {ths_code}")
 
         try:
-            import time as _time
-
-            api_start = _time.time()
+            api_start = time.time()
 
             # 调用同花顺实时行情API
             url = f"http://d.10jqka.com.cn/v6/line/{ths_code}/01/last.js"
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
 
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
 
             # 解析返回数据
             content = response.text.strip()
@@ -332,18 +306,8 @@ class TonghuashunFetcher(BaseFetcher):
         """
         标准化同花顺数据
 
-        同花顺返回的数据已经是标准格式，只需要添加股票代码
+        同花顺返回的数据已经是标准格式（股票代码列由 build_daily_frame 补充）
         """
-        df = df.copy()
-
-        # 添加股票代码列
-        df['code'] = stock_code
-
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
-
         return df
 
     def get_realtime_quote(self, stock_code: str) -> Optional[TonghuashunRealtimeQuote]:
@@ -358,16 +322,10 @@ class TonghuashunFetcher(BaseFetcher):
         """
         try:
             # 检查缓存
-            current_time = time.time()
-            cache_key = stock_code
-
-            if (
-                cache_key in _realtime_cache['data']
-                and current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']
-            ):
-                quote_data = _realtime_cache['data'][cache_key]
+            cached = _realtime_cache.get(stock_code)
+            if cached is not None:
                 logger.debug(f"[缓存命中] 使用缓存的 {stock_code} 实时行情数据")
-                return TonghuashunRealtimeQuote(**quote_data)
+                return cached
 
             # 防封禁策略
             self._set_random_user_agent()
@@ -377,16 +335,14 @@ class TonghuashunFetcher(BaseFetcher):
             ths_code = self._convert_stock_code(stock_code)
 
             logger.info(f"[API调用] 同花顺实时行情: {ths_code}")
-            import time as _time
-
-            api_start = _time.time()
+            api_start = time.time()
 
             # 调用同花顺实时行情API
             url = f"http://d.10jqka.com.cn/v6/line/{ths_code}/01/last.js"
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
 
-            api_elapsed = _time.time() - api_start
+            api_elapsed = time.time() - api_start
 
             # 解析返回数据
             content = response.text.strip()
@@ -470,8 +426,7 @@ class TonghuashunFetcher(BaseFetcher):
             )
 
             # 更新缓存
-            _realtime_cache['data'][cache_key] = quote.to_dict()
-            _realtime_cache['timestamp'] = current_time
+            _realtime_cache.set(stock_code, quote)
 
             logger.info(
                 f"[实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股交易日历
+===================================
+
+职责：
+1. 判断某天是否为 A 股交易日（周末 + 内置休市表 + 数据库历史）
+2. 查询"最近一个交易日"、"最近一个已收盘的交易日"、前后交易日
+3. 统计两个日期之间的交易日数，用于增量拉取的断档判断
+
+日历来源：
+- 内置休市表 _BUNDLED_HOLIDAYS：交易所公布的工作日休市日期（不含周末）
+- AkShare 交易日历（tool_trade_date_hist_sina）：当年不在内置表中时，
+  从已公布的整年交易日推算休市日期（akshare 不可用时跳过）
+- 数据库历史：以上都未覆盖的年份，以 stock_daily 中出现过的日期为交易日，
+  落在历史区间内却没有任何K线的工作日视为休市；历史区间之后的工作日按交易日处理，
+  并对该年份输出一次警告（内置表需要更新）
+
+本模块不访问数据库：历史K线日期由应用层（main.py）读取后传给 from_history，
+构建好的日历通过 set_trading_calendar 供进程内其他模块共享
+
+使用方式：
+    calendar = get_trading_calendar()
+    calendar.is_trading_day(date(2026, 10, 1))        # False（国庆）
+    calendar.last_completed_trading_day()             # 收盘前返回上一交易日
+"""
+
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+# A 股收盘时间（北京时间）
+MARKET_CLOSE_TIME = time(15, 0)
+
+_TZ_CN = timezone(timedelta(hours=8))
+
+
+def _days(year: int, month: int, *days: int) -> Set[date]:
+    return {date(year, month, d) for d in days}
+
+
+# 交易所公布的休市安排中落在工作日的日期（周末本身即休市，不再列出）
+_BUNDLED_HOLIDAYS: Dict[int, FrozenSet[date]] = {
+    2024: frozenset(
+        _days(2024, 1, 1)
+        | _days(2024, 2, 9, 12, 13, 14, 15, 16)  # 春节
+        | _days(2024, 4, 4, 5)  # 清明
+        | _days(2024, 5, 1, 2, 3)  # 劳动节
+        | _days(2024, 6, 10)  # 端午
+        | _days(2024, 9, 16, 17)  # 中秋
+        | _days(2024, 10, 1, 2, 3, 4, 7)  # 国庆
+    ),
+    2025: frozenset(
+        _days(2025, 1, 1, 28, 29, 30, 31)  # 元旦、春节
+        | _days(2025, 2, 3, 4)
+        | _days(2025, 4, 4)  # 清明
+        | _days(2025, 5, 1, 2, 5)  # 劳动节
+        | _days(2025, 6, 2)  # 端午
+        | _days(2025, 10, 1, 2, 3, 6, 7, 8)  # 国庆、中秋
+    ),
+    2026: frozenset(
+        _days(2026, 1, 1, 2)  # 元旦
+        | _days(2026, 2, 16, 17, 18, 19, 20, 23)  # 春节
+        | _days(2026, 4, 6)  # 清明
+        | _days(2026, 5, 1, 4, 5)  # 劳动节
+        | _days(2026, 6, 19)  # 端午
+        | _days(2026, 9, 25)  # 中秋
+        | _days(2026, 10, 1, 2, 5, 6, 7)  # 国庆
+    ),
+}
+
+
+def china_now() -> datetime:
+    """当前北京时间（不依赖服务器时区）"""
+    return datetime.now(_TZ_CN).replace(tzinfo=None)
+
+
+def _fetch_published_holidays() -> Dict[int, FrozenSet[date]]:
+    """
+    从 AkShare 交易日历（新浪 tool_trade_date_hist_sina）推算工作日休市日期
+
+    只采用交易日已公布到 12 月的整年（交易所通常在前一年底公布全年安排）
+
+    Returns:
+        年份 -> 工作日休市日期；akshare 不可用或请求失败时返回空字典
+    """
+    try:
+        import akshare as ak
+
+        df = ak.tool_trade_date_hist_sina()
+        trading_days: Set[date] = set()
+        for value in df['trade_date']:
+            if isinstance(value, datetime):
+                value = value.date()
+            elif not isinstance(value, date):
+                value = datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+            trading_days.add(value)
+    except Exception as e:
+        logger.warning(f"[交易日历] 获取 AkShare 交易日历失败: {e}")
+        return {}
+
+    result: Dict[int, FrozenSet[date]] = {}
+    for year in {d.year for d in trading_days}:
+        if not any(d.year == year and d.month == 12 for d in trading_days):
+            continue
+        day, holidays = date(year, 1, 1), set()
+        while day.year == year:
+            if day.weekday() < 5 and day not in trading_days:
+                holidays.add(day)
+            day += timedelta(days=1)
+        result[year] = frozenset(holidays)
+
+    logger.info(f"[交易日历] 已从 AkShare 补充休市安排: {sorted(result)}")
+    return result
+
+
+def weekdays_between(start: date, end: date) -> int:
+    """
+    区间 (start, end] 内的工作日数
+
+    交易日数的上界，无需日历；用于估算K线接口的请求条数（多取的K线按日期过滤掉即可）
+    """
+    days = (end - start).days
+    if days <= 0:
+        return 0
+    full_weeks, extra = divmod(days, 7)
+    count = full_weeks * 5
+    for offset in range(1, extra + 1):
+        if (start + timedelta(days=offset)).weekday() < 5:
+            count += 1
+    return count
+
+
+class TradingCalendar:
+    """
+    A 股交易日历（构建后只读，可在线程间共享；仅记录已警告的年份）
+    """
+
+    def __init__(
+        self,
+        holidays: Optional[Dict[int, Iterable[date]]] = None,
+        trading_days: Iterable[date] = (),
+    ):
+        """
+        Args:
+            holidays: 年份 -> 工作日休市日期（默认使用内置休市表）
+            trading_days: 已知交易日（通常来自数据库历史K线日期）
+        """
+        source = _BUNDLED_HOLIDAYS if holidays is None else holidays
+        self._holidays: Dict[int, FrozenSet[date]] = {year: frozenset(days) for year, days in source.items()}
+        # 旧版本曾把非交易日的实时快照按当天日期入库，周末日期一律忽略
+        self._trading_days: FrozenSet[date] = frozenset(d for d in trading_days if d.weekday() < 5)
+
+        # 内置表未覆盖的年份：历史区间内没有K线的工作日视为休市
+        self._history_start = min(self._trading_days) if self._trading_days else None
+        self._history_end = max(self._trading_days) if self._trading_days else None
+        # 已警告过休市表缺失的年份（每个年份只警告一次）
+        self._warned_years: Set[int] = set()
+
+    @classmethod
+    def from_history(
+        cls, trading_days: Iterable[date] = (), holidays: Optional[Dict[int, Iterable[date]]] = None
+    ) -> 'TradingCalendar':
+        """
+        结合已有的K线日期构建日历
+
+        当年不在休市表中时，先尝试从 AkShare 交易日历补充
+
+        Args:
+            trading_days: 已知交易日（通常为 DatabaseManager.get_trading_dates() 的结果）
+            holidays: 年份 -> 工作日休市日期（默认使用内置休市表）
+        """
+        source = dict(_BUNDLED_HOLIDAYS if holidays is None else holidays)
+        if china_now().year not in source:
+            source = {**_fetch_published_holidays(), **source}
+
+        return cls(holidays=source, trading_days=trading_days)
+
+    def is_trading_day(self, day: date) -> bool:
+        """是否为交易日"""
+        if isinstance(day, datetime):
+            day = day.date()
+
+        if day.weekday() >= 5:
+            return False
+
+        holidays = self._holidays.get(day.year)
+        if holidays is not None:
+            return day not in holidays
+
+        # 内置表未覆盖：以历史K线为准，落在历史区间内却没有K线的工作日视为休市
+        if day in self._trading_days:
+            return True
+        if self._history_start is not None and self._history_start <= day <= self._history_end:
+            return False
+        if day.year not in self._warned_years and (not self._holidays or day.year > max(self._holidays)):
+            self._warned_years.add(day.year)
+            logger.warning(f"[交易日历] {day.year} 年休市安排未收录，工作日均按交易日处理，请更新 _BUNDLED_HOLIDAYS")
+        return True
+
+    def previous_trading_day(self, day: date) -> date:
+        """严格早于 day 的最近一个交易日"""
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def next_trading_day(self, day: date) -> date:
+        """严格晚于 day 的最近一个交易日"""
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def latest_trading_day(self, day: Optional[date] = None) -> date:
+        """
+        不晚于 day 的最近一个交易日（day 本身是交易日时返回 day）
+
+        即 day 当天能看到的最新一根日K线的日期（盘中为未完成K线）
+        """
+        if day is None:
+            day = china_now().date()
+        return day if self.is_trading_day(day) else self.previous_trading_day(day)
+
+    def last_completed_trading_day(self, now: Optional[datetime] = None) -> date:
+        """
+        最近一个已收盘的交易日
+
+        Args:
+            now: 当前北京时间（默认取系统时间换算）
+
+        Returns:
+            交易日收盘（15:00）后为当天，否则为上一个交易日
+        """
+        if now is None:
+            now = china_now()
+        today = now.date()
+        if self.is_trading_day(today) and now.time() >= MARKET_CLOSE_TIME:
+            return today
+        return self.previous_trading_day(today)
+
+    def trading_days_between(self, start: date, end: date) -> int:
+        """
+        区间 (start, end] 内的交易日数
+
+        例如 start 为数据库最新日期、end 为今天时，即缺少的K线条数
+        """
+        count = 0
+        day = start + timedelta(days=1)
+        while day <= end:
+            if self.is_trading_day(day):
+                count += 1
+            day += timedelta(days=1)
+        return count
+
+    def __repr__(self) -> str:
+        years = ','.join(str(year) for year in sorted(self._holidays))
+        return f"<TradingCalendar(holiday_years={years}, history_days={len(self._trading_days)})>"
+
+
+_calendar: Optional[TradingCalendar] = None
+_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """
+    获取交易日历（进程内单例）
+
+    未通过 set_trading_calendar 注入时，首次调用按休市表构建（不含数据库历史）
+    """
+    global _calendar
+    if _calendar is not None:
+        return _calendar
+
+    with _calendar_lock:
+        if _calendar is None:
+            _calendar = TradingCalendar.from_history()
+            logger.debug(f"[交易日历] 已构建 {_calendar!r}")
+        return _calendar
+
+
+def set_trading_calendar(calendar: TradingCalendar) -> None:
+    """替换进程内的交易日历（应用层结合数据库历史构建后注入）"""
+    global _calendar
+    with _calendar_lock:
+        _calendar = calendar
+
+
+def reset_trading_calendar() -> None:
+    """丢弃已构建的日历（下次调用 get_trading_calendar 时重新构建）"""
+    global _calendar
+    with _calendar_lock:
+        _calendar = None
+
+
+if __name__ == "__main__":
+    calendar = TradingCalendar()
+    print(calendar)
+    print(f"2026-10-01 是交易日: {calendar.is_trading_day(date(2026, 10, 1))}")
+    print(f"2026-10-08 是交易日: {calendar.is_trading_day(date(2026, 10, 8))}")
+    print(f"最近已收盘交易日: {calendar.last_completed_trading_day()}")
+    print(f"2026-09-30 ~ 2026-10-09 交易日数: {calendar.trading_days_between(date(2026, 9, 30), date(2026, 10, 9))}")
@@ -12,12 +12,13 @@ TushareFetcher - 备用数据源 1 (Priority 2)
 1. 实现"每分钟调用计数器"
 2. 超过免费配额（80次/分）时，强制休眠到下一分钟
 3. 使用 tenacity 实现指数退避重试
+4. 批量模式：股票数超过阈值时按交易日拉取全市场截面（每个交易日 1 次调用，而不是每只股票 1 次）
 """
 
 import logging
 import time
 from datetime import datetime
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
 import pandas as pd
 from tenacity import (
@@ -28,11 +29,16 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError, DataSourceUnavailableError, RateLimitError, STANDARD_COLUMNS
+from .cache import TTLCache
+from .trading_calendar import get_trading_calendar
 from config import get_config
 
 logger = logging.getLogger(__name__)
 
+# 全市场单日截面缓存：已收盘交易日的数据不会变化，同一进程内重复批量请求直接复用
+_trade_date_cache = TTLCache(ttl=6 * 3600, max_entries=260, name='tushare_trade_date')
+
 
 class TushareFetcher(BaseFetcher):
     """
@@ -54,14 +60,16 @@ class TushareFetcher(BaseFetcher):
     name = "TushareFetcher"
     priority = 2
 
-    def __init__(self, rate_limit_per_minute: int = 80):
+    def __init__(self, rate_limit_per_minute: int = 80, bulk_threshold: Optional[int] = None):
         """
         初始化 TushareFetcher
 
         Args:
             rate_limit_per_minute: 每分钟最大请求数（默认80，Tushare免费配额）
+            bulk_threshold: 批量模式阈值（可选，默认从配置读取）
         """
         self.rate_limit_per_minute = rate_limit_per_minute
+        self.bulk_threshold = bulk_threshold if bulk_threshold is not None else get_config().tushare_bulk_threshold
         self._call_count = 0  # 当前分钟内的调用次数
         self._minute_start: Optional[float] = None  # 当前计数周期开始时间
         self._api: Optional[object] = None  # Tushare API 实例
@@ -189,7 +197,7 @@ class TushareFetcher(BaseFetcher):
         4. 调用 API 获取数据
         """
         if self._api is None:
-            raise DataFetchError("Tushare API 未初始化，请检查 Token 配置")
+            raise DataSourceUnavailableError("Tushare API 未初始化，请检查 Token 配置")
 
         # 速率限制检查
         self._check_rate_limit()
@@ -233,8 +241,6 @@ class TushareFetcher(BaseFetcher):
         需要映射到标准列名：
         date, open, high, low, close, volume, amount, pct_chg
         """
-        df = df.copy()
-
         # 列名映射
         column_mapping = {
             'trade_date': 'date',
@@ -256,16 +262,125 @@ class TushareFetcher(BaseFetcher):
         if 'amount' in df.columns:
             df['amount'] = df['amount'] * 1000
 
-        # 添加股票代码列
-        df['code'] = stock_code
+        return df
+
+    def _fetch_trade_date(self, trade_date: str) -> pd.DataFrame:
+        """
+        获取某个交易日全市场的日线截面（1 次 API 调用）
+
+        Args:
+            trade_date: 交易日，格式 'YYYYMMDD'
+
+        Returns:
+            Tushare daily 原始数据（含 ts_code 列，休市日为空表）
+        """
+        cached = _trade_date_cache.get(trade_date)
+        if cached is not None:
+            return cached
+
+        self._check_rate_limit()
+        logger.debug(f"调用 Tushare daily(trade_date={trade_date})")
+
+        try:
+            df = self._api.daily(trade_date=trade_date)
+        except Exception as e:
+            error_msg = str(e).lower()
+            if any(keyword in error_msg for keyword in ['quota', '配额', 'limit', '权限']):
+                logger.warning(f"Tushare 配额可能超限: {e}")
+                raise RateLimitError(f"Tushare 配额超限: {e}") from e
+            raise DataFetchError(f"Tushare 获取 {trade_date} 全市场数据失败: {e}") from e
 
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
+        if df is None:
+            df = pd.DataFrame()
 
+        # 当天的数据可能在收盘后才陆续更新，不缓存
+        if trade_date < datetime.now().strftime('%Y%m%d'):
+            _trade_date_cache.set(trade_date, df)
         return df
 
+    def download_trade_dates(
+        self, start_date: str, end_date: str, stock_codes: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        按交易日拉取全市场日线，拆分为多只股票的标准化数据
+
+        每个交易日只消耗 1 次配额，与股票数量无关；
+        结果可直接交给 DatabaseManager.save_daily_data_batch 写入 stock_daily
+
+        Args:
+            start_date: 开始日期 'YYYY-MM-DD'
+            end_date: 结束日期 'YYYY-MM-DD'
+            stock_codes: 只保留这些股票（可选，默认全市场）
+
+        Returns:
+            含 code 列的多股票 DataFrame（已清洗并按股票分别计算技术指标）
+        """
+        if self._api is None:
+            raise DataSourceUnavailableError("Tushare API 未初始化，请检查 Token 配置")
+
+        calendar = get_trading_calendar()
+        day = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+        frames = []
+        while day <= end:
+            if calendar.is_trading_day(day):
+                df = self._fetch_trade_date(day.strftime('%Y%m%d'))
+                if not df.empty:
+                    frames.append(df)
+            day = calendar.next_trading_day(day)
+
+        if not frames:
+            raise DataFetchError(f"Tushare 未获取到 {start_date} ~ {end_date} 的全市场数据")
+
+        raw = pd.concat(frames, ignore_index=True)
+        raw['code'] = raw['ts_code'].str.split('.').str[0]
+        if stock_codes is not None:
+            raw = raw[raw['code'].isin(set(stock_codes))]
+
+        # 按股票拆分：标准化 -> 清洗 -> 计算指标（指标依赖单只股票的时间序列）
+        results = []
+        for code, group in raw.groupby('code', sort=False):
+            results.append(self._process_raw_data(group, code))
+
+        if not results:
+            return pd.DataFrame(columns=['code'] + STANDARD_COLUMNS)
+
+        logger.info(
+            f"[{self.name}] 按交易日批量获取完成: {len(frames)} 个交易日, {len(results)} 只股票"
+        )
+        return pd.concat(results, ignore_index=True)
+
+    def get_daily_data_batch(
+        self, stock_codes: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None, days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据
+
+        股票数超过 bulk_threshold 时按交易日拉取全市场截面（配额消耗 = 交易日数），
+        否则逐只获取（配额消耗 = 股票数）
+
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期（可选）
+            end_date: 结束日期（可选，默认今天）
+            days: 获取天数（当 start_date 未指定时使用）
+
+        Returns:
+            {代码: 标准化且含技术指标的 DataFrame}，获取失败或无数据的代码不在结果中
+        """
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
+
+        if len(stock_codes) <= self.bulk_threshold:
+            return super().get_daily_data_batch(stock_codes, start_date=start_date, end_date=end_date)
+
+        logger.info(
+            f"[{self.name}] {len(stock_codes)} 只股票超过批量阈值 {self.bulk_threshold}，"
+            f"按交易日拉取全市场数据: {start_date} ~ {end_date}"
+        )
+        panel = self.download_trade_dates(start_date, end_date, stock_codes)
+        return {code: group.reset_index(drop=True) for code, group in panel.groupby('code', sort=False)}
+
     def get_realtime_quote(self, stock_code: str) -> Optional[Dict[str, Any]]:
         """
         获取实时行情数据（Tushare Pro）
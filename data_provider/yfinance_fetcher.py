@@ -12,11 +12,12 @@ YfinanceFetcher - 兜底数据源 (Priority 4)
 1. 自动将 A 股代码转换为 yfinance 格式（.SS / .SZ）
 2. 处理 Yahoo Finance 的数据格式差异
 3. 失败后指数退避重试
+4. 批量获取：yf.download 一次请求多个代码
 """
 
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import pandas as pd
 from tenacity import (
@@ -27,7 +28,7 @@ from tenacity import (
     before_sleep_log,
 )
 
-from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .base import BaseFetcher, DataFetchError
 
 logger = logging.getLogger(__name__)
 
@@ -133,6 +134,66 @@ class YfinanceFetcher(BaseFetcher):
                 raise
             raise DataFetchError(f"Yahoo Finance 获取数据失败: {e}") from e
 
+    def get_daily_data_batch(
+        self, stock_codes: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None, days: int = 30
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票的日线数据（一次 yf.download 请求）
+
+        yf.download 传入代码列表时返回以 (代码, 字段) 为两级列索引的 DataFrame，
+        按代码拆分后逐只标准化
+
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期（可选）
+            end_date: 结束日期（可选，默认今天）
+            days: 获取天数（当 start_date 未指定时使用）
+
+        Returns:
+            {代码: 标准化且含技术指标的 DataFrame}，无数据的代码不在结果中
+        """
+        import yfinance as yf
+
+        if not stock_codes:
+            return {}
+
+        start_date, end_date = self._resolve_date_range(start_date, end_date, days)
+        yf_codes = {self._convert_stock_code(code): code for code in stock_codes}
+
+        logger.info(f"[{self.name}] yfinance.download 批量获取 {len(yf_codes)} 只: {start_date} ~ {end_date}")
+
+        try:
+            panel = yf.download(
+                tickers=list(yf_codes),
+                start=start_date,
+                end=end_date,
+                progress=False,  # 禁止进度条
+                auto_adjust=True,  # 自动调整价格（复权）
+                group_by='ticker',  # 列索引为 (代码, 字段)
+                threads=True,
+            )
+        except Exception as e:
+            raise DataFetchError(f"Yahoo Finance 批量获取数据失败: {e}") from e
+
+        results: Dict[str, pd.DataFrame] = {}
+        if panel is None or panel.empty:
+            return results
+
+        available = set(panel.columns.get_level_values(0)) if isinstance(panel.columns, pd.MultiIndex) else set()
+        for yf_code, code in yf_codes.items():
+            if yf_code not in available:
+                continue
+            raw_df = panel[yf_code].dropna(how='all')
+            if raw_df.empty:
+                continue
+            try:
+                results[code] = self._process_raw_data(raw_df, code)
+            except Exception as e:
+                logger.warning(f"[{self.name}] 处理 {code} 批量数据失败: {e}")
+
+        logger.info(f"[{self.name}] 批量获取完成: {len(results)}/{len(stock_codes)} 只股票")
+        return results
+
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
         标准化 Yahoo Finance 数据
@@ -143,8 +204,6 @@ class YfinanceFetcher(BaseFetcher):
         需要映射到标准列名：
         date, open, high, low, close, volume, amount, pct_chg
         """
-        df = df.copy()
-
         # 重置索引，将日期从索引变为列
         df = df.reset_index()
 
@@ -172,14 +231,6 @@ class YfinanceFetcher(BaseFetcher):
         else:
             df['amount'] = 0
 
-        # 添加股票代码列
-        df['code'] = stock_code
-
-        # 只保留需要的列
-        keep_cols = ['code'] + STANDARD_COLUMNS
-        existing_cols = [col for col in keep_cols if col in df.columns]
-        df = df[existing_cols]
-
         return df
 
     def get_realtime_quote(self, stock_code: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 列式历史文件
+===================================
+
+职责：
+1. 每只股票一个 .npy 文件，按列存放 stock_daily 的全部日线（日期 + 数值字段）
+2. 以内存映射方式打开，load_window 返回的数值数组是文件的只读视图（零拷贝）
+3. load_panel 一次取出多只股票最近 N 根K线，组成 (代码 x N) 的矩阵
+4. 与 stock_daily 保持同步：
+   - 写库后由 DatabaseManager 调用 invalidate 把受影响的股票标记为待核对（写入路径不读库、不写文件）
+   - 每只股票在本进程首次读取前（或被标记后的下一次读取前），用一条 GROUP BY 查询核对条数、
+     最新日期和最后更新时间（与文件修改时间比较），不一致时从数据库重建
+
+文件格式：
+    {HISTORY_STORE_DIR}/{code}.npy：float64 二维数组，形状 (1 + 字段数, 条数)，
+    第 0 行为日期（1970-01-01 起的天数），其余各行依次为 HISTORY_FIELDS，按日期升序；
+    每个字段是连续的一行，切片即可得到连续数组
+
+使用方式：
+    store = get_db().history_store
+    window = store.load_window('600519', 250)       # {'date': ..., 'close': memmap 视图, ...}
+    panel = store.load_panel(['600519', '000001'], 60)  # {'close': (2, 60) 矩阵, ...}
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+from sqlalchemy import func, select
+
+from storage import DAILY_VALUE_COLUMNS, StockDaily
+
+if TYPE_CHECKING:
+    from storage import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+# 文件中按行存放的数值字段（第 0 行为日期）
+HISTORY_FIELDS = DAILY_VALUE_COLUMNS
+
+_FIELD_ROWS: Dict[str, int] = {field: i for i, field in enumerate(HISTORY_FIELDS, 1)}
+
+# int64 最小值即 datetime64 的 NaT
+_NAT = np.iinfo(np.int64).min
+
+
+def _to_days(day: date) -> int:
+    """日期 -> 1970-01-01 起的天数"""
+    return int(np.datetime64(day, 'D').astype(np.int64))
+
+
+class HistoryStore:
+    """
+    按股票分文件的列式历史存储（线程安全）
+    """
+
+    def __init__(self, manager: 'DatabaseManager', root: str, max_open: int = 512):
+        """
+        Args:
+            manager: 数据库管理器（重建文件时读取 stock_daily）
+            root: 文件目录
+            max_open: 同时保持内存映射的文件数上限（每个映射占用一个文件描述符）
+        """
+        self._manager = manager
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_open = max_open
+
+        self._lock = threading.Lock()
+        # 重建文件的读库 + 写文件串行执行，避免同一股票被旧数据覆盖
+        self._write_lock = threading.Lock()
+        self._open: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        # 本进程内已与数据库核对过的代码
+        self._checked: Set[str] = set()
+
+        self.rebuilt = 0  # 累计重建的文件数
+
+    def _path(self, code: str) -> Path:
+        return self.root / f"{code}.npy"
+
+    # === 读取 ===
+
+    def load_window(
+        self, code: str, n: Optional[int] = None, end: Optional[date] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        读取单只股票最近 n 根K线
+
+        Args:
+            code: 股票代码
+            n: 条数（默认全部）
+            end: 截止日期（含，默认不限）
+
+        Returns:
+            {'date': datetime64[D] 数组, 字段名: float64 数组}，按日期升序；
+            数值数组为内存映射文件的只读视图（不复制）；无数据返回 None
+        """
+        data = self._get(code)
+        if data is None:
+            return None
+
+        stop = data.shape[1]
+        if end is not None:
+            stop = int(np.searchsorted(data[0], _to_days(end), side='right'))
+        if stop == 0:
+            return None
+        start = 0 if n is None else max(0, stop - n)
+
+        window = {'date': data[0, start:stop].astype(np.int64).view('datetime64[D]')}
+        for field, row in _FIELD_ROWS.items():
+            window[field] = data[row, start:stop]
+        return window
+
+    def load_panel(
+        self, codes: Sequence[str], n: int, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        读取多只股票最近 n 根K线，组成矩阵
+
+        各股票按最近一根K线右对齐（第 -1 列为各自最新的K线），
+        不足 n 根的在左侧以 NaN / NaT 填充
+
+        Args:
+            codes: 股票代码列表
+            n: 每只股票的条数
+            fields: 字段列表（默认全部字段）
+
+        Returns:
+            {'date': (len(codes), n) datetime64[D], 字段名: (len(codes), n) float64,
+             'length': 每只股票实际条数}
+        """
+        codes = list(codes)
+        fields = list(fields or HISTORY_FIELDS)
+        rows = [_FIELD_ROWS[field] for field in fields]
+
+        # 一次批量核对全部代码，避免逐只查询数据库
+        self.ensure(codes)
+
+        dates = np.full((len(codes), n), _NAT, dtype=np.int64)
+        values = np.full((len(fields), len(codes), n), np.nan)
+        lengths = np.zeros(len(codes), dtype=np.int64)
+        for i, code in enumerate(codes):
+            data = self._get(code)
+            if data is None or data.shape[1] == 0:
+                continue
+            k = min(n, data.shape[1])
+            dates[i, n - k :] = data[0, -k:]
+            values[:, i, n - k :] = data[rows, -k:]
+            lengths[i] = k
+
+        panel: Dict[str, np.ndarray] = {'date': dates.view('datetime64[D]'), 'length': lengths}
+        for j, field in enumerate(fields):
+            panel[field] = values[j]
+        return panel
+
+    def _get(self, code: str) -> Optional[np.ndarray]:
+        """取出代码对应的内存映射数组（首次访问时与数据库核对）"""
+        with self._lock:
+            data = self._open.get(code)
+            if data is not None:
+                self._open.move_to_end(code)
+                return data
+            checked = code in self._checked
+
+        if not checked:
+            self.ensure([code])
+
+        return self._map(code)
+
+    def _map(self, code: str) -> Optional[np.ndarray]:
+        """打开文件的内存映射并放入 LRU 缓存（文件不存在返回 None）"""
+        with self._lock:
+            data = self._open.get(code)
+            if data is not None:
+                self._open.move_to_end(code)
+                return data
+
+            try:
+                data = np.load(self._path(code), mmap_mode='r')
+            except FileNotFoundError:
+                return None
+
+            self._open[code] = data
+            while len(self._open) > self.max_open:
+                # 已交给调用方的视图仍持有映射，淘汰只是不再缓存
+                self._open.popitem(last=False)
+            return data
+
+    # === 同步 ===
+
+    def ensure(self, codes: Iterable[str]) -> None:
+        """
+        核对尚未核对过的代码，文件缺失或与数据库不一致时重建
+
+        按 500 个代码分块执行 GROUP BY 查询，比较条数、最新日期，
+        以及数据库最后更新时间是否晚于文件修改时间
+        """
+        with self._lock:
+            pending = sorted({code for code in codes if code not in self._checked})
+        if not pending:
+            return
+
+        summary = {}
+        chunk_size = 500  # 控制 IN 子句参数个数，避免超出 SQLite 变量上限
+        with self._manager.get_session() as session:
+            for i in range(0, len(pending), chunk_size):
+                chunk = pending[i : i + chunk_size]
+                rows = session.execute(
+                    select(
+                        StockDaily.code,
+                        func.count(),
+                        func.max(StockDaily.date),
+                        func.max(StockDaily.updated_at),
+                    )
+                    .where(StockDaily.code.in_(chunk))
+                    .group_by(StockDaily.code)
+                ).all()
+                summary.update({row[0]: row[1:] for row in rows})
+
+        stale: List[str] = []
+        for code in pending:
+            if code not in summary:
+                # 数据库中没有该股票，清理残留文件
+                self._discard(code, remove_file=True)
+                continue
+
+            count, last_date, updated_at = summary[code]
+            if not self._matches(code, count, last_date, updated_at):
+                stale.append(code)
+
+        if stale:
+            self.refresh(stale)
+
+        with self._lock:
+            self._checked.update(pending)
+
+    def _matches(self, code: str, count: int, last_date: date, updated_at: Optional[datetime]) -> bool:
+        """文件是否与数据库摘要一致"""
+        path = self._path(code)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+
+        if updated_at is not None and datetime.fromtimestamp(mtime) < updated_at:
+            return False
+
+        data = self._map(code)
+        if data is None or data.ndim != 2 or data.shape != (len(HISTORY_FIELDS) + 1, count):
+            return False
+        return count == 0 or int(data[0, -1]) == _to_days(last_date)
+
+    def refresh(self, codes: Iterable[str]) -> int:
+        """
+        从数据库重建指定股票的文件（由 ensure 对不一致的股票调用）
+
+        一条 SELECT ... WHERE code IN (...) ORDER BY code, date 读取全部历史
+        （按 500 个代码分块，不构造 ORM 对象），按代码切分后各写一个文件
+
+        Returns:
+            重建的文件数
+        """
+        codes = sorted(set(codes))
+        if not codes:
+            return 0
+
+        columns = [StockDaily.code, StockDaily.date, *[getattr(StockDaily, field) for field in HISTORY_FIELDS]]
+        written: Set[str] = set()
+        chunk_size = 500  # 控制 IN 子句参数个数，避免超出 SQLite 变量上限
+
+        with self._write_lock:
+            with self._manager.get_session() as session:
+                for i in range(0, len(codes), chunk_size):
+                    chunk = codes[i : i + chunk_size]
+                    rows = session.execute(
+                        select(*columns)
+                        .where(StockDaily.code.in_(chunk))
+                        .order_by(StockDaily.code, StockDaily.date)
+                    ).all()
+                    if not rows:
+                        continue
+
+                    row_codes = np.array([row[0] for row in rows], dtype=object)
+                    dates = np.array([row[1] for row in rows], dtype='datetime64[D]').astype(np.int64)
+                    # NULL（None）转换为 NaN
+                    values = np.array([row[2:] for row in rows], dtype=np.float64)
+
+                    bounds = np.concatenate(
+                        ([0], np.flatnonzero(row_codes[1:] != row_codes[:-1]) + 1, [len(rows)])
+                    )
+                    for start, stop in zip(bounds[:-1], bounds[1:]):
+                        data = np.empty((len(HISTORY_FIELDS) + 1, stop - start))
+                        data[0] = dates[start:stop]
+                        data[1:] = values[start:stop].T
+                        self._write(row_codes[start], data)
+                        written.add(row_codes[start])
+
+            # 数据库中已没有数据的股票
+            for code in codes:
+                if code not in written:
+                    self._discard(code, remove_file=True)
+
+        with self._lock:
+            self._checked.update(codes)
+        self.rebuilt += len(written)
+        logger.debug(f"[历史文件] 重建 {len(written)} 只股票")
+        return len(written)
+
+    def _write(self, code: str, data: np.ndarray) -> None:
+        """先写临时文件再原子替换，正在读取旧文件的映射不受影响"""
+        path = self._path(code)
+        tmp = path.with_name(f"{code}.{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as f:
+            np.save(f, data)
+
+        with self._lock:
+            self._open.pop(code, None)
+            try:
+                os.replace(tmp, path)
+            except OSError as e:
+                # Windows 下文件仍被映射时无法替换：本进程改用内存中的数组，下次启动核对时重建
+                logger.warning(f"[历史文件] 替换 {path} 失败，暂用内存数据: {e}")
+                tmp.unlink(missing_ok=True)
+                self._open[code] = data
+
+    def invalidate(self, codes: Iterable[str]) -> None:
+        """标记为未核对（下次读取时重新与数据库核对）"""
+        with self._lock:
+            for code in codes:
+                self._checked.discard(code)
+                self._open.pop(code, None)
+
+    def _discard(self, code: str, remove_file: bool = False) -> None:
+        with self._lock:
+            self._open.pop(code, None)
+            self._checked.add(code)
+            if remove_file:
+                self._path(code).unlink(missing_ok=True)
+
+    def __repr__(self) -> str:
+        return f"<HistoryStore(root={self.root}, open={len(self._open)}, rebuilt={self.rebuilt})>"
+
+
+if __name__ == "__main__":
+    import tempfile
+    import timeit
+
+    import pandas as pd
+
+    import storage
+
+    logging.basicConfig(level=logging.WARNING)
+
+    # 构造 200 只股票 x 250 根K线，对比 ORM 读取窗口与列式文件读取
+    tmp_dir = tempfile.mkdtemp()
+    db = storage.DatabaseManager(db_url=f"sqlite:///{tmp_dir}/bench.db", write_queue=False)
+    codes = [str(600000 + i) for i in range(200)]
+    dates = pd.bdate_range('2025-01-01', periods=250)
+    rng = np.random.default_rng(0)
+    frames = []
+    for code in codes:
+        close = 10 + rng.standard_normal(len(dates)).cumsum() * 0.1
+        frames.append(
+            pd.DataFrame(
+                {
+                    'code': code,
+                    'date': dates,
+                    'open': close,
+                    'high': close * 1.01,
+                    'low': close * 0.99,
+                    'close': close,
+                    'volume': 1e6,
+                    'amount': 1e7,
+                    'pct_chg': 0.0,
+                }
+            )
+        )
+    db.save_daily_data_batch(pd.concat(frames, ignore_index=True), 'bench')
+
+    store = HistoryStore(db, f"{tmp_dir}/history")
+    store.ensure(codes)
+    start_date, end_date = dates[0].date(), dates[-1].date()
+
+    def orm_window():
+        records = db.get_data_range('600123', start_date, end_date)
+        return pd.DataFrame([r.to_dict() for r in records])
+
+    def store_window():
+        return store.load_window('600123', 250)
+
+    def orm_panel():
+        return [db.get_data_range(code, start_date, end_date) for code in codes]
+
+    def store_panel():
+        return store.load_panel(codes, 250, fields=['close', 'volume'])
+
+    assert np.allclose(orm_window()['close'].to_numpy(), store_window()['close'])
+    for label, fn, number in [
+        ("ORM 读取单只 250 根", orm_window, 50),
+        ("列式文件读取单只 250 根", store_window, 2000),
+        ("ORM 逐只读取 200 只", orm_panel, 3),
+        ("列式文件读取 200 只面板", store_panel, 50),
+    ]:
+        best = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print(f"{label}: {best * 1000:.3f} ms")
+    db.close()
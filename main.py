@@ -31,20 +31,30 @@ if os.getenv("GITHUB_ACTIONS") != "true":
     pass
 
 import argparse
+import hashlib
+import json
 import logging
 import sys
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, fields
 from datetime import datetime, date, timezone, timedelta
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
 from feishu_doc import FeishuDocManager
 
 from config import get_config, Config
-from storage import get_db, DatabaseManager
+from storage import get_db, DatabaseManager, DAILY_VALUE_COLUMNS, LatestBar
 from data_provider import DataFetcherManager
-from data_provider.akshare_fetcher import AkshareFetcher, RealtimeQuote, ChipDistribution
+from data_provider.base import DataFetchError, INDICATOR_WARMUP_BARS
+from data_provider.akshare_fetcher import RealtimeQuote, ChipDistribution
+from data_provider.quote_snapshot import QuoteSnapshotService
+from data_provider.trading_calendar import TradingCalendar, china_now, set_trading_calendar
 from analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
 from analyzers.chanlun_analyzer import analyze_stock_chanlun
 from notification import NotificationService, NotificationChannel, send_daily_report
@@ -57,6 +67,9 @@ from market_analyzer import MarketAnalyzer
 LOG_FORMAT = '%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s'
 LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+# 个股分析读取的历史K线条数（趋势分析需 >=20 条，MA60 需 >=60 条）
+ANALYSIS_HISTORY_DAYS = 120
+
 
 def setup_logging(debug: bool = False, log_dir: str = "./logs") -> None:
     """
@@ -125,21 +138,36 @@ class StockAnalysisPipeline:
     3. 实现并发控制和异常处理
     """
 
-    def __init__(self, config: Optional[Config] = None, max_workers: Optional[int] = None):
+    def __init__(
+        self, config: Optional[Config] = None, max_workers: Optional[int] = None, force_reanalyze: bool = False
+    ):
         """
         初始化调度器
 
         Args:
             config: 配置对象（可选，默认使用全局配置）
             max_workers: 最大并发线程数（可选，默认从配置读取）
+            force_reanalyze: 是否忽略已保存的分析结果，总是重新调用 AI 分析
         """
         self.config = config or get_config()
         self.max_workers = max_workers or self.config.max_workers
+        self.force_reanalyze = force_reanalyze
 
         # 初始化各模块
         self.db = get_db()
         self.fetcher_manager = DataFetcherManager()
-        self.akshare_fetcher = AkshareFetcher()  # 用于获取增强数据（量比、筹码等）
+        # 交易日历结合数据库中的K线日期构建，并注入给 data_provider 中使用日历的模块
+        self.trading_calendar = TradingCalendar.from_history(self.db.get_trading_dates())
+        set_trading_calendar(self.trading_calendar)
+        # run() 期间有效的批量查询结果：今日数据已存在的股票、每只股票在数据库中的最新K线
+        # （run() 结束时清空，run() 之外的调用逐只查询数据库）
+        self._fresh_codes: Optional[Set[str]] = None
+        self._latest_bars: Optional[Dict[str, LatestBar]] = None
+        self.akshare_fetcher = DataFetcherManager.get('akshare')  # 用于获取增强数据（量比、筹码等）
+        # 行情：量比/换手率等扩展字段来自 AkShare 全市场行情表，新浪快照作为回退
+        self.quote_snapshot = QuoteSnapshotService(
+            detail_fetcher=self.akshare_fetcher, ttl=self.config.quote_snapshot_ttl
+        )
         self.trend_analyzer = StockTrendAnalyzer()  # 趋势分析器
         self.analyzer = GeminiAnalyzer()
         self.notifier = NotificationService()
@@ -160,7 +188,7 @@ class StockAnalysisPipeline:
 
     def _get_realtime_quote_unified(self, stock_code: str) -> Optional[RealtimeQuote]:
         """
-        统一的实时行情获取方法
+        统一的实时行情获取方法（经由行情快照服务）
 
         Args:
             stock_code: 股票代码
@@ -169,15 +197,7 @@ class StockAnalysisPipeline:
             实时行情数据
         """
         try:
-            # 优先使用数据源管理器
-            fetcher_manager = self.fetcher_manager
-            if hasattr(fetcher_manager, 'get_realtime_quote'):
-                quote = fetcher_manager.get_realtime_quote(stock_code)
-                if quote:
-                    return quote
-
-            # 备选：使用AkShare
-            return self.akshare_fetcher.get_realtime_quote(stock_code)
+            return self.quote_snapshot.get_quote(stock_code, require_detail=True)
 
         except Exception as e:
             logger.warning(f"[{stock_code}] 获取实时行情失败: {e}")
@@ -205,10 +225,11 @@ class StockAnalysisPipeline:
         """
         获取并保存单只股票数据
 
-        断点续传逻辑：
-        1. 检查数据库是否已有今日数据
+        断点续传 + 增量拉取逻辑：
+        1. 检查数据库是否已有最近一个交易日的数据（周末/节假日即上一交易日）
         2. 如果有且不强制刷新，则跳过网络请求
-        3. 否则从数据源获取并保存
+        3. 数据库已有历史数据时，只请求最新日期之后的缺失区间（见 _fetch_delta）
+        4. 没有历史数据、间隔过久或检测到断档时，拉取完整窗口
 
         Args:
             code: 股票代码
@@ -218,16 +239,35 @@ class StockAnalysisPipeline:
             Tuple[是否成功, 错误信息]
         """
         try:
-            today = date.today()
+            today = china_now().date()  # 与交易日历一致使用北京时间，不依赖服务器时区
+            bar_date = self.trading_calendar.latest_trading_day()
 
-            # 断点续传检查：如果今日数据已存在，跳过
-            if not force_refresh and self.db.has_today_data(code, today):
-                logger.info(f"[{code}] 今日数据已存在，跳过获取（断点续传）")
+            # 断点续传检查：如果最新交易日数据已存在，跳过（优先使用 run() 中批量查询的结果）
+            if self._fresh_codes is not None:
+                has_latest = code in self._fresh_codes
+            else:
+                has_latest = self.db.has_today_data(code, bar_date)
+            if not force_refresh and has_latest:
+                logger.info(f"[{code}] {bar_date} 数据已存在，跳过获取（断点续传）")
                 return True, None
 
-            # 从数据源获取数据
-            logger.info(f"[{code}] 开始从数据源获取数据...")
-            df, source_name = self.fetcher_manager.get_daily_data(code, days=30)
+            # 最新K线优先使用 run() 中批量查询的结果
+            if self._latest_bars is not None:
+                latest = self._latest_bars.get(code)
+            else:
+                latest = self.db.get_latest_bars([code]).get(code)
+
+            df, source_name = None, None
+            if not force_refresh and latest is not None:
+                df, source_name = self._fetch_delta(code, latest, today, bar_date)
+                if df is not None and df.empty:
+                    logger.info(f"[{code}] 数据源暂无 {latest.date} 之后的新数据")
+                    return True, None
+
+            if df is None:
+                # 从数据源获取完整窗口
+                logger.info(f"[{code}] 开始从数据源获取数据...")
+                df, source_name = self.fetcher_manager.get_daily_data(code, days=30)
 
             if df is None or df.empty:
                 return False, "获取数据为空"
@@ -243,6 +283,74 @@ class StockAnalysisPipeline:
             logger.error(f"[{code}] {error_msg}")
             return False, error_msg
 
+    def _fetch_delta(
+        self, code: str, latest: LatestBar, today: date, bar_date: date
+    ) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """
+        增量拉取：只请求数据库最新日期之后的K线
+
+        请求区间从数据库最新日期（含）开始，多取的这一根K线用于校验衔接：
+        - 数据源返回的第一根K线不是该日期 -> 存在断档
+        - 该日期收盘价与数据库不一致 -> 复权因子变化，历史价格需整体刷新
+        - 已收盘交易日的K线条数少于交易日历给出的条数 -> 中间缺K线
+        以上情况以及缺少的交易日超过 delta_max_gap_days、数据库K线不足 INDICATOR_WARMUP_BARS 条时
+        返回 None，由调用方回退到完整窗口。衔接校验只用 latest（get_latest_bars 批量查询结果），不再读取历史窗口。
+
+        新K线的 MA/量比由存储层写库时结合数据库中的最近历史重新计算（见 DatabaseManager._fill_indicators）。
+
+        Args:
+            code: 股票代码
+            latest: 数据库中的最新K线（日期、收盘价、K线条数）
+            today: 今天
+            bar_date: 最近一个交易日（今天或节假日前的交易日）
+
+        Returns:
+            Tuple[新增K线 DataFrame（无新数据时为空表）, 数据源名称]；需要完整拉取时返回 (None, None)
+        """
+        latest_date = latest.date
+        missing_days = self.trading_calendar.trading_days_between(latest_date, bar_date)
+        if missing_days == 0:
+            # 交易日历认为没有缺失的K线（如最新数据为节假日前最后一个交易日）
+            return pd.DataFrame(), None
+        if missing_days > self.config.delta_max_gap_days:
+            logger.info(f"[{code}] 距最新数据 {latest_date} 已缺 {missing_days} 个交易日，拉取完整窗口")
+            return None, None
+
+        if latest.bars < INDICATOR_WARMUP_BARS:
+            # 历史不足以计算 MA20，直接拉取完整窗口
+            return None, None
+
+        logger.info(f"[{code}] 增量获取 {latest_date} 之后的数据...")
+        try:
+            df, source_name = self.fetcher_manager.get_daily_data(
+                code, start_date=latest_date.strftime('%Y-%m-%d'), end_date=today.strftime('%Y-%m-%d')
+            )
+        except DataFetchError as e:
+            logger.info(f"[{code}] 增量获取失败，回退到完整窗口: {e}")
+            return None, None
+
+        dates = pd.to_datetime(df['date'])
+        anchor = df[dates == pd.Timestamp(latest_date)]
+        if anchor.empty or dates.min() < pd.Timestamp(latest_date):
+            logger.info(f"[{code}] [{source_name}] 增量数据与数据库未衔接（断档），拉取完整窗口")
+            return None, None
+
+        if not np.isclose(float(anchor['close'].iloc[0]), latest.close, rtol=1e-4):
+            logger.info(f"[{code}] [{source_name}] {latest_date} 收盘价与数据库不一致（复权变化），拉取完整窗口")
+            return None, None
+
+        new_rows = df[dates > pd.Timestamp(latest_date)]
+
+        # 已收盘交易日的K线必须齐全（当天未收盘的K线数据源可能尚未提供，不计入）
+        completed_day = self.trading_calendar.last_completed_trading_day()
+        expected = self.trading_calendar.trading_days_between(latest_date, completed_day)
+        received = dates[(dates > pd.Timestamp(latest_date)) & (dates <= pd.Timestamp(completed_day))].nunique()
+        if received < expected:
+            logger.info(f"[{code}] [{source_name}] 增量数据缺少 {expected - received} 个交易日，拉取完整窗口")
+            return None, None
+
+        return new_rows.reset_index(drop=True), source_name
+
     def analyze_stock(self, code: str) -> Optional[AnalysisResult]:
         """
         分析单只股票（增强版：含量比、换手率、筹码分析、多维度情报）
@@ -250,10 +358,10 @@ class StockAnalysisPipeline:
         流程：
         1. 获取实时行情（量比、换手率）
         2. 获取筹码分布
-        3. 进行趋势分析（基于交易理念）
+        3. 读取历史窗口，进行趋势分析（基于交易理念）和缠论分析
         4. 多维度情报搜索（最新消息+风险排查+业绩预期）
-        5. 从数据库获取分析上下文
-        6. 调用 AI 进行综合分析
+        5. 使用 Step 3 读取的分析上下文（历史窗口只查询一次）
+        6. 同一交易日输入指纹未变化时复用已保存的结果，否则调用 AI 进行综合分析
 
         Args:
             code: 股票代码
@@ -298,50 +406,40 @@ class StockAnalysisPipeline:
             except Exception as e:
                 logger.warning(f"[{code}] 获取筹码分布失败: {e}")
 
-            # Step 3: 趋势分析（基于交易理念）
+            # Step 3: 读取历史窗口 + 分析上下文（单次查询，趋势/缠论/LLM 共用）
+            history_df, context = self.db.get_history_window(code, days=ANALYSIS_HISTORY_DAYS)
+
+            # Step 3.1: 趋势分析（基于交易理念）
             trend_result: Optional[TrendAnalysisResult] = None
             try:
-                # 获取历史数据进行趋势分析
-                context = self.db.get_analysis_context(code)
-                if context and 'raw_data' in context:
-                    import pandas as pd
-
-                    raw_data = context['raw_data']
-                    if isinstance(raw_data, list) and len(raw_data) > 0:
-                        df = pd.DataFrame(raw_data)
-                        trend_result = self.trend_analyzer.analyze(df, code)
-                        logger.info(
-                            f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
-                            f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}"
-                        )
+                if not history_df.empty:
+                    trend_result = self.trend_analyzer.analyze(history_df, code)
+                    logger.info(
+                        f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
+                        f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}"
+                    )
             except Exception as e:
                 logger.warning(f"[{code}] 趋势分析失败: {e}")
 
             # Step 3.5: 缠论分析
             chanlun_result = None
             try:
-                # 获取历史数据进行缠论分析
-                context = self.db.get_analysis_context(code)
-                if context and 'raw_data' in context:
-                    import pandas as pd
-
-                    raw_data = context['raw_data']
-                    if isinstance(raw_data, list) and len(raw_data) > 0:
-                        df = pd.DataFrame(raw_data)
-                        chanlun_result = analyze_stock_chanlun(df)
-                        if chanlun_result:
-                            trend_type = chanlun_result.get('trend_type', '')
-                            trend_str = trend_type.value if hasattr(trend_type, 'value') else str(trend_type)
-                            score = chanlun_result.get('chanlun_score', 50)
-                            buy_points = len(
-                                [p for p in chanlun_result.get('buy_sell_points', []) if '买' in p.type.value]
-                            )
-                            logger.info(f"[{code}] 缠论分析: {trend_str}, " f"评分={score:.1f}, 买点={buy_points}个")
+                if not history_df.empty:
+                    chanlun_result = analyze_stock_chanlun(history_df)
+                    if chanlun_result:
+                        trend_type = chanlun_result.get('trend_type', '')
+                        trend_str = trend_type.value if hasattr(trend_type, 'value') else str(trend_type)
+                        score = chanlun_result.get('chanlun_score', 50)
+                        buy_points = len(
+                            [p for p in chanlun_result.get('buy_sell_points', []) if '买' in p.type.value]
+                        )
+                        logger.info(f"[{code}] 缠论分析: {trend_str}, " f"评分={score:.1f}, 买点={buy_points}个")
             except Exception as e:
                 logger.warning(f"[{code}] 缠论分析失败: {e}")
 
             # Step 4: 多维度情报搜索（最新消息+风险排查+业绩预期）
             news_context = None
+            intel_results: Dict[str, SearchResponse] = {}
             if self.search_service.is_available:
                 logger.info(f"[{code}] 开始多维度情报搜索...")
 
@@ -359,9 +457,7 @@ class StockAnalysisPipeline:
             else:
                 logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
 
-            # Step 5: 获取分析上下文（技术面数据）
-            context = self.db.get_analysis_context(code)
-
+            # Step 5: 分析上下文（技术面数据，已在 Step 3 读取）
             if context is None:
                 logger.warning(f"[{code}] 无法获取分析上下文，跳过分析")
                 return None
@@ -371,9 +467,25 @@ class StockAnalysisPipeline:
                 context, realtime_quote, chip_data, trend_result, chanlun_result, stock_name
             )
 
-            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
+            # Step 7: 同一交易日输入未变化时复用已保存的分析结果（如推送失败后重跑）
+            trade_date = date.fromisoformat(context['date'])
+            fingerprint = self._analysis_fingerprint(context, intel_results)
+            if not self.force_reanalyze:
+                cached = self._load_analysis_result(code, trade_date, fingerprint)
+                if cached is not None:
+                    logger.info(f"[{code}] {trade_date} 分析输入未变化，复用已保存的分析结果")
+                    return cached
+
+            # Step 8: 调用 AI 分析（传入增强的上下文和新闻）
             result = self.analyzer.analyze(enhanced_context, news_context=news_context)
 
+            # 只保存成功的结果，失败的下次重跑时重新分析
+            if result is not None and result.success:
+                try:
+                    self.db.save_analysis_result(code, trade_date, fingerprint, asdict(result))
+                except Exception as e:
+                    logger.warning(f"[{code}] 保存分析结果失败: {e}")
+
             return result
 
         except Exception as e:
@@ -381,6 +493,47 @@ class StockAnalysisPipeline:
             logger.exception(f"[{code}] 详细错误信息:")
             return None
 
+    @staticmethod
+    def _analysis_fingerprint(context: Dict[str, Any], intel_results: Dict[str, SearchResponse]) -> str:
+        """
+        分析输入指纹（SHA-256），只包含同一交易日内稳定的输入：
+        - 交易日期（context['date']）
+        - 数据库中最新一根K线的行情与指标（DAILY_VALUE_COLUMNS：开高低收、成交量额、涨跌幅、MA5/10/20、量比）
+        - 情报报告引用的新闻标识：各维度前 3 条结果的链接（无链接时用标题），去重排序，
+          忽略摘要、排名和搜索引擎
+
+        实时行情、筹码分布和搜索摘要每次运行都会变化，不参与指纹，否则几乎不会命中；
+        K线入库更新或出现新的新闻时才重新分析
+        """
+        today = context.get('today') or {}
+        news = sorted(
+            {
+                (result.url or result.title).strip().lower()
+                for response in intel_results.values()
+                if response.success
+                for result in response.results[:3]
+            }
+        )
+        payload = json.dumps(
+            {'date': context['date'], 'bar': {col: today.get(col) for col in DAILY_VALUE_COLUMNS}, 'news': news},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_analysis_result(self, code: str, trade_date: date, fingerprint: str) -> Optional[AnalysisResult]:
+        """读取已保存的分析结果（不存在或无法还原时返回 None）"""
+        try:
+            saved = self.db.get_analysis_result(code, trade_date, fingerprint)
+            if saved is None:
+                return None
+            known = {f.name for f in fields(AnalysisResult)}
+            return AnalysisResult(**{key: value for key, value in saved.items() if key in known})
+        except Exception as e:
+            logger.warning(f"[{code}] 读取已保存的分析结果失败，重新分析: {e}")
+            return None
+
     def _enhance_context(
         self,
         context: Dict[str, Any],
@@ -607,37 +760,61 @@ class StockAnalysisPipeline:
 
         results: List[AnalysisResult] = []
 
-        # 使用线程池并发处理
-        # 注意：max_workers 设置较低（默认3）以避免触发反爬
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_code = {
-                executor.submit(
-                    self.process_single_stock,
-                    code,
-                    skip_analysis=dry_run,
-                    single_stock_notify=single_stock_notify and send_notification,
-                ): code
-                for code in stock_codes
-            }
+        # 预取行情：分析需要量比/换手率等扩展字段，直接批量加载 AkShare 全市场行情表（1 次请求，带缓存），
+        # 之后逐只查询均走内存；新浪快照不含这些字段，仅在 AkShare 缺失时按需回退
+        if not dry_run:
+            try:
+                self.akshare_fetcher.get_spot_vectors(stock_codes, ['price'])
+            except Exception as e:
+                logger.warning(f"行情预取失败，将按需获取: {e}")
 
-            # 收集结果
-            for future in as_completed(future_to_code):
-                code = future_to_code[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-                except Exception as e:
-                    logger.error(f"[{code}] 任务执行失败: {e}")
+        try:
+            # 断点续传：一次查询找出最新交易日数据已存在的股票，其余股票才需要网络请求
+            # （周末/节假日以上一个交易日为准，不再重复拉取）
+            bar_date = self.trading_calendar.latest_trading_day()
+            self._fresh_codes = self.db.get_codes_with_data(stock_codes, bar_date)
+            if self._fresh_codes:
+                logger.info(f"{len(self._fresh_codes)} 只股票 {bar_date} 数据已存在，跳过网络请求（断点续传）")
+
+            # 批量查询待更新股票的最新K线：一条 SQL 覆盖整个列表，worker 只请求缺失区间
+            pending = [code for code in stock_codes if code not in self._fresh_codes]
+            self._latest_bars = self.db.get_latest_bars(pending)
+
+            # 使用线程池并发处理
+            # 注意：max_workers 设置较低（默认3）以避免触发反爬
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # 提交任务
+                future_to_code = {
+                    executor.submit(
+                        self.process_single_stock,
+                        code,
+                        skip_analysis=dry_run,
+                        single_stock_notify=single_stock_notify and send_notification,
+                    ): code
+                    for code in stock_codes
+                }
+
+                # 收集结果
+                for future in as_completed(future_to_code):
+                    code = future_to_code[future]
+                    try:
+                        result = future.result()
+                        if result:
+                            results.append(result)
+                    except Exception as e:
+                        logger.error(f"[{code}] 任务执行失败: {e}")
+        finally:
+            # 批量查询结果只对本次 run() 有效，避免之后的调用使用过期状态
+            self._fresh_codes = None
+            self._latest_bars = None
 
         # 统计
         elapsed_time = time.time() - start_time
 
         # dry-run 模式下，数据获取成功即视为成功
         if dry_run:
-            # 检查哪些股票的数据今天已存在
-            success_count = sum(1 for code in stock_codes if self.db.has_today_data(code))
+            # 检查哪些股票的最新交易日数据已存在
+            success_count = len(self.db.get_codes_with_data(stock_codes, self.trading_calendar.latest_trading_day()))
             fail_count = len(stock_codes) - success_count
         else:
             success_count = len(results)
@@ -733,6 +910,7 @@ def parse_arguments() -> argparse.Namespace:
   python main.py --dry-run          # 仅获取数据，不进行 AI 分析
   python main.py --stocks 600519,000001  # 指定分析特定股票
   python main.py --no-notify        # 不发送推送通知
+  python main.py --force-reanalyze  # 忽略已保存的分析结果，重新调用 AI 分析
   python main.py --single-notify    # 启用单股推送模式（每分析完一只立即推送）
   python main.py --schedule         # 启用定时任务模式
   python main.py --market-review    # 仅运行大盘复盘
@@ -753,6 +931,10 @@ def parse_arguments() -> argparse.Namespace:
 
     parser.add_argument('--no-notify', action='store_true', help='不发送推送通知')
 
+    parser.add_argument(
+        '--force-reanalyze', action='store_true', help='忽略已保存的分析结果，总是重新调用 AI 分析（默认输入未变化时复用）'
+    )
+
     parser.add_argument(
         '--single-notify', action='store_true', help='启用单股推送模式：每分析完一只股票立即推送，而不是汇总推送'
     )
@@ -943,7 +1125,9 @@ def run_full_analysis(config: Config, args: argparse.Namespace, stock_codes: Opt
             config.single_stock_notify = True
 
         # 创建调度器
-        pipeline = StockAnalysisPipeline(config=config, max_workers=args.workers)
+        pipeline = StockAnalysisPipeline(
+            config=config, max_workers=args.workers, force_reanalyze=getattr(args, 'force_reanalyze', False)
+        )
 
         # 1. 运行个股分析
         results = pipeline.run(stock_codes=stock_codes, dry_run=args.dry_run, send_notification=not args.no_notify)
@@ -1092,7 +1276,10 @@ def main() -> int:
                 run_full_analysis(config, args, stock_codes)
 
             run_with_schedule(
-                task=scheduled_task, schedule_time=config.schedule_time, run_immediately=True  # 启动时先执行一次
+                task=scheduled_task,
+                schedule_time=config.schedule_time,
+                run_immediately=True,  # 启动时先执行一次
+                trading_days_only=config.schedule_trading_days_only,
             )
             return 0
 
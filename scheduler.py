@@ -8,6 +8,7 @@
 1. 支持每日定时执行股票分析
 2. 支持定时执行大盘复盘
 3. 优雅处理信号，确保可靠退出
+4. 可选：非交易日（周末/节假日）跳过定时任务
 
 依赖：
 - schedule: 轻量级定时任务库
@@ -58,17 +59,18 @@ class Scheduler:
     定时任务调度器
 
     基于 schedule 库实现，支持：
-    - 每日定时执行
+    - 每日定时执行（可仅在交易日执行）
     - 启动时立即执行
     - 优雅退出
     """
 
-    def __init__(self, schedule_time: str = "18:00"):
+    def __init__(self, schedule_time: str = "18:00", trading_days_only: bool = False):
         """
         初始化调度器
 
         Args:
             schedule_time: 每日执行时间，格式 "HH:MM"
+            trading_days_only: 定时触发时是否跳过非交易日
         """
         try:
             import schedule
@@ -79,6 +81,7 @@ class Scheduler:
             raise ImportError("请安装 schedule 库: pip install schedule")
 
         self.schedule_time = schedule_time
+        self.trading_days_only = trading_days_only
         self.shutdown_handler = GracefulShutdown()
         self._task_callback: Optional[Callable] = None
         self._running = False
@@ -94,13 +97,25 @@ class Scheduler:
         self._task_callback = task
 
         # 设置每日定时任务
-        self.schedule.every().day.at(self.schedule_time).do(self._safe_run_task)
+        self.schedule.every().day.at(self.schedule_time).do(self._run_scheduled_task)
         logger.info(f"已设置每日定时任务，执行时间: {self.schedule_time}")
 
         if run_immediately:
             logger.info("立即执行一次任务...")
             self._safe_run_task()
 
+    def _run_scheduled_task(self):
+        """定时触发入口：非交易日跳过（启动时的立即执行不受影响）"""
+        if self.trading_days_only:
+            from data_provider.trading_calendar import china_now, get_trading_calendar
+
+            today = china_now().date()
+            if not get_trading_calendar().is_trading_day(today):
+                logger.info(f"{today} 非交易日，跳过本次定时任务")
+                return
+
+        self._safe_run_task()
+
     def _safe_run_task(self):
         """安全执行任务（带异常捕获）"""
         if self._task_callback is None:
@@ -151,7 +166,9 @@ class Scheduler:
         self._running = False
 
 
-def run_with_schedule(task: Callable, schedule_time: str = "18:00", run_immediately: bool = True):
+def run_with_schedule(
+    task: Callable, schedule_time: str = "18:00", run_immediately: bool = True, trading_days_only: bool = False
+):
     """
     便捷函数：使用定时调度运行任务
 
@@ -159,8 +176,9 @@ def run_with_schedule(task: Callable, schedule_time: str = "18:00", run_immediat
         task: 要执行的任务函数
         schedule_time: 每日执行时间
         run_immediately: 是否立即执行一次
+        trading_days_only: 是否仅在交易日执行定时任务
     """
-    scheduler = Scheduler(schedule_time=schedule_time)
+    scheduler = Scheduler(schedule_time=schedule_time, trading_days_only=trading_days_only)
     scheduler.set_daily_task(task, run_immediately=run_immediately)
     scheduler.run()
 
@@ -18,8 +18,6 @@ A股自选股智能分析系统 - 股票精选模块
 """
 
 import logging
-import time
-import random
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
@@ -30,7 +28,8 @@ import numpy as np
 from config import get_config
 from storage import get_db
 from data_provider import DataFetcherManager
-from data_provider.akshare_fetcher import AkshareFetcher
+from data_provider.quote_snapshot import QuoteSnapshotService
+from data_provider.rate_limiter import get_rate_limiter
 from analyzer import GeminiAnalyzer, AnalysisResult
 from analyzers.chanlun_analyzer import analyze_stock_chanlun
 
@@ -132,8 +131,12 @@ class StockSelector:
         # 数据源配置
         self.preferred_data_source = 'auto'  # 默认自动选择
 
-        # 创建备用的AkShare实例（仅在其他数据源都失败时使用）
-        self._akshare_fetcher = AkshareFetcher()
+        # 备用的AkShare实例（进程内单例，仅在其他数据源都失败时使用）
+        self._akshare_fetcher = DataFetcherManager.get('akshare')
+
+        # 行情快照服务（按数据源延迟创建，见 _get_quote_snapshot）
+        self._quote_snapshot: Optional[QuoteSnapshotService] = None
+        self._quote_snapshot_source: Optional[str] = None
 
         # 快速模式配置
         self.fast_mode = fast_mode
@@ -152,66 +155,96 @@ class StockSelector:
         """
         根据preferred_data_source获取对应的数据源实例
 
+        实例来自 DataFetcherManager 的进程内单例注册表，逐只股票调用时不会重复创建
+
         Returns:
-            对应的数据源实例
+            对应的数据源实例；auto 或未知数据源返回 None（使用数据源管理器）
         """
-        if self.preferred_data_source == 'sina':
-            from data_provider.sina_fetcher import SinaFetcher
+        if self.preferred_data_source in DataFetcherManager.available_sources():
+            return DataFetcherManager.get(self.preferred_data_source)
+        # 默认使用数据源管理器
+        return None
 
-            return SinaFetcher()
-        elif self.preferred_data_source == 'tencent':
-            from data_provider.tencent_fetcher import TencentFetcher
+    def _prefetch_history(self, stock_codes: List[str], days: int = 60) -> Dict[str, pd.DataFrame]:
+        """
+        整池批量预取历史日线（仅指定数据源提供原生批量接口时）
 
-            return TencentFetcher()
-        elif self.preferred_data_source == 'tonghuashun':
-            from data_provider.tonghuashun_fetcher import TonghuashunFetcher
+        例如 yfinance/efinance 一次请求多个代码，Tushare 在股票数超过阈值时
+        按交易日拉取全市场截面；结果同时写入 stock_daily
 
-            return TonghuashunFetcher()
-        elif self.preferred_data_source == 'efinance':
-            from data_provider.efinance_fetcher import EfinanceFetcher
+        Args:
+            stock_codes: 股票池
+            days: 获取天数
 
-            return EfinanceFetcher()
-        elif self.preferred_data_source == 'akshare':
-            return self._akshare_fetcher
-        elif self.preferred_data_source == 'tushare':
-            from data_provider.tushare_fetcher import TushareFetcher
+        Returns:
+            {代码: 日线 DataFrame}，只对本次筛选有效；不支持批量或批量失败时为空字典
+        """
+        fetcher = self._get_preferred_fetcher()
+        if fetcher is None or not fetcher.supports_batch:
+            # 逐只获取的数据源保留 select_daily_stocks 的提前结束逻辑
+            return {}
 
-            return TushareFetcher()
-        elif self.preferred_data_source == 'baostock':
-            from data_provider.baostock_fetcher import BaostockFetcher
+        try:
+            frames = fetcher.get_daily_data_batch(stock_codes, days=days)
+        except Exception as e:
+            logger.warning(f"[{fetcher.name}] 批量预取历史数据失败，改为逐只获取: {e}")
+            return {}
 
-            return BaostockFetcher()
-        elif self.preferred_data_source == 'yfinance':
-            from data_provider.yfinance_fetcher import YfinanceFetcher
+        logger.info(f"[{fetcher.name}] 批量预取历史数据: {len(frames)}/{len(stock_codes)} 只股票")
 
-            return YfinanceFetcher()
-        else:
-            # 默认使用数据源管理器
-            return None
+        if frames:
+            try:
+                self.db.save_daily_data_batch(pd.concat(frames.values(), ignore_index=True), fetcher.name)
+            except Exception as e:
+                logger.warning(f"批量保存历史数据失败: {e}")
+        return frames
+
+    def _get_quote_snapshot(self) -> QuoteSnapshotService:
+        """
+        获取行情快照服务
+
+        快照由新浪批量行情驱动；扩展字段（量比/换手率/市值）的回退数据源
+        随 preferred_data_source 变化：
+        - auto/akshare：AkShare（全市场行情表，带缓存）
+        - sina：不回退（新浪本身不提供扩展字段）
+        - 其他：对应的指定数据源
+
+        除 sina 外，整池筛选时先通过 prefetch_detail 从 AkShare 全市场行情表
+        批量取扩展字段，上述回退数据源只用于表中缺失的代码
+
+        Returns:
+            QuoteSnapshotService 实例
+        """
+        if self._quote_snapshot is None or self._quote_snapshot_source != self.preferred_data_source:
+            if self.preferred_data_source in ('auto', 'akshare'):
+                detail_fetcher = self._akshare_fetcher
+            elif self.preferred_data_source == 'sina':
+                detail_fetcher = None
+            else:
+                detail_fetcher = self._get_preferred_fetcher()
+
+            self._quote_snapshot = QuoteSnapshotService(
+                detail_fetcher=detail_fetcher,
+                ttl=getattr(self.config, 'quote_snapshot_ttl', 30.0),
+                spot_fetcher=None if self.preferred_data_source == 'sina' else self._akshare_fetcher,
+            )
+            self._quote_snapshot_source = self.preferred_data_source
 
-    def _get_realtime_quote(self, stock_code: str):
+        return self._quote_snapshot
+
+    def _get_realtime_quote(self, stock_code: str, require_detail: bool = False):
         """
-        统一的实时行情获取方法
+        统一的实时行情获取方法（经由行情快照服务）
 
         Args:
             stock_code: 股票代码
+            require_detail: 是否需要量比/换手率/市值等扩展字段
 
         Returns:
-            实时行情数据
+            实时行情数据（RealtimeQuote）
         """
         try:
-            # 优先使用指定的数据源
-            preferred_fetcher = self._get_preferred_fetcher()
-            if preferred_fetcher and hasattr(preferred_fetcher, 'get_realtime_quote'):
-                quote = preferred_fetcher.get_realtime_quote(stock_code)
-                if quote:
-                    logger.debug(f"[{stock_code}] 使用 {preferred_fetcher.name} 获取实时行情成功")
-                    return quote
-
-            # 备选：使用AkShare
-            logger.debug(f"[{stock_code}] 使用备选AkShare获取实时行情")
-            return self._akshare_fetcher.get_realtime_quote(stock_code)
-
+            return self._get_quote_snapshot().get_quote(stock_code, require_detail=require_detail)
         except Exception as e:
             logger.warning(f"[{stock_code}] 获取实时行情失败: {e}")
             return None
@@ -258,21 +291,21 @@ class StockSelector:
                     logger.debug(f"[{stock_code}] 使用 {preferred_fetcher.name} 获取基本面数据成功")
                     return data
 
-            # 对于没有基本面数据的数据源（如新浪），尝试从实时行情构造基本面数据
-            if preferred_fetcher and hasattr(preferred_fetcher, 'get_realtime_quote'):
+            # 对于没有基本面数据的数据源（如新浪），从行情快照的扩展字段构造基本面数据
+            if preferred_fetcher:
                 try:
-                    quote = preferred_fetcher.get_realtime_quote(stock_code)
+                    quote = self._get_realtime_quote(stock_code, require_detail=True)
                     if quote:
                         # 从实时行情构造基本面数据
                         fundamental_data = {
                             'pe_ratio': getattr(quote, 'pe_ratio', 0.0),
                             'pb_ratio': getattr(quote, 'pb_ratio', 0.0),
                             'total_mv': getattr(quote, 'total_mv', 0.0),
-                            'circ_mv': getattr(quote, 'circulation_mv', 0.0),
+                            'circ_mv': getattr(quote, 'circ_mv', 0.0),
                             'roe': 0.0,  # 新浪API不提供ROE
                             'revenue_growth': 0.0,  # 新浪API不提供营收增长率
                         }
-                        logger.debug(f"[{stock_code}] 使用 {preferred_fetcher.name} 实时行情构造基本面数据")
+                        logger.debug(f"[{stock_code}] 使用行情快照构造基本面数据")
                         return fundamental_data
                 except Exception as e:
                     logger.debug(f"[{stock_code}] 从实时行情构造基本面数据失败: {e}")
@@ -356,7 +389,8 @@ class StockSelector:
                 try:
                     logger.info(f"获取板块 [{concept_name}] 的股票...")
 
-                    # 获取板块内股票
+                    # 获取板块内股票（与 AkshareFetcher 共用东财接口的令牌桶限速）
+                    get_rate_limiter('akshare').acquire()
                     concept_stocks_df = ak.stock_board_concept_cons_em(symbol=concept_name)
 
                     if concept_stocks_df is None or concept_stocks_df.empty:
@@ -388,10 +422,6 @@ class StockSelector:
                     )
                     all_stocks.extend(tradeable_stocks)
 
-                    # 防止请求过快，快速模式减少延时
-                    sleep_time = random.uniform(0.3, 0.8) if self.fast_mode else random.uniform(1, 2)
-                    time.sleep(sleep_time)
-
                 except Exception as e:
                     error_msg = str(e)
                     if 'Connection' in error_msg or 'timeout' in error_msg.lower() or 'Remote end closed' in error_msg:
@@ -852,7 +882,7 @@ class StockSelector:
 
             # 2. 获取实时数据补充流动性指标
             try:
-                realtime_quote = self._get_realtime_quote(code)
+                realtime_quote = self._get_realtime_quote(code, require_detail=True)
                 if realtime_quote:
                     turnover_rate = realtime_quote.turnover_rate
                     volume_ratio = realtime_quote.volume_ratio
@@ -895,12 +925,13 @@ class StockSelector:
             logger.error(f"[{code}] 计算流动性评分失败: {e}")
             return 0.0, {}
 
-    def evaluate_stock(self, code: str) -> Optional[StockScore]:
+    def evaluate_stock(self, code: str, history: Optional[pd.DataFrame] = None) -> Optional[StockScore]:
         """
         评估单只股票
 
         Args:
             code: 股票代码
+            history: 本次筛选批量预取的日线（可选，见 _prefetch_history），未提供时按数据源获取
 
         Returns:
             StockScore 或 None
@@ -908,69 +939,17 @@ class StockSelector:
         try:
             logger.info(f"开始评估股票 {code}")
 
-            # 获取历史数据（支持指定数据源）
+            # 获取历史数据（支持指定数据源，优先使用批量预取的结果）
             try:
-                if self.preferred_data_source == 'sina':
-                    # 使用新浪数据源（极速）
-                    from data_provider.sina_fetcher import SinaFetcher
-
-                    sina_fetcher = SinaFetcher()
-                    df = sina_fetcher.get_daily_data(code, days=60)
-                    source = "SinaFetcher"
-                    logger.info(f"[{code}] 使用新浪数据源获取数据")
-                elif self.preferred_data_source == 'tencent':
-                    # 使用腾讯数据源（最快）
-                    from data_provider.tencent_fetcher import TencentFetcher
-
-                    tencent_fetcher = TencentFetcher()
-                    df = tencent_fetcher.get_daily_data(code, days=60)
-                    source = "TencentFetcher"
-                    logger.info(f"[{code}] 使用腾讯数据源获取数据")
-                elif self.preferred_data_source == 'tonghuashun':
-                    # 使用同花顺数据源（快速）
-                    from data_provider.tonghuashun_fetcher import TonghuashunFetcher
-
-                    tonghuashun_fetcher = TonghuashunFetcher()
-                    df = tonghuashun_fetcher.get_daily_data(code, days=60)
-                    source = "TonghuashunFetcher"
-                    logger.info(f"[{code}] 使用同花顺数据源获取数据")
-                elif self.preferred_data_source == 'efinance':
-                    # 使用EFinance数据源（最快）
-                    from data_provider.efinance_fetcher import EfinanceFetcher
-
-                    efinance_fetcher = EfinanceFetcher()
-                    df = efinance_fetcher.get_daily_data(code, days=60)
-                    source = "EfinanceFetcher"
-                    logger.info(f"[{code}] 使用EFinance数据源获取数据")
-                elif self.preferred_data_source == 'akshare':
-                    # 使用AkShare数据源
-                    df = self._akshare_fetcher.get_daily_data(code, days=60)
-                    source = "AkshareFetcher"
-                    logger.info(f"[{code}] 使用AkShare数据源获取数据")
-                elif self.preferred_data_source == 'tushare':
-                    # 使用Tushare数据源（专业）
-                    from data_provider.tushare_fetcher import TushareFetcher
-
-                    tushare_fetcher = TushareFetcher()
-                    df = tushare_fetcher.get_daily_data(code, days=60)
-                    source = "TushareFetcher"
-                    logger.info(f"[{code}] 使用Tushare数据源获取数据")
-                elif self.preferred_data_source == 'baostock':
-                    # 使用Baostock数据源（稳定）
-                    from data_provider.baostock_fetcher import BaostockFetcher
-
-                    baostock_fetcher = BaostockFetcher()
-                    df = baostock_fetcher.get_daily_data(code, days=60)
-                    source = "BaostockFetcher"
-                    logger.info(f"[{code}] 使用Baostock数据源获取数据")
-                elif self.preferred_data_source == 'yfinance':
-                    # 使用Yahoo Finance数据源（国际）
-                    from data_provider.yfinance_fetcher import YfinanceFetcher
-
-                    yfinance_fetcher = YfinanceFetcher()
-                    df = yfinance_fetcher.get_daily_data(code, days=60)
-                    source = "YfinanceFetcher"
-                    logger.info(f"[{code}] 使用Yahoo Finance数据源获取数据")
+                fetcher = self._get_preferred_fetcher()
+                if history is not None and fetcher is not None:
+                    df = history
+                    source = fetcher.name
+                elif fetcher is not None:
+                    # 使用指定数据源
+                    df = fetcher.get_daily_data(code, days=60)
+                    source = fetcher.name
+                    logger.info(f"[{code}] 使用 {fetcher.name} 获取数据")
                 else:
                     # 使用默认的数据源管理器（自动选择）
                     df, source = self.fetcher_manager.get_daily_data(code, days=60)
@@ -1128,6 +1107,14 @@ class StockSelector:
                 stock_pool = stock_pool[:max_pool_size]
                 logger.info(f"直接截取股票池至: {len(stock_pool)} 只")
 
+        # 整池刷新行情快照：名称/价格/扩展字段等查询不再逐只请求
+        snapshot = self._get_quote_snapshot()
+        snapshot.prefetch(stock_pool)
+        snapshot.prefetch_detail(stock_pool)
+
+        # 数据源支持批量接口时整池预取历史日线
+        prefetched = self._prefetch_history(stock_pool)
+
         selected_stocks = []
         total_stocks = len(stock_pool)
 
@@ -1139,20 +1126,13 @@ class StockSelector:
                 progress = f"{i+1}/{total_stocks}"
                 logger.info(f"评估进度: {progress} - {code}")
 
-                stock_score = self.evaluate_stock(code)
+                stock_score = self.evaluate_stock(code, prefetched.get(code))
                 if stock_score and stock_score.total_score >= 60:  # 只保留60分以上的股票
                     selected_stocks.append(stock_score)
                     logger.info(f"✅ {code} 入选，评分: {stock_score.total_score:.1f}")
                 else:
                     logger.debug(f"❌ {code} 未达标，评分: {stock_score.total_score if stock_score else 0:.1f}")
 
-                # 防止请求过快，但减少延时
-                # 快速模式进一步减少延时
-                if self.fast_mode:
-                    time.sleep(random.uniform(0.1, 0.3))
-                else:
-                    time.sleep(random.uniform(0.5, 1.5))
-
                 # 如果已经找到足够多的优质股票，可以提前结束
                 # 快速模式更早结束
                 early_stop_count = max_stocks if self.fast_mode else max_stocks * 2
@@ -1205,25 +1185,33 @@ class StockSelector:
         """
         try:
             filtered_codes = []
+            missing_mv = []
+
+            # 整池刷新行情快照和扩展字段（各 1 次批量请求），只有缺失市值的代码才逐只补取
+            snapshot = self._get_quote_snapshot()
+            snapshot.prefetch(stock_codes)
+            snapshot.prefetch_detail(stock_codes)
 
             for code in stock_codes:
                 try:
                     # 获取实时行情（包含市值信息）
-                    quote = self._get_realtime_quote(code)
+                    quote = self._get_realtime_quote(code, require_detail=True)
                     if quote and quote.total_mv > 0:
                         # 市值范围：50亿-5000亿
                         market_cap_billion = quote.total_mv / 1e8  # 转换为亿元
                         if 50 <= market_cap_billion <= 5000:
                             filtered_codes.append(code)
-
-                    # 防止请求过快
-                    time.sleep(0.2)
+                    else:
+                        # 无市值数据（如只有新浪快照）无法判断是否在范围内，剔除
+                        missing_mv.append(code)
 
                 except Exception as e:
                     logger.debug(f"获取 {code} 市值信息失败: {e}")
                     # 如果获取失败，仍然保留该股票
                     filtered_codes.append(code)
 
+            if missing_mv:
+                logger.warning(f"{len(missing_mv)} 只股票缺少市值数据，已剔除: {missing_mv[:10]}")
             logger.info(f"市值筛选完成: {len(stock_codes)} -> {len(filtered_codes)}")
             return filtered_codes
 
@@ -9,16 +9,29 @@ A股自选股智能分析系统 - 存储层
 2. 定义 ORM 数据模型
 3. 提供数据存取接口
 4. 实现智能更新逻辑（断点续传）
+5. 写库后把列式历史文件中受影响的股票标记为待核对（history_store.py，可选）
+
+并发写入：
+SQLite 启用 WAL 后读写互不阻塞，但同一时刻仍只能有一个写事务，写锁被占用时按 busy timeout 等待。
+可选的写入队列（DATABASE_WRITE_QUEUE=true，默认关闭）把写请求（日线与分析结果）交给单个后台写线程，
+写线程把同时到达的请求合并为一个事务提交（组提交），调用方等待自己的结果返回；
+提交次数更少，但写入总耗时高于仅启用 WAL（见 python storage.py --bench）。
 """
 
+import json
 import logging
+import queue
+import threading
+from concurrent.futures import Future
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Callable, Optional, List, Dict, Any, NamedTuple, Set, Tuple
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from sqlalchemy import (
     create_engine,
+    event,
     Column,
     String,
     Float,
@@ -26,10 +39,13 @@ from sqlalchemy import (
     DateTime,
     Integer,
     Index,
+    Text,
     UniqueConstraint,
     select,
     and_,
     desc,
+    func,
+    type_coerce,
 )
 from sqlalchemy.orm import (
     declarative_base,
@@ -40,11 +56,17 @@ from sqlalchemy.exc import IntegrityError
 
 from config import get_config
 
+if TYPE_CHECKING:
+    from history_store import HistoryStore
+
 logger = logging.getLogger(__name__)
 
 # SQLAlchemy ORM 基类
 Base = declarative_base()
 
+# 日线数据的可写字段（不含主键、code、date、时间戳）
+DAILY_VALUE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg', 'ma5', 'ma10', 'ma20', 'volume_ratio')
+
 
 # === 数据模型定义 ===
 
@@ -121,6 +143,164 @@ class StockDaily(Base):
         }
 
 
+class AnalysisRecord(Base):
+    """
+    个股 AI 分析结果模型
+
+    以 (股票代码, 交易日, 输入指纹) 为键保存 AnalysisResult，
+    同一交易日输入未变化时重跑（如推送失败后重试）直接复用，不再调用大模型
+    """
+
+    __tablename__ = 'analysis_result'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # 股票代码
+    code = Column(String(10), nullable=False)
+
+    # 分析所依据的交易日（分析上下文中最新K线的日期）
+    trade_date = Column(Date, nullable=False)
+
+    # 输入指纹：增强上下文 + 新闻情报的 SHA-256
+    fingerprint = Column(String(64), nullable=False)
+
+    # AnalysisResult 的 JSON 序列化
+    payload = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (UniqueConstraint('code', 'trade_date', 'fingerprint', name='uix_analysis_key'),)
+
+    def __repr__(self):
+        return f"<AnalysisRecord(code={self.code}, trade_date={self.trade_date}, fingerprint={self.fingerprint[:8]})>"
+
+
+class LatestBar(NamedTuple):
+    """某只股票在数据库中的最新一根K线（增量拉取用于衔接校验）"""
+
+    date: date
+    close: float
+    bars: int  # 数据库中该股票的K线总数
+
+
+# SQLite 连接级参数（每个新连接建立时设置）
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',  # 读写并发：读不阻塞写，写不阻塞读
+    'PRAGMA synchronous=NORMAL',  # WAL 模式下仍可保证崩溃一致性，省去每次提交的 fsync
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',  # 页缓存 64MB（负数单位为 KB）
+)
+
+
+class WriteQueue:
+    """
+    写入队列：单个后台写线程 + 组提交
+
+    - submit() 把一个写操作（在给定 Session 中执行、不提交）交给写线程，阻塞等待其返回值或异常
+    - 写线程一次取出队列中全部待写请求（最多 max_batch 个），在同一个事务中执行后提交
+    - 合并提交失败时逐个请求单独重试，一个请求的错误不影响同批其他请求
+    - close() 之后的 submit() 直接抛出 RuntimeError，不会排在停止标记之后永远等待
+    """
+
+    def __init__(self, manager: 'DatabaseManager', max_batch: int = 64):
+        """
+        Args:
+            manager: 数据库管理器（提供 Session 与写入实现）
+            max_batch: 单个事务最多合并的写请求数
+        """
+        self._manager = manager
+        self.max_batch = max_batch
+        self._queue: 'queue.Queue[Optional[Tuple[Callable[[Session], Any], Future]]]' = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        # 保护 _closed：检查与入队在同一把锁内完成，关闭后不会再有请求排到停止标记之后
+        self._state_lock = threading.Lock()
+        self._closed = False
+
+        self.requests = 0  # 累计写请求数
+        self.commits = 0  # 累计提交次数
+
+        self._thread.start()
+
+    def submit(self, write: Callable[[Session], Any]) -> Any:
+        """
+        提交一个写操作并等待写入完成
+
+        Args:
+            write: 接收 Session 执行写入的函数（不提交，由写线程统一提交）
+
+        Returns:
+            write 的返回值
+        """
+        future: Future = Future()
+        with self._state_lock:
+            if self._closed:
+                raise RuntimeError("写入队列已关闭")
+            self._queue.put((write, future))
+        return future.result()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """停止写线程（已提交的请求会先写完）"""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self.requests += len(batch)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: List[Tuple[Callable[[Session], Any], Future]]) -> None:
+        """在一个事务中执行整批写请求；失败时逐个重试"""
+        try:
+            with self._manager.get_session() as session:
+                try:
+                    results = [write(session) for write, _ in batch]
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    raise
+            self.commits += 1
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            logger.warning(f"[写入队列] 合并提交 {len(batch)} 个请求失败，逐个重试: {e}")
+            for item in batch:
+                self._commit([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'commits': self.commits,
+            'pending': self._queue.qsize(),
+        }
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -140,27 +320,48 @@ class DatabaseManager:
             cls._instance._initialized = False
         return cls._instance
 
-    def __init__(self, db_url: Optional[str] = None):
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        wal: Optional[bool] = None,
+        write_queue: Optional[bool] = None,
+    ):
         """
         初始化数据库管理器
 
         Args:
             db_url: 数据库连接 URL（可选，默认从配置读取）
+            wal: SQLite 是否启用 WAL 及连接参数调优（可选，默认从配置读取）
+            write_queue: 是否经由单个后台写线程组提交（可选，默认从配置读取）
         """
         if self._initialized:
             return
 
+        config = get_config()
         if db_url is None:
-            config = get_config()
             db_url = config.get_db_url()
+        if wal is None:
+            wal = config.database_wal
+        if write_queue is None:
+            write_queue = config.database_write_queue
+
+        connect_args: Dict[str, Any] = {}
+        is_sqlite = db_url.startswith('sqlite')
+        if is_sqlite and wal:
+            # 写锁被占用时等待的秒数（sqlite3 的 busy timeout）
+            connect_args['timeout'] = config.database_busy_timeout
 
         # 创建数据库引擎
         self._engine = create_engine(
             db_url,
             echo=False,  # 设为 True 可查看 SQL 语句
             pool_pre_ping=True,  # 连接健康检查
+            connect_args=connect_args,
         )
 
+        if is_sqlite and wal:
+            event.listen(self._engine, 'connect', self._apply_sqlite_pragmas)
+
         # 创建 Session 工厂
         self._SessionLocal = sessionmaker(
             bind=self._engine,
@@ -171,8 +372,36 @@ class DatabaseManager:
         # 创建所有表
         Base.metadata.create_all(self._engine)
 
+        # 内存数据库每个连接各自独立，写线程看不到其他线程的数据，不使用写入队列
+        in_memory = is_sqlite and self._engine.url.database in (None, '', ':memory:')
+        self._writer: Optional[WriteQueue] = None
+        if write_queue and not in_memory:
+            self._writer = WriteQueue(self)
+
+        # 列式历史文件（见 history_store.py）：启用时 get_history_window 从文件读取，
+        # 未启用时首次访问 history_store 才创建；创建后每次写库都把受影响的股票标记为待核对
+        self._history_store_dir = config.history_store_dir
+        self._history_store_lock = threading.Lock()
+        self._history_store: Optional['HistoryStore'] = None
+        self._use_history_store = config.history_store
+        if self._use_history_store:
+            self._history_store = self._create_history_store()
+
         self._initialized = True
-        logger.info(f"数据库初始化完成: {db_url}")
+        logger.info(
+            f"数据库初始化完成: {db_url} "
+            f"(WAL={'on' if is_sqlite and wal else 'off'}, 写入队列={'on' if self._writer else 'off'})"
+        )
+
+    @staticmethod
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        """新建 SQLite 连接时设置 WAL 等连接参数"""
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
 
     @classmethod
     def get_instance(cls) -> 'DatabaseManager':
@@ -185,9 +414,30 @@ class DatabaseManager:
     def reset_instance(cls) -> None:
         """重置单例（用于测试）"""
         if cls._instance is not None:
-            cls._instance._engine.dispose()
+            cls._instance.close()
             cls._instance = None
 
+    def close(self) -> None:
+        """停止写线程（等待已提交的写入完成）并释放连接池"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._engine.dispose()
+
+    @property
+    def history_store(self) -> 'HistoryStore':
+        """列式历史文件存储（首次访问时创建）"""
+        if self._history_store is None:
+            with self._history_store_lock:
+                if self._history_store is None:
+                    self._history_store = self._create_history_store()
+        return self._history_store
+
+    def _create_history_store(self) -> 'HistoryStore':
+        from history_store import HistoryStore
+
+        return HistoryStore(self, self._history_store_dir)
+
     def get_session(self) -> Session:
         """
         获取数据库 Session
@@ -217,15 +467,96 @@ class DatabaseManager:
         Returns:
             是否存在数据
         """
+        return code in self.get_codes_with_data([code], target_date)
+
+    def get_codes_with_data(self, codes: List[str], target_date: Optional[date] = None) -> Set[str]:
+        """
+        批量检查哪些股票已有指定日期的数据
+
+        一条 SELECT code ... WHERE code IN (...) 查询覆盖整个股票列表
+        （按 500 个代码分块），只取代码列，不构造 ORM 对象
+
+        Args:
+            codes: 股票代码列表
+            target_date: 目标日期（默认今天）
+
+        Returns:
+            已有该日期数据的股票代码集合
+        """
         if target_date is None:
             target_date = date.today()
 
+        codes = sorted(set(codes))
+        found: Set[str] = set()
+        if not codes:
+            return found
+
+        chunk_size = 500  # 控制 IN 子句参数个数，避免超出 SQLite 变量上限
         with self.get_session() as session:
-            result = session.execute(
-                select(StockDaily).where(and_(StockDaily.code == code, StockDaily.date == target_date))
-            ).scalar_one_or_none()
+            for i in range(0, len(codes), chunk_size):
+                chunk = codes[i : i + chunk_size]
+                found.update(
+                    session.execute(
+                        select(StockDaily.code).where(and_(StockDaily.code.in_(chunk), StockDaily.date == target_date))
+                    ).scalars()
+                )
+
+        return found
+
+    def get_latest_bars(self, codes: List[str]) -> Dict[str, LatestBar]:
+        """
+        批量获取每只股票在数据库中的最新K线
 
-            return result is not None
+        一条 GROUP BY 查询（关联回最新日期的收盘价）覆盖整个股票列表（按 500 个代码分块），
+        供增量拉取判断缺少的日期范围并校验衔接，无需再逐只读取历史窗口
+
+        Args:
+            codes: 股票代码列表
+
+        Returns:
+            {代码: LatestBar(最新日期, 收盘价, K线条数)}，数据库中没有数据的代码不在结果中
+        """
+        codes = sorted(set(codes))
+        latest: Dict[str, LatestBar] = {}
+        if not codes:
+            return latest
+
+        chunk_size = 500  # 控制 IN 子句参数个数，避免超出 SQLite 变量上限
+        with self.get_session() as session:
+            for i in range(0, len(codes), chunk_size):
+                chunk = codes[i : i + chunk_size]
+                summary = (
+                    select(
+                        StockDaily.code.label('code'),
+                        func.max(StockDaily.date).label('max_date'),
+                        func.count().label('bars'),
+                    )
+                    .where(StockDaily.code.in_(chunk))
+                    .group_by(StockDaily.code)
+                    .subquery()
+                )
+                rows = session.execute(
+                    select(summary.c.code, summary.c.max_date, StockDaily.close, summary.c.bars).join(
+                        StockDaily, and_(StockDaily.code == summary.c.code, StockDaily.date == summary.c.max_date)
+                    )
+                ).all()
+                for code, max_date, close, bars in rows:
+                    if close is not None:
+                        latest[code] = LatestBar(max_date, float(close), bars)
+
+        return latest
+
+    def get_trading_dates(self) -> Set[date]:
+        """
+        获取数据库中出现过的全部K线日期（去重）
+
+        用于从本地历史构建交易日历（见 data_provider/trading_calendar.py）
+
+        Returns:
+            日期集合
+        """
+        with self.get_session() as session:
+            return set(session.execute(select(StockDaily.date).distinct()).scalars())
 
     def get_latest_data(self, code: str, days: int = 2) -> List[StockDaily]:
         """
@@ -276,13 +607,95 @@ class DatabaseManager:
 
             return list(results)
 
+    def get_panel(
+        self,
+        codes: List[str],
+        start_date: date,
+        end_date: date,
+        columns: Optional[List[str]] = None,
+        as_array: bool = False,
+    ) -> Any:
+        """
+        批量获取多只股票在日期区间内的日线（面板数据）
+
+        一条 SELECT ... WHERE code IN (...) 查询覆盖整个股票列表（按 500 个代码分块），
+        只取所需列，结果直接转换为 NumPy 数组（不构造 ORM 对象、不逐行 to_dict），
+        按 (日期, 代码) 一次性散射到面板中，供整池截面打分一次性向量化计算
+
+        Args:
+            codes: 股票代码列表（结果中的代码顺序与之一致）
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            columns: 字段列表（默认 DAILY_VALUE_COLUMNS 全部字段）
+            as_array: 是否返回三维数组
+
+        Returns:
+            as_array=False：宽表 DataFrame，行索引为日期（DatetimeIndex），
+                列为 (字段, 代码) 的 MultiIndex，如 panel['close'] 即 日期 x 代码 的收盘价；
+            as_array=True：Tuple[日期数组 datetime64[D], 代码列表, 形状 (日期, 代码, 字段) 的 float64 数组]；
+            某只股票在某日没有数据时为 NaN
+        """
+        columns = list(columns or DAILY_VALUE_COLUMNS)
+        unknown = [col for col in columns if col not in DAILY_VALUE_COLUMNS]
+        if unknown:
+            raise ValueError(f"未知字段: {unknown}")
+
+        codes = list(dict.fromkeys(codes))
+        # 日期按原始值读取（SQLite 中为 'YYYY-MM-DD' 字符串），由 NumPy 整列解析，省去逐行构造 date 对象
+        stmt_columns = [
+            StockDaily.code,
+            type_coerce(StockDaily.date, String),
+            *[getattr(StockDaily, col) for col in columns],
+        ]
+
+        rows: List[Any] = []
+        chunk_size = 500  # 控制 IN 子句参数个数，避免超出 SQLite 变量上限
+        with self.get_session() as session:
+            # Core 连接执行，结果为普通元组行，不经过 ORM 结果加载
+            connection = session.connection()
+            for i in range(0, len(codes), chunk_size):
+                chunk = codes[i : i + chunk_size]
+                rows.extend(
+                    connection.execute(
+                        select(*stmt_columns).where(
+                            and_(
+                                StockDaily.code.in_(chunk),
+                                StockDaily.date >= start_date,
+                                StockDaily.date <= end_date,
+                            )
+                        )
+                    ).all()
+                )
+
+        # 行转列：每个字段一个数组（NULL 转换为 NaN）
+        fields = list(zip(*rows)) if rows else [()] * (len(columns) + 2)
+        row_dates = np.array(fields[1], dtype='datetime64[D]')
+        dates, date_pos = np.unique(row_dates, return_inverse=True)
+        code_pos = pd.Index(codes).get_indexer(list(fields[0]))
+
+        cube = np.full((len(dates), len(codes), len(columns)), np.nan)
+        for k in range(len(columns)):
+            cube[date_pos, code_pos, k] = np.array(fields[k + 2], dtype=np.float64)
+
+        if as_array:
+            return dates, codes, cube
+
+        # (日期, 代码, 字段) -> 日期 x (字段, 代码)
+        wide = cube.transpose(0, 2, 1).reshape(len(dates), len(columns) * len(codes))
+        return pd.DataFrame(
+            wide,
+            index=pd.DatetimeIndex(dates, name='date'),
+            columns=pd.MultiIndex.from_product([columns, codes], names=['field', 'code']),
+        )
+
     def save_daily_data(self, df: pd.DataFrame, code: str, data_source: str = "Unknown") -> int:
         """
         保存日线数据到数据库
 
         策略：
-        - 使用 UPSERT 逻辑（存在则更新，不存在则插入）
-        - 跳过已存在的数据，避免重复
+        - 批量 UPSERT：一次性转换 DataFrame，单条 executemany
+          INSERT ... ON CONFLICT(code, date) DO UPDATE 写入全部行
+        - 依赖 uix_code_date 唯一约束判断冲突
 
         Args:
             df: 包含日线数据的 DataFrame
@@ -290,76 +703,371 @@ class DatabaseManager:
             data_source: 数据来源名称
 
         Returns:
-            新增/更新的记录数
+            新增的记录数（已存在的记录会被更新，不计入）
         """
         if df is None or df.empty:
             logger.warning(f"保存数据为空，跳过 {code}")
             return 0
 
-        saved_count = 0
+        try:
+            inserted, updated = self._upsert_daily_frame(df, data_source, code=code)
+        except Exception as e:
+            logger.error(f"保存 {code} 数据失败: {e}")
+            raise
+
+        logger.info(f"保存 {code} 数据成功，新增 {inserted} 条，更新 {updated} 条")
+        return inserted
+
+    def save_daily_data_batch(self, df: pd.DataFrame, data_source: str = "Unknown") -> int:
+        """
+        批量保存多只股票的日线数据（单事务）
+
+        DataFrame 必须包含 code 列，可以混合多只股票，
+        用于全市场回补时一次性持久化整批数据。
+
+        Args:
+            df: 包含 code 列的多股票日线 DataFrame
+            data_source: 数据来源名称
+
+        Returns:
+            新增的记录数（已存在的记录会被更新，不计入）
+        """
+        if df is None or df.empty:
+            logger.warning("批量保存数据为空，跳过")
+            return 0
+
+        if 'code' not in df.columns:
+            raise ValueError("批量保存需要 DataFrame 包含 code 列")
+
+        try:
+            inserted, updated = self._upsert_daily_frame(df, data_source)
+        except Exception as e:
+            logger.error(f"批量保存日线数据失败: {e}")
+            raise
+
+        logger.info(f"批量保存 {df['code'].nunique()} 只股票数据成功，新增 {inserted} 条，更新 {updated} 条")
+        return inserted
+
+    def _daily_frame_to_records(
+        self, df: pd.DataFrame, data_source: str, code: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        将日线 DataFrame 一次性转换为写库用的记录列表
+
+        - 日期列统一转换为 date 对象
+        - NaN 统一转换为 None（写入 NULL）
+        - code 参数非空时覆盖 DataFrame 中的 code 列
+        """
+        value_cols = [col for col in DAILY_VALUE_COLUMNS if col in df.columns]
+
+        frame = pd.DataFrame(index=df.index)
+        frame['code'] = code if code is not None else df['code'].astype(str)
+        frame['date'] = pd.to_datetime(df['date']).dt.date
+        for col in value_cols:
+            frame[col] = pd.to_numeric(df[col], errors='coerce')
+
+        # 同一批次内 (code, date) 重复时保留最后一条，避免 ON CONFLICT 在同一语句内二次命中
+        frame = frame.drop_duplicates(subset=['code', 'date'], keep='last')
+
+        frame = frame.astype(object).where(frame.notna(), None)
+        records = frame.to_dict('records')
+
+        now = datetime.now()
+        for record in records:
+            record['data_source'] = data_source
+            record['updated_at'] = now
+
+        return records
+
+    def _fill_indicators(self, records: List[Dict[str, Any]]) -> None:
+        """
+        增量维护指标列（ma5/ma10/ma20/volume_ratio），直接写回 records
+
+        数据源按下载窗口计算的指标在窗口开头不完整（min_periods=1），这里统一重算：
+        每只股票只从数据库读取本批最早日期之前的最近 INDICATOR_WARMUP_BARS - 1 条
+        收盘价和成交量（其中最后 5 条成交量即量比所需），拼接本批K线后计算，
+        写入的指标与在完整历史上计算的结果一致，每次更新的代价只与新K线条数有关。
+
+        本批之后数据库中已有的K线（回补中间缺口时）不会重算
+        """
+        from data_provider.base import INDICATOR_WARMUP_BARS, indicator_arrays
+
+        by_code: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_code.setdefault(record['code'], []).append(record)
+        for rows in by_code.values():
+            rows.sort(key=lambda r: r['date'])
+
+        warmup = self._load_warmup_bars(
+            {code: rows[0]['date'] for code, rows in by_code.items()}, INDICATOR_WARMUP_BARS - 1
+        )
+
+        for code, rows in by_code.items():
+            history = warmup.get(code, [])
+            # None（NULL）转换为 NaN
+            close = np.array([r[0] for r in history] + [row.get('close') for row in rows], dtype=np.float64)
+            volume = np.array([r[1] for r in history] + [row.get('volume') for row in rows], dtype=np.float64)
+            for col, values in indicator_arrays(close, volume).items():
+                for row, value in zip(rows, values[len(history) :].tolist()):
+                    row[col] = None if value != value else value  # NaN -> NULL
+
+    def _load_warmup_bars(self, first_dates: Dict[str, date], limit: int) -> Dict[str, List[Tuple[Any, Any]]]:
+        """
+        批量读取各股票在指定日期之前最近 limit 条 (收盘价, 成交量)，按日期升序
+
+        按起始日期分组、每组按股票代码分块（每块一条 SQL，窗口函数按股票取最近 N 条），
+        全市场按交易日批量写入时只需约 股票数 / 500 次查询。
+        先只扫描起始日期前约 limit * 3 个自然日，不足 limit 条的股票（停牌、新股）再不限下界补查
+
+        Args:
+            first_dates: 股票代码 -> 本批最早日期
+            limit: 每只股票读取的条数
+
+        Returns:
+            股票代码 -> [(close, volume), ...]
+        """
+        by_date: Dict[date, List[str]] = {}
+        for code, first_date in first_dates.items():
+            by_date.setdefault(first_date, []).append(code)
 
+        result: Dict[str, List[Tuple[Any, Any]]] = {}
+        chunk_size = 500  # 控制 IN 子句参数个数，避免超出 SQLite 变量上限
         with self.get_session() as session:
-            try:
-                for _, row in df.iterrows():
-                    # 解析日期
-                    row_date = row.get('date')
-                    if isinstance(row_date, str):
-                        row_date = datetime.strptime(row_date, '%Y-%m-%d').date()
-                    elif isinstance(row_date, datetime):
-                        row_date = row_date.date()
-                    elif isinstance(row_date, pd.Timestamp):
-                        row_date = row_date.date()
-
-                    # 检查是否已存在
-                    existing = session.execute(
-                        select(StockDaily).where(and_(StockDaily.code == code, StockDaily.date == row_date))
-                    ).scalar_one_or_none()
-
-                    if existing:
-                        # 更新现有记录
-                        existing.open = row.get('open')
-                        existing.high = row.get('high')
-                        existing.low = row.get('low')
-                        existing.close = row.get('close')
-                        existing.volume = row.get('volume')
-                        existing.amount = row.get('amount')
-                        existing.pct_chg = row.get('pct_chg')
-                        existing.ma5 = row.get('ma5')
-                        existing.ma10 = row.get('ma10')
-                        existing.ma20 = row.get('ma20')
-                        existing.volume_ratio = row.get('volume_ratio')
-                        existing.data_source = data_source
-                        existing.updated_at = datetime.now()
-                    else:
-                        # 创建新记录
-                        record = StockDaily(
-                            code=code,
-                            date=row_date,
-                            open=row.get('open'),
-                            high=row.get('high'),
-                            low=row.get('low'),
-                            close=row.get('close'),
-                            volume=row.get('volume'),
-                            amount=row.get('amount'),
-                            pct_chg=row.get('pct_chg'),
-                            ma5=row.get('ma5'),
-                            ma10=row.get('ma10'),
-                            ma20=row.get('ma20'),
-                            volume_ratio=row.get('volume_ratio'),
-                            data_source=data_source,
+            connection = session.connection()
+
+            def load(codes: List[str], first_date: date, lower: Optional[date]) -> None:
+                for i in range(0, len(codes), chunk_size):
+                    conditions = [StockDaily.code.in_(codes[i : i + chunk_size]), StockDaily.date < first_date]
+                    if lower is not None:
+                        conditions.append(StockDaily.date >= lower)
+                    ranked = (
+                        select(
+                            StockDaily.code,
+                            StockDaily.date,
+                            StockDaily.close,
+                            StockDaily.volume,
+                            func.row_number()
+                            .over(partition_by=StockDaily.code, order_by=desc(StockDaily.date))
+                            .label('rn'),
                         )
-                        session.add(record)
-                        saved_count += 1
+                        .where(and_(*conditions))
+                        .subquery()
+                    )
+                    rows = connection.execute(
+                        select(ranked.c.code, ranked.c.close, ranked.c.volume)
+                        .where(ranked.c.rn <= limit)
+                        .order_by(ranked.c.code, ranked.c.date)
+                    ).all()
+                    for code, close, volume in rows:
+                        result.setdefault(code, []).append((close, volume))
+
+            for first_date, codes in by_date.items():
+                load(codes, first_date, first_date - timedelta(days=limit * 3))
+                short = [code for code in codes if len(result.get(code, ())) < limit]
+                for code in short:
+                    result.pop(code, None)
+                load(short, first_date, None)
+
+        return result
+
+    def _count_existing_daily(self, session: Session, records: List[Dict[str, Any]]) -> int:
+        """
+        统计记录中已存在于数据库的 (code, date) 数量
+
+        按股票代码分块查询（每块一条 SQL），用于区分新增与更新条数
+        """
+        keys = {(r['code'], r['date']) for r in records}
+        codes = sorted({code for code, _ in keys})
+        min_date = min(d for _, d in keys)
+        max_date = max(d for _, d in keys)
+
+        existing = 0
+        chunk_size = 500  # 控制 IN 子句参数个数，避免超出 SQLite 变量上限
+        for i in range(0, len(codes), chunk_size):
+            chunk = codes[i : i + chunk_size]
+            rows = session.execute(
+                select(StockDaily.code, StockDaily.date).where(
+                    and_(
+                        StockDaily.code.in_(chunk),
+                        StockDaily.date >= min_date,
+                        StockDaily.date <= max_date,
+                    )
+                )
+            ).all()
+            existing += sum(1 for row in rows if (row.code, row.date) in keys)
+
+        return existing
+
+    def _upsert_daily_frame(self, df: pd.DataFrame, data_source: str, code: Optional[str] = None) -> Tuple[int, int]:
+        """
+        批量 UPSERT 日线数据
+
+        Args:
+            df: 日线 DataFrame（单股票或多股票）
+            data_source: 数据来源名称
+            code: 股票代码（可选，指定时覆盖 DataFrame 中的 code 列）
 
-                session.commit()
-                logger.info(f"保存 {code} 数据成功，新增 {saved_count} 条")
+        Returns:
+            Tuple[新增条数, 更新条数]
+        """
+        # 记录转换与指标计算在调用方线程完成，写线程只负责执行 SQL
+        records = self._daily_frame_to_records(df, data_source, code=code)
+        if not records:
+            return 0, 0
+        self._fill_indicators(records)
+
+        if self._writer is not None:
+            result = self._writer.submit(lambda session: self._write_daily_records(session, records))
+        else:
+            with self.get_session() as session:
+                try:
+                    result = self._write_daily_records(session, records)
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    raise
+
+        if self._history_store is not None:
+            # 只标记受影响的股票，下次读取时核对并重建文件，写入路径不读取完整历史
+            self._history_store.invalidate({record['code'] for record in records})
+
+        return result
+
+    def _write_daily_records(self, session: Session, records: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        在给定 Session 中 UPSERT 日线记录（不提交，由调用方决定事务边界）
+
+        Returns:
+            Tuple[新增条数, 更新条数]
+        """
+        dialect = self._engine.dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            # 其他数据库不支持 ON CONFLICT，退回逐行写入
+            return self._upsert_daily_rowwise(session, records)
+
+        # Core 级 INSERT（不经过 ORM 批量插入路径），写线程上的 Python 开销更小
+        stmt = dialect_insert(StockDaily.__table__)
+        update_cols = [col for col in DAILY_VALUE_COLUMNS if col in records[0]]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['code', 'date'],
+            set_={
+                **{col: stmt.excluded[col] for col in update_cols},
+                'data_source': stmt.excluded.data_source,
+                'updated_at': stmt.excluded.updated_at,
+            },
+        )
+
+        existing = self._count_existing_daily(session, records)
+        session.execute(stmt, records)
+        return len(records) - existing, existing
+
+    def _upsert_daily_rowwise(self, session: Session, records: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        逐行 UPSERT（不支持 ON CONFLICT 的数据库使用，不提交）
+
+        Returns:
+            Tuple[新增条数, 更新条数]
+        """
+        inserted = 0
+        updated = 0
+
+        for record in records:
+            existing = session.execute(
+                select(StockDaily).where(and_(StockDaily.code == record['code'], StockDaily.date == record['date']))
+            ).scalar_one_or_none()
+
+            if existing:
+                for key, value in record.items():
+                    setattr(existing, key, value)
+                updated += 1
+            else:
+                session.add(StockDaily(**record))
+                inserted += 1
+
+        # 同一事务中后续请求的存在性查询需要看到本批新增的行
+        session.flush()
+        return inserted, updated
+
+    def get_history_window(
+        self, code: str, days: int = 120, target_date: Optional[date] = None
+    ) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        """
+        获取最近 N 根日线 + 分析上下文（单次查询）
+
+        一次 SQL 取出最近 N 条记录（不构造 ORM 对象），同时生成
+        今日/昨日对比摘要，供趋势分析、缠论分析和 LLM 上下文共用
+
+        Args:
+            code: 股票代码
+            days: 历史窗口长度（条数）
+            target_date: 截止日期（默认今天）
+
+        Returns:
+            Tuple[按日期升序的历史 DataFrame, 分析上下文字典（无数据时为 None）]
+        """
+        if target_date is None:
+            target_date = date.today()
 
-            except Exception as e:
-                session.rollback()
-                logger.error(f"保存 {code} 数据失败: {e}")
-                raise
+        if self._use_history_store:
+            return self._history_window_from_store(code, days, target_date)
 
-        return saved_count
+        columns = [StockDaily.code, StockDaily.date, *[getattr(StockDaily, col) for col in DAILY_VALUE_COLUMNS]]
+        columns.append(StockDaily.data_source)
+
+        with self.get_session() as session:
+            rows = session.execute(
+                select(*columns)
+                .where(and_(StockDaily.code == code, StockDaily.date <= target_date))
+                .order_by(desc(StockDaily.date))
+                .limit(days)
+            ).all()
+
+        if not rows:
+            logger.warning(f"未找到 {code} 的数据")
+            return pd.DataFrame(columns=[c.key for c in columns]), None
+
+        # 查询结果为降序，反转为升序供分析器使用
+        history = pd.DataFrame.from_records(rows[::-1], columns=[c.key for c in columns])
+        history[list(DAILY_VALUE_COLUMNS)] = history[list(DAILY_VALUE_COLUMNS)].astype(float)
+
+        today_data = rows[0]._asdict()
+        yesterday_data = rows[1]._asdict() if len(rows) > 1 else None
+
+        return history, self._build_analysis_context(code, today_data, yesterday_data)
+
+    def _history_window_from_store(
+        self, code: str, days: int, target_date: date
+    ) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        """
+        get_history_window 的列式文件实现（HISTORY_STORE=true 时使用）
+
+        列结构与数据库查询一致；文件中不保存数据来源，data_source 为 None
+        """
+        columns = ['code', 'date', *DAILY_VALUE_COLUMNS, 'data_source']
+        window = self.history_store.load_window(code, days, end=target_date)
+        if window is None:
+            logger.warning(f"未找到 {code} 的数据")
+            return pd.DataFrame(columns=columns), None
+
+        history = pd.DataFrame({'code': code, 'date': window['date'].astype(object)})
+        for col in DAILY_VALUE_COLUMNS:
+            history[col] = window[col]
+        history['data_source'] = None
+
+        def row_dict(i: int) -> Dict[str, Any]:
+            row: Dict[str, Any] = {'code': code, 'date': window['date'][i].item()}
+            for col in DAILY_VALUE_COLUMNS:
+                value = float(window[col][i])
+                row[col] = None if np.isnan(value) else value
+            row['data_source'] = None
+            return row
+
+        yesterday_data = row_dict(-2) if len(history) > 1 else None
+        return history, self._build_analysis_context(code, row_dict(-1), yesterday_data)
 
     def get_analysis_context(self, code: str, target_date: Optional[date] = None) -> Optional[Dict[str, Any]]:
         """
@@ -374,35 +1082,39 @@ class DatabaseManager:
         Returns:
             包含今日数据、昨日对比等信息的字典
         """
-        if target_date is None:
-            target_date = date.today()
-
-        # 获取最近2天数据
-        recent_data = self.get_latest_data(code, days=2)
+        _, context = self.get_history_window(code, days=2, target_date=target_date)
+        return context
 
-        if not recent_data:
-            logger.warning(f"未找到 {code} 的数据")
-            return None
+    def _build_analysis_context(
+        self, code: str, today_data: Dict[str, Any], yesterday_data: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        根据今日/昨日数据构建分析上下文
 
-        today_data = recent_data[0]
-        yesterday_data = recent_data[1] if len(recent_data) > 1 else None
+        Args:
+            code: 股票代码
+            today_data: 今日数据字典（字段同 StockDaily.to_dict()）
+            yesterday_data: 昨日数据字典（可选）
 
+        Returns:
+            包含今日数据、昨日对比等信息的字典
+        """
         context = {
             'code': code,
-            'date': today_data.date.isoformat(),
-            'today': today_data.to_dict(),
+            'date': today_data['date'].isoformat(),
+            'today': today_data,
         }
 
         if yesterday_data:
-            context['yesterday'] = yesterday_data.to_dict()
+            context['yesterday'] = yesterday_data
 
             # 计算相比昨日的变化
-            if yesterday_data.volume and yesterday_data.volume > 0:
-                context['volume_change_ratio'] = round(today_data.volume / yesterday_data.volume, 2)
+            if yesterday_data.get('volume') and yesterday_data['volume'] > 0 and today_data.get('volume') is not None:
+                context['volume_change_ratio'] = round(today_data['volume'] / yesterday_data['volume'], 2)
 
-            if yesterday_data.close and yesterday_data.close > 0:
+            if yesterday_data.get('close') and yesterday_data['close'] > 0 and today_data.get('close') is not None:
                 context['price_change_ratio'] = round(
-                    (today_data.close - yesterday_data.close) / yesterday_data.close * 100, 2
+                    (today_data['close'] - yesterday_data['close']) / yesterday_data['close'] * 100, 2
                 )
 
             # 均线形态判断
@@ -410,7 +1122,7 @@ class DatabaseManager:
 
         return context
 
-    def _analyze_ma_status(self, data: StockDaily) -> str:
+    def _analyze_ma_status(self, data: Dict[str, Any]) -> str:
         """
         分析均线形态
 
@@ -419,10 +1131,10 @@ class DatabaseManager:
         - 空头排列：close < ma5 < ma10 < ma20
         - 震荡整理：其他情况
         """
-        close = data.close or 0
-        ma5 = data.ma5 or 0
-        ma10 = data.ma10 or 0
-        ma20 = data.ma20 or 0
+        close = data.get('close') or 0
+        ma5 = data.get('ma5') or 0
+        ma10 = data.get('ma10') or 0
+        ma20 = data.get('ma20') or 0
 
         if close > ma5 > ma10 > ma20 > 0:
             return "多头排列 📈"
@@ -435,6 +1147,82 @@ class DatabaseManager:
         else:
             return "震荡整理 ↔️"
 
+    def get_analysis_result(self, code: str, trade_date: date, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        查询已保存的分析结果
+
+        Args:
+            code: 股票代码
+            trade_date: 交易日
+            fingerprint: 输入指纹
+
+        Returns:
+            保存时的结果字典（字段同 AnalysisResult），不存在返回 None
+        """
+        with self.get_session() as session:
+            payload = session.execute(
+                select(AnalysisRecord.payload).where(
+                    and_(
+                        AnalysisRecord.code == code,
+                        AnalysisRecord.trade_date == trade_date,
+                        AnalysisRecord.fingerprint == fingerprint,
+                    )
+                )
+            ).scalar_one_or_none()
+
+        if payload is None:
+            return None
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            logger.warning(f"[{code}] 已保存的分析结果无法解析，忽略: {e}")
+            return None
+
+    def save_analysis_result(self, code: str, trade_date: date, fingerprint: str, result: Dict[str, Any]) -> None:
+        """
+        保存分析结果（同一键已存在时覆盖）
+
+        Args:
+            code: 股票代码
+            trade_date: 交易日
+            fingerprint: 输入指纹
+            result: 结果字典（如 dataclasses.asdict(AnalysisResult)）
+        """
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+
+        def write(session: Session) -> None:
+            record = session.execute(
+                select(AnalysisRecord).where(
+                    and_(
+                        AnalysisRecord.code == code,
+                        AnalysisRecord.trade_date == trade_date,
+                        AnalysisRecord.fingerprint == fingerprint,
+                    )
+                )
+            ).scalar_one_or_none()
+
+            if record is None:
+                session.add(AnalysisRecord(code=code, trade_date=trade_date, fingerprint=fingerprint, payload=payload))
+            else:
+                record.payload = payload
+                record.created_at = datetime.now()
+
+        try:
+            if self._writer is not None:
+                self._writer.submit(write)
+                return
+
+            with self.get_session() as session:
+                try:
+                    write(session)
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    raise
+        except IntegrityError:
+            # 并发保存了同一键，保留先写入的结果
+            pass
+
 
 # 便捷函数
 def get_db() -> DatabaseManager:
@@ -442,7 +1230,93 @@ def get_db() -> DatabaseManager:
     return DatabaseManager.get_instance()
 
 
+def _stress_benchmark(workers: int = 8, stocks: int = 160, bars: int = 250, readers: int = 4) -> None:
+    """
+    并发写入压力测试：workers 个线程同时保存日线，readers 个线程同时读取
+
+    对比 原模式 / WAL / WAL+写入队列 三种配置的耗时、读取次数与失败次数
+    （运行：python storage.py --bench [workers]）
+    """
+    import tempfile
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    logging.getLogger(__name__).setLevel(logging.ERROR)
+
+    dates = pd.bdate_range(end=date.today(), periods=bars)
+    codes = [f"{600000 + i}" for i in range(stocks)]
+    frames = {
+        code: pd.DataFrame(
+            {
+                'date': dates,
+                **{col: np.random.default_rng(i).random(bars) * 100 for col in DAILY_VALUE_COLUMNS},
+            }
+        )
+        for i, code in enumerate(codes)
+    }
+
+    modes = [("原模式", False, False), ("WAL", True, False), ("WAL+写入队列", True, True)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for index, (label, wal, write_queue) in enumerate(modes):
+            DatabaseManager.reset_instance()
+            db = DatabaseManager(f"sqlite:///{tmp}/bench_{index}.db", wal=wal, write_queue=write_queue)
+
+            done = threading.Event()
+            read_latencies: List[float] = []
+            errors: List[str] = []
+
+            def save(code: str) -> None:
+                try:
+                    db.save_daily_data(frames[code], code, 'Bench')
+                except Exception as e:
+                    errors.append(str(e))
+
+            def read(slot: int) -> None:
+                # 模拟分析线程：读取一只股票的历史窗口后处理 5ms
+                i = slot
+                while not done.is_set():
+                    read_start = time.perf_counter()
+                    try:
+                        db.get_history_window(codes[i % stocks], days=60)
+                        read_latencies.append(time.perf_counter() - read_start)
+                    except Exception as e:
+                        errors.append(str(e))
+                    i += readers
+                    time.sleep(0.005)
+
+            reader_threads = [threading.Thread(target=read, args=(slot,)) for slot in range(readers)]
+            for thread in reader_threads:
+                thread.start()
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(save, codes))
+            elapsed = time.perf_counter() - start
+
+            done.set()
+            for thread in reader_threads:
+                thread.join()
+
+            commits = db._writer.commits if db._writer is not None else stocks
+            locked = sum(1 for e in errors if 'locked' in e)
+            p95 = np.percentile(read_latencies, 95) * 1000 if read_latencies else 0.0
+            print(
+                f"{label}: 写入 {stocks} 只 x {bars} 条 耗时 {elapsed:.2f}s, 提交 {commits} 次, "
+                f"并发读取 {len(read_latencies)} 次（p95 {p95:.1f}ms）, "
+                f"失败 {len(errors)} 次（database is locked {locked} 次）"
+            )
+        DatabaseManager.reset_instance()
+
+
 if __name__ == "__main__":
+    import sys
+
+    if '--bench' in sys.argv:
+        logging.basicConfig(level=logging.WARNING)
+        args = [arg for arg in sys.argv[1:] if arg != '--bench']
+        _stress_benchmark(workers=int(args[0]) if args else 8)
+        sys.exit(0)
+
     # 测试代码
     logging.basicConfig(level=logging.DEBUG)
 
@@ -479,3 +1353,7 @@ if __name__ == "__main__":
     # 测试获取上下文
     context = db.get_analysis_context('600519')
     print(f"分析上下文: {context}")
+
+    # 测试面板查询
+    panel = db.get_panel(['600519', '000001'], date.today() - timedelta(days=30), date.today(), ['close', 'volume'])
+    print(f"面板收盘价:\n{panel['close'].tail()}")
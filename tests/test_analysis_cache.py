@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""分析结果复用：输入指纹只随K线和新闻变化"""
+
+import pandas as pd
+import pytest
+
+from analyzer import AnalysisResult
+from data_provider.akshare_fetcher import RealtimeQuote
+from main import StockAnalysisPipeline
+from search_service import SearchResponse, SearchResult
+from stock_analyzer import StockTrendAnalyzer
+from storage import DatabaseManager
+
+
+class FakeSearch:
+    """每次返回相同的新闻，但摘要和搜索引擎不同（模拟两次运行间搜索结果的细微变化）"""
+
+    is_available = True
+
+    def __init__(self):
+        self.runs = 0
+        self.urls = ['https://example.com/a', 'https://example.com/b']
+
+    def search_comprehensive_intel(self, stock_code, stock_name, max_searches=3):
+        self.runs += 1
+        results = [SearchResult(title=url, snippet=f"摘要 {self.runs}", url=url, source='example') for url in self.urls]
+        return {'latest_news': SearchResponse(query=stock_code, results=results, provider=f"engine-{self.runs}")}
+
+    def format_intel_report(self, intel_results, stock_name):
+        return f"{stock_name} 情报 {self.runs}"
+
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, context, news_context=None):
+        self.calls += 1
+        return AnalysisResult(
+            code=context['code'],
+            name=context.get('stock_name', ''),
+            sentiment_score=65,
+            trend_prediction='看多',
+            operation_advice='持有',
+        )
+
+
+def _bars(closes):
+    return pd.DataFrame(
+        {
+            'date': pd.bdate_range('2026-09-01', periods=len(closes)),
+            'open': closes,
+            'high': [c + 0.5 for c in closes],
+            'low': [c - 0.5 for c in closes],
+            'close': closes,
+            'volume': 1000.0,
+            'amount': 10000.0,
+            'pct_chg': 0.0,
+        }
+    )
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    DatabaseManager.reset_instance()
+    db = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'stock.db'}", write_queue=False)
+
+    prices = iter(range(10, 100))
+    pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+    pipeline.db = db
+    pipeline.force_reanalyze = False
+    pipeline.trend_analyzer = StockTrendAnalyzer()
+    pipeline.search_service = FakeSearch()
+    pipeline.analyzer = FakeAnalyzer()
+    # 实时行情和筹码每次运行都不同，不应影响指纹
+    pipeline._get_realtime_quote_unified = lambda code: RealtimeQuote(
+        code=code, name='测试股', price=float(next(prices)), volume_ratio=1.5, turnover_rate=2.0
+    )
+    pipeline._get_chip_distribution_unified = lambda code: None
+    yield pipeline
+    DatabaseManager.reset_instance()
+
+
+def test_same_bars_reuse_saved_result(pipeline):
+    pipeline.db.save_daily_data(_bars([10.0 + i * 0.1 for i in range(30)]), '600519', 'Test')
+
+    first = pipeline.analyze_stock('600519')
+    second = pipeline.analyze_stock('600519')
+
+    assert first is not None and second is not None
+    assert pipeline.analyzer.calls == 1
+    assert second.operation_advice == first.operation_advice
+
+
+def test_new_bar_or_news_triggers_reanalysis(pipeline):
+    closes = [10.0 + i * 0.1 for i in range(30)]
+    pipeline.db.save_daily_data(_bars(closes), '600519', 'Test')
+    pipeline.analyze_stock('600519')
+
+    pipeline.search_service.urls.append('https://example.com/c')
+    pipeline.analyze_stock('600519')
+    assert pipeline.analyzer.calls == 2
+
+    pipeline.db.save_daily_data(_bars(closes + [13.5]), '600519', 'Test')
+    pipeline.analyze_stock('600519')
+    assert pipeline.analyzer.calls == 3
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Baostock 批量获取：连接锁与整批失败"""
+
+import threading
+
+import pandas as pd
+import pytest
+
+from data_provider import baostock_fetcher
+from data_provider.base import DataFetchError
+from data_provider.baostock_fetcher import BaostockFetcher
+
+
+def _raw_bars(bs_code):
+    return pd.DataFrame(
+        {
+            'date': ['2026-10-15', '2026-10-16'],
+            'open': ['10.0', '10.1'],
+            'high': ['10.2', '10.3'],
+            'low': ['9.9', '10.0'],
+            'close': ['10.1', '10.2'],
+            'volume': ['1000', '1200'],
+            'amount': ['10100', '12240'],
+            'pctChg': ['0.5', '0.99'],
+        }
+    )
+
+
+def test_batch_releases_lock_between_codes(monkeypatch):
+    lock_free = []
+
+    def query_k_data(bs_code, start_date, end_date, adjustflag="2"):
+        # 另一个线程（如 get_realtime_quote）此时应能拿到连接锁
+        def probe():
+            acquired = baostock_fetcher._connection._lock.acquire(timeout=0.5)
+            lock_free.append(acquired)
+            if acquired:
+                baostock_fetcher._connection._lock.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return _raw_bars(bs_code)
+
+    monkeypatch.setattr(baostock_fetcher._connection, 'query_k_data', query_k_data)
+
+    frames = BaostockFetcher().get_daily_data_batch(
+        ['600519', '000001'], start_date='2026-10-15', end_date='2026-10-16'
+    )
+
+    assert sorted(frames) == ['000001', '600519']
+    assert lock_free == [True, True]
+
+
+def test_batch_keeps_partial_results(monkeypatch):
+    def query_k_data(bs_code, start_date, end_date, adjustflag="2"):
+        if bs_code == 'sz.000001':
+            raise DataFetchError("Baostock 查询失败: 代码不存在")
+        return _raw_bars(bs_code)
+
+    monkeypatch.setattr(baostock_fetcher._connection, 'query_k_data', query_k_data)
+
+    frames = BaostockFetcher().get_daily_data_batch(
+        ['600519', '000001'], start_date='2026-10-15', end_date='2026-10-16'
+    )
+
+    assert list(frames) == ['600519']
+
+
+def test_batch_raises_when_every_code_fails(monkeypatch):
+    def query_k_data(bs_code, start_date, end_date, adjustflag="2"):
+        raise ConnectionError("socket closed")
+
+    monkeypatch.setattr(baostock_fetcher._connection, 'query_k_data', query_k_data)
+
+    with pytest.raises(DataFetchError):
+        BaostockFetcher().get_daily_data_batch(['600519', '000001'], start_date='2026-10-15', end_date='2026-10-16')
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""增量拉取：衔接校验与回退到完整窗口"""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from data_provider.trading_calendar import TradingCalendar
+from main import StockAnalysisPipeline
+from storage import DatabaseManager, LatestBar
+
+MON, TUE, WED, THU = date(2026, 10, 12), date(2026, 10, 13), date(2026, 10, 14), date(2026, 10, 15)
+
+
+class FakeManager:
+    """返回预设K线的数据源管理器"""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = 0
+
+    def get_daily_data(self, code, start_date=None, end_date=None, days=30):
+        self.calls += 1
+        df = pd.DataFrame(self.bars, columns=['date', 'close'])
+        df['date'] = pd.to_datetime(df['date'])
+        df['volume'] = 100.0
+        return df, 'FakeSource'
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    calendar = TradingCalendar(holidays={2026: []})
+    monkeypatch.setattr(calendar, 'last_completed_trading_day', lambda now=None: THU)
+
+    pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+    pipeline.config = SimpleNamespace(delta_max_gap_days=10)
+    pipeline.trading_calendar = calendar
+    return pipeline
+
+
+def _fetch(pipeline, bars, latest=LatestBar(MON, 10.0, 30)):
+    pipeline.fetcher_manager = FakeManager(bars)
+    return pipeline._fetch_delta('600519', latest, THU, THU)
+
+
+def test_delta_returns_new_bars(pipeline):
+    df, source = _fetch(pipeline, [(MON, 10.0), (TUE, 10.1), (WED, 10.2), (THU, 10.3)])
+
+    assert source == 'FakeSource'
+    assert list(df['date'].dt.date) == [TUE, WED, THU]
+
+
+def test_gap_falls_back(pipeline):
+    # 第一根K线不是数据库最新日期：无法衔接
+    assert _fetch(pipeline, [(TUE, 10.1), (WED, 10.2), (THU, 10.3)]) == (None, None)
+
+
+def test_close_mismatch_falls_back(pipeline):
+    # 最新日期的收盘价与数据库不一致：复权因子变化
+    assert _fetch(pipeline, [(MON, 9.5), (TUE, 10.1), (WED, 10.2), (THU, 10.3)]) == (None, None)
+
+
+def test_missing_bar_falls_back(pipeline):
+    # 已收盘交易日缺少 WED 的K线
+    assert _fetch(pipeline, [(MON, 10.0), (TUE, 10.1), (THU, 10.3)]) == (None, None)
+
+
+def test_short_history_falls_back_without_request(pipeline):
+    assert _fetch(pipeline, [(MON, 10.0)], latest=LatestBar(MON, 10.0, 5)) == (None, None)
+    assert pipeline.fetcher_manager.calls == 0
+
+
+def test_large_gap_falls_back_without_request(pipeline):
+    pipeline.config.delta_max_gap_days = 2
+    assert _fetch(pipeline, [(MON, 10.0)]) == (None, None)
+    assert pipeline.fetcher_manager.calls == 0
+
+
+def test_get_latest_bars(tmp_path):
+    DatabaseManager.reset_instance()
+    db = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'stock.db'}", write_queue=False)
+    try:
+        dates = pd.bdate_range('2026-09-01', periods=25)
+        df = pd.DataFrame(
+            {
+                'date': dates,
+                'open': 10.0,
+                'high': 11.0,
+                'low': 9.0,
+                'close': [10.0 + i for i in range(25)],
+                'volume': 100.0,
+                'amount': 1000.0,
+                'pct_chg': 0.0,
+            }
+        )
+        db.save_daily_data(df, '600519', 'Test')
+
+        latest = db.get_latest_bars(['600519', '000001'])
+
+        assert latest == {'600519': LatestBar(dates[-1].date(), 34.0, 25)}
+    finally:
+        DatabaseManager.reset_instance()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""efinance 批量获取：部分失败保留结果，整批失败抛出异常"""
+
+import efinance
+import pandas as pd
+import pytest
+import requests
+
+from data_provider.base import DataFetchError
+from data_provider.efinance_fetcher import EfinanceFetcher
+
+
+def _raw_bars(code):
+    return pd.DataFrame(
+        {
+            '股票代码': code,
+            '日期': ['2026-10-15', '2026-10-16'],
+            '开盘': [10.0, 10.1],
+            '收盘': [10.1, 10.2],
+            '最高': [10.2, 10.3],
+            '最低': [9.9, 10.0],
+            '成交量': [1000, 1200],
+            '成交额': [10100.0, 12240.0],
+            '涨跌幅': [0.5, 0.99],
+        }
+    )
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    fetcher = EfinanceFetcher()
+    monkeypatch.setattr(fetcher, '_enforce_rate_limit', lambda: None)
+    return fetcher
+
+
+def _fail_etf(monkeypatch, fetcher):
+    def get_daily_data(stock_code, start_date=None, end_date=None, days=30):
+        raise DataFetchError("ETF 获取失败") from requests.ConnectionError("reset")
+
+    monkeypatch.setattr(fetcher, 'get_daily_data', get_daily_data)
+
+
+def test_etf_failure_keeps_stock_frames(monkeypatch, fetcher):
+    monkeypatch.setattr(
+        efinance.stock, 'get_quote_history', lambda stock_codes, **kwargs: {c: _raw_bars(c) for c in stock_codes}
+    )
+    _fail_etf(monkeypatch, fetcher)
+
+    frames = fetcher.get_daily_data_batch(
+        ['600519', '000001', '510300'], start_date='2026-10-15', end_date='2026-10-16'
+    )
+
+    assert sorted(frames) == ['000001', '600519']
+
+
+def test_raises_when_every_request_fails(monkeypatch, fetcher):
+    def get_quote_history(stock_codes, **kwargs):
+        raise requests.ConnectionError("efinance down")
+
+    monkeypatch.setattr(efinance.stock, 'get_quote_history', get_quote_history)
+    _fail_etf(monkeypatch, fetcher)
+
+    with pytest.raises(DataFetchError):
+        fetcher.get_daily_data_batch(['600519', '510300'], start_date='2026-10-15', end_date='2026-10-16')
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""日线故障切换：数据源故障与单只股票缺失的区分"""
+
+import pandas as pd
+import pytest
+import requests
+
+from data_provider.base import BaseFetcher, DataFetcherManager, DataFetchError, is_source_error
+from data_provider.circuit_breaker import CircuitState, get_circuit_breaker
+
+
+class FakeFetcher(BaseFetcher):
+    """按代码返回预设结果的数据源：DataFrame、空表或异常"""
+
+    def __init__(self, name: str, priority: int, outcomes: dict):
+        self.name = name
+        self.priority = priority
+        self.outcomes = outcomes
+
+    def _fetch_raw_data(self, stock_code, start_date, end_date):
+        raise NotImplementedError
+
+    def _normalize_data(self, df, stock_code):
+        raise NotImplementedError
+
+    def get_daily_data(self, stock_code, start_date=None, end_date=None, days=30):
+        outcome = self.outcomes.get(stock_code, 'ok')
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome == 'empty':
+            return pd.DataFrame()
+        return pd.DataFrame({'date': ['2026-10-16'], 'close': [10.0], 'volume': [100.0]})
+
+
+def _wrapped(cause: BaseException) -> DataFetchError:
+    """模拟 BaseFetcher.get_daily_data 的异常包装（raise ... from e）"""
+    try:
+        raise DataFetchError("获取失败") from cause
+    except DataFetchError as e:
+        return e
+
+
+def _http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+@pytest.mark.parametrize(
+    'error, expected',
+    [
+        (_wrapped(requests.ConnectionError("reset")), True),
+        (_wrapped(requests.Timeout("timeout")), True),
+        (_wrapped(_http_error(503)), True),
+        (_wrapped(_http_error(429)), True),
+        (_wrapped(_http_error(404)), False),
+        (DataFetchError("未查询到 HK00700 的数据"), False),
+        (ValueError("不支持的代码"), False),
+    ],
+)
+def test_is_source_error(error, expected):
+    assert is_source_error(error) is expected
+
+
+def test_per_code_misses_do_not_open_breaker():
+    misses = {
+        'HK00700': DataFetchError("未查询到 HK00700 的数据"),
+        '510300': ValueError("不支持 ETF"),
+        '600001': 'empty',
+        '600002': 'empty',
+        '600003': DataFetchError("未查询到 600003 的数据"),
+    }
+    fetcher = FakeFetcher('MissingCodesSource', priority=0, outcomes=misses)
+    manager = DataFetcherManager(fetchers=[fetcher], hedge_enabled=False)
+
+    for code in misses:
+        with pytest.raises(DataFetchError):
+            manager.get_daily_data(code)
+
+    breaker = get_circuit_breaker(fetcher.name)
+    assert breaker.state == CircuitState.CLOSED
+    df, source = manager.get_daily_data('600519')
+    assert source == fetcher.name
+
+
+def test_source_errors_open_breaker():
+    down = _wrapped(requests.ConnectionError("reset"))
+    fetcher = FakeFetcher('DownSource', priority=0, outcomes={f'60000{i}': down for i in range(5)})
+    manager = DataFetcherManager(fetchers=[fetcher], hedge_enabled=False)
+
+    for i in range(5):
+        with pytest.raises(DataFetchError):
+            manager.get_daily_data(f'60000{i}')
+
+    assert get_circuit_breaker(fetcher.name).state == CircuitState.OPEN
+
+
+def test_batch_without_data_is_neutral():
+    codes = [f'60001{i}' for i in range(5)]
+    fetcher = FakeFetcher('EmptyBatchSource', priority=0, outcomes=dict.fromkeys(codes, 'empty'))
+    manager = DataFetcherManager(fetchers=[fetcher], hedge_enabled=False)
+
+    for _ in range(5):
+        assert manager.get_daily_data_batch(codes) == {}
+
+    assert get_circuit_breaker(fetcher.name).state == CircuitState.CLOSED
+
+
+def test_batch_source_failure_opens_breaker():
+    codes = [f'60002{i}' for i in range(3)]
+    down = _wrapped(requests.ConnectionError("reset"))
+    fetcher = FakeFetcher('DownBatchSource', priority=0, outcomes=dict.fromkeys(codes, down))
+    manager = DataFetcherManager(fetchers=[fetcher], hedge_enabled=False)
+
+    for _ in range(5):
+        assert manager.get_daily_data_batch(codes) == {}
+
+    assert get_circuit_breaker(fetcher.name).state == CircuitState.OPEN
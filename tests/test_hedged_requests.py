@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""对冲请求与熔断器半开名额"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from data_provider.base import BaseFetcher, DataFetcherManager, DataFetchError
+from data_provider.circuit_breaker import CircuitState, get_circuit_breaker
+
+
+class FakeFetcher(BaseFetcher):
+    """按预设行为返回日线的数据源（不发起网络请求）"""
+
+    def __init__(self, name: str, priority: int, gate: threading.Event = None, fail: bool = False):
+        self.name = name
+        self.priority = priority
+        self.gate = gate
+        self.fail = fail
+        self.calls = 0
+
+    def _fetch_raw_data(self, stock_code, start_date, end_date):
+        raise NotImplementedError
+
+    def _normalize_data(self, df, stock_code):
+        raise NotImplementedError
+
+    def get_daily_data(self, stock_code, start_date=None, end_date=None, days=30):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        if self.fail:
+            raise DataFetchError(f"[{self.name}] 连接失败") from ConnectionError("reset")
+        return pd.DataFrame({'date': ['2026-10-16'], 'close': [10.0], 'volume': [100.0]})
+
+
+def _half_open(name: str):
+    breaker = get_circuit_breaker(name)
+    breaker.open_seconds = 0.0
+    for _ in range(breaker.min_calls):
+        breaker.record_failure(0.01)
+    assert breaker.state == CircuitState.HALF_OPEN
+    return breaker
+
+
+class QueueingExecutor:
+    """把指定数据源的请求留在队列中（从不执行），其余请求交给真实线程池"""
+
+    def __init__(self, queued_source: str):
+        self.queued_source = queued_source
+        self.pool = ThreadPoolExecutor(max_workers=2)
+
+    def submit(self, fn, fetcher, *args):
+        if fetcher.name == self.queued_source:
+            return Future()
+        return self.pool.submit(fn, fetcher, *args)
+
+
+@pytest.fixture
+def queueing_executor(monkeypatch):
+    executor = QueueingExecutor('HedgeProbe')
+    monkeypatch.setattr(DataFetcherManager, '_get_hedge_executor', classmethod(lambda cls: executor))
+    yield executor
+    executor.pool.shutdown(wait=True)
+
+
+def test_cancelled_half_open_probe_releases_slot(queueing_executor):
+    gate = threading.Event()
+    primary = FakeFetcher('HedgePrimary', priority=0, gate=gate)
+    probe = FakeFetcher('HedgeProbe', priority=1)
+    breaker = _half_open(probe.name)
+
+    manager = DataFetcherManager(fetchers=[primary, probe], hedge_enabled=True, hedge_delay=0.05)
+
+    # 主请求超出预算后发起对冲，对冲请求在队列中等待
+    threading.Timer(0.3, gate.set).start()
+    df, source = manager.get_daily_data('600519')
+
+    assert source == primary.name
+    assert probe.calls == 0  # 排队中被取消，从未执行
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    # 主数据源失败后，半开的数据源应再次得到试探机会
+    queueing_executor.queued_source = None
+    primary.gate = None
+    primary.fail = True
+    df, source = manager.get_daily_data('000001')
+
+    assert source == probe.name
+    assert probe.calls == 1
+    assert breaker.state == CircuitState.CLOSED
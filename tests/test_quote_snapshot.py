@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""行情快照：批量请求不持锁，并发刷新合并为一次请求"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from data_provider.quote_snapshot import QuoteSnapshotService
+
+
+class SlowBatchFetcher:
+    """第一次请求立即返回，之后的请求阻塞到 release 被设置"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get_batch_realtime_quotes(self, codes):
+        self.calls.append(list(codes))
+        if len(self.calls) > 1:
+            self.started.set()
+            assert self.release.wait(5)
+        return dict.fromkeys(codes)
+
+
+def test_refresh_does_not_block_cached_lookups():
+    fetcher = SlowBatchFetcher()
+    service = QuoteSnapshotService(batch_fetcher=fetcher, ttl=60)
+    service.refresh(['600519'])
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(service.get_quote, '000001')
+        assert fetcher.started.wait(5)
+        # 补取 000001 期间，已在快照中的代码仍可直接读取
+        done = threading.Event()
+        threading.Thread(target=lambda: (service.get_quote('600519'), done.set())).start()
+        assert done.wait(1)
+        fetcher.release.set()
+        pending.result(5)
+
+    assert fetcher.calls == [['600519'], ['000001']]
+
+
+def test_concurrent_stale_refreshes_are_coalesced():
+    fetcher = SlowBatchFetcher()
+    service = QuoteSnapshotService(batch_fetcher=fetcher, ttl=60)
+    service.refresh(['600519', '000001'])
+    service._refreshed_at = 0.0001  # 快照过期
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(service.get_quote, '600519') for _ in range(4)]
+        assert fetcher.started.wait(5)
+        fetcher.release.set()
+        for future in futures:
+            future.result(5)
+
+    assert fetcher.calls[1:] == [['600519', '000001']]
+    assert service.request_count == 2
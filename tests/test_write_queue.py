@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""写入队列：日线与分析结果共用写线程，关闭后拒绝新请求"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from storage import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    DatabaseManager.reset_instance()
+    db = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'stock.db'}", write_queue=True)
+    yield db
+    DatabaseManager.reset_instance()
+
+
+def test_analysis_result_goes_through_queue(db):
+    bars = pd.DataFrame({'date': pd.bdate_range('2026-10-12', periods=3), 'close': [10.0, 10.1, 10.2]})
+    db.save_daily_data(bars, '600519', 'Test')
+    db.save_analysis_result('600519', date(2026, 10, 14), 'abc', {'score': 1})
+    db.save_analysis_result('600519', date(2026, 10, 14), 'abc', {'score': 2})
+
+    assert db.get_analysis_result('600519', date(2026, 10, 14), 'abc') == {'score': 2}
+    assert db._writer.requests == 3
+
+
+def test_submit_after_close_is_rejected(db):
+    writer = db._writer
+    writer.close()
+
+    with pytest.raises(RuntimeError):
+        writer.submit(lambda session: None)